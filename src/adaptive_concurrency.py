@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多平台影片下載器 - 自動調整同時下載數
+
+依下載線程回報的速度（progress_hook 的 speed）計算所有任務的總速度，以 AIMD 方式調整同時下載數：
+- 佇列還有等待中的任務、且上次增加後總速度有明顯上升時，每次增加一個名額（加法增加）
+- 增加名額後總速度沒有上升（頻寬已用滿），退回上一個數量並暫停一段時間再試探
+- 平台回應 429 時減半、單一任務速度大幅下降時減少四分之一（乘法減少）
+每次調整後等待新任務開始傳輸、速度穩定後才重新量測，避免依暫時的數字來回調整。
+"""
+
+import time
+import threading
+
+try:
+    from src.utils import log
+    from src.retry_policy import ERROR_RATE_LIMITED
+except ImportError:
+    from utils import log
+    from retry_policy import ERROR_RATE_LIMITED
+
+
+class AdaptiveConcurrency:
+    """同時下載數控制器（report/record_error 可在下載線程中呼叫，evaluate 由介面的定時器呼叫）"""
+
+    EVALUATE_INTERVAL = 5  # 評估間隔（秒）
+    SETTLE_SECONDS = 15  # 調整後等待新任務開始傳輸的時間（秒），這段時間不量測
+    MIN_SAMPLES = 3  # 至少取得幾次總速度才做判斷（取平均）
+    STALE_SECONDS = 10  # 超過此時間沒有回報速度的任務不計入（暫停、合併中）
+    GAIN_THRESHOLD = 1.05  # 增加名額後總速度須上升超過此比例才繼續增加
+    SLOWDOWN_RATIO = 0.5  # 單一任務速度低於此比例（相對於此數量剛穩定時）視為速度下降
+    HOLD_SECONDS = 120  # 退回或減少後，暫停此時間才再次試探增加
+    MIN_LEVEL = 1
+    MAX_LEVEL = 10
+
+    def __init__(self, level=2, max_level=MAX_LEVEL):
+        self._lock = threading.Lock()
+        self._speeds = {}  # 任務名稱 -> (速度 bytes/s, 回報時間)
+        self._rate_limited = False  # 上次評估後是否有任務被限速
+        self.max_level = max(self.MIN_LEVEL, int(max_level))
+        self.level = self.MIN_LEVEL
+        self.throughput = 0  # 最近一次量測的總速度 (bytes/s)
+        self.reset(level)
+
+    def reset(self, level):
+        """重新從指定的同時下載數開始調整（例如使用者手動修改）"""
+        self.level = max(self.MIN_LEVEL, min(self.max_level, int(level)))
+        self._changed_at = time.monotonic()
+        self._samples = []
+        self._per_job = None  # 目前數量穩定後的單一任務平均速度
+        self._probe = None  # 上次增加名額前的總速度，None 表示上次調整不是增加
+        self._hold_until = 0.0
+
+    # ---- 下載線程回報 ----
+
+    def report(self, job, speed):
+        """回報任務目前的下載速度（在下載線程的進度回調中呼叫）"""
+        if not speed:
+            return
+        with self._lock:
+            self._speeds[job] = (speed, time.monotonic())
+
+    def job_finished(self, job):
+        with self._lock:
+            self._speeds.pop(job, None)
+
+    def record_error(self, error_class):
+        """記錄失敗的任務；限速錯誤會在下次評估時減少同時下載數"""
+        if error_class == ERROR_RATE_LIMITED:
+            with self._lock:
+                self._rate_limited = True
+
+    # ---- 調整 ----
+
+    def evaluate(self, saturated):
+        """評估是否調整同時下載數，返回新的數量；不需要調整時返回 None
+
+        saturated: 佇列中是否有等待中的任務且名額已用滿（只有這時增加名額才有意義）
+        """
+        now = time.monotonic()
+        with self._lock:
+            speeds = [speed for speed, seen in self._speeds.values() if now - seen <= self.STALE_SECONDS]
+            rate_limited, self._rate_limited = self._rate_limited, False
+        self.throughput = sum(speeds)
+
+        if rate_limited:
+            self._hold_until = now + self.HOLD_SECONDS
+            return self._change(self.level // 2, "平台限速 (429)", now)
+        if now - self._changed_at < self.SETTLE_SECONDS or not speeds:
+            return None
+        self._samples.append(self.throughput)
+        if len(self._samples) < self.MIN_SAMPLES:
+            return None
+        throughput = sum(self._samples[-self.MIN_SAMPLES:]) / self.MIN_SAMPLES
+        per_job = throughput / len(speeds)
+
+        if self._probe is not None:
+            previous, self._probe = self._probe, None
+            if throughput < previous * self.GAIN_THRESHOLD:
+                # 多一個任務沒有帶來更多速度，頻寬已用滿
+                self._hold_until = now + self.HOLD_SECONDS
+                return self._change(self.level - 1, f"總速度沒有增加 ({throughput / 1024:.0f} KB/s)", now)
+
+        if self._per_job is None:
+            self._per_job = per_job
+        elif per_job < self._per_job * self.SLOWDOWN_RATIO:
+            self._hold_until = now + self.HOLD_SECONDS
+            return self._change(self.level - max(1, self.level // 4),
+                                f"單一任務速度下降至 {per_job / 1024:.0f} KB/s", now)
+
+        if saturated and now >= self._hold_until and self.level < self.max_level:
+            level = self._change(self.level + 1, f"總速度 {throughput / 1024:.0f} KB/s", now)
+            self._probe = throughput if level is not None else None
+            return level
+        return None
+
+    def _change(self, level, reason, now):
+        level = max(self.MIN_LEVEL, min(self.max_level, level))
+        self._changed_at = now
+        self._samples = []
+        self._per_job = None
+        self._probe = None
+        if level == self.level:
+            return None
+        log(f"自動調整同時下載數: {self.level} -> {level}（{reason}）")
+        self.level = level
+        return level
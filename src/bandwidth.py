@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多平台影片下載器 - 頻寬管理
+
+所有下載線程在進度回調中向同一個令牌桶 (token bucket) 取用流量，總速度不會超過設定的上限，
+而且某個任務沒有用完的頻寬（解析資訊中、來源較慢）其他任務可以直接使用。
+任務收到第一批資料時才參與分配，依各任務的權重（優先順序）分配連線數與外部下載器的速度上限，
+任務開始傳輸、結束、暫停或繼續時立即重新分配。
+yt-dlp 的速度上限 (ratelimit) 與片段同時下載數 (concurrent_fragment_downloads) 只用於新建立的下載，
+讓流量較平均；yt-dlp 的片段下載器會複製參數，之後的調整不一定會生效，實際限制以令牌桶為準。
+"""
+
+import time
+import threading
+
+try:
+    from src.utils import log, LOG_DEBUG
+except ImportError:
+    from utils import log, LOG_DEBUG
+
+
+class BandwidthManager:
+    """全域頻寬管理器（可在多個下載線程中同時使用）"""
+
+    DEFAULT_BUFFER_MB = 16  # 下載緩衝區大小預設值 (MB)
+    DEFAULT_MEMORY_MB = 500  # 最大記憶體使用量預設值 (MB)
+    DEFAULT_CONNECTIONS = 16  # 所有任務合計的連線數上限預設值
+    MIN_BLOCK_SIZE = 16 * 1024  # yt-dlp 每次讀取的最小區塊 (bytes)
+    MAX_BLOCK_SIZE = 1024 * 1024  # yt-dlp 每次讀取的最大初始區塊 (bytes)
+    BURST_SECONDS = 1.0  # 令牌桶容量（可累積幾秒的流量）
+
+    def __init__(self, speed_limit_kbps=0, buffer_size_mb=DEFAULT_BUFFER_MB, memory_limit_mb=DEFAULT_MEMORY_MB,
+                 fragment_concurrency=True, max_connections=DEFAULT_CONNECTIONS):
+        self._lock = threading.Lock()
+        self._jobs = {}  # 正在傳輸的任務名稱 -> 使用中的 yt-dlp 參數 (ydl.params)，尚未建立時為 None
+        self._waiting = {}  # 已開始但還沒有收到資料的任務（解析資訊中），不參與分配
+        self._paused = {}  # 已暫停的任務（不參與分配），繼續後等收到資料時再參與
+        self._weights = {}  # 任務名稱 -> 分配權重（沒有設定時為 1）
+        self._tokens = 0.0  # 共用令牌桶的令牌數（負數表示已預支的流量）
+        self._refilled = time.monotonic()  # 令牌桶上次補充的時間
+        self.rate = 0  # 總速度上限 (bytes/s)，0 表示無限制
+        self.buffer_bytes = self.DEFAULT_BUFFER_MB * 1024 * 1024
+        self.memory_bytes = self.DEFAULT_MEMORY_MB * 1024 * 1024
+        self.fragment_concurrency = True  # 是否並行下載 DASH/HLS 片段
+        self.max_connections = self.DEFAULT_CONNECTIONS
+        self.configure(speed_limit_kbps, buffer_size_mb, memory_limit_mb, fragment_concurrency, max_connections)
+
+    # ---- 設定 ----
+
+    def configure(self, speed_limit_kbps=None, buffer_size_mb=None, memory_limit_mb=None,
+                  fragment_concurrency=None, max_connections=None):
+        """更新效能設定（None 表示不變），並重新分配所有任務的頻寬"""
+        with self._lock:
+            if speed_limit_kbps is not None:
+                self.rate = max(0, int(speed_limit_kbps)) * 1024
+            if buffer_size_mb is not None:
+                self.buffer_bytes = max(1, int(buffer_size_mb)) * 1024 * 1024
+            if memory_limit_mb is not None:
+                self.memory_bytes = max(1, int(memory_limit_mb)) * 1024 * 1024
+            if fragment_concurrency is not None:
+                self.fragment_concurrency = bool(fragment_concurrency)
+            if max_connections is not None:
+                self.max_connections = max(1, int(max_connections))
+            self._rebalance()
+        log(f"頻寬設定: 速度限制 {self.rate // 1024} KB/s, 緩衝區 {self.buffer_bytes // (1024 * 1024)} MB, "
+            f"記憶體上限 {self.memory_bytes // (1024 * 1024)} MB, "
+            f"片段並行 {'開啟' if self.fragment_concurrency else '關閉'} (連線數上限 {self.max_connections})")
+
+    def _capacity(self):
+        return max(self.rate * self.BURST_SECONDS, self.MIN_BLOCK_SIZE)
+
+    # ---- 任務登記 ----
+
+    def job_started(self, job, weight=1):
+        """任務開始（解析資訊中）；收到第一批資料時才參與分配"""
+        with self._lock:
+            self._weights[job] = max(1, weight)
+            if job in self._paused or job in self._jobs:
+                return
+            self._waiting.setdefault(job, None)
+
+    def set_weight(self, job, weight):
+        """變更任務的分配權重（例如調整優先順序），進行中的下載立即套用"""
+        with self._lock:
+            if job not in self._weights:
+                return
+            self._weights[job] = max(1, weight)
+            self._rebalance()
+
+    def job_finished(self, job):
+        """任務結束（完成、失敗或取消）"""
+        with self._lock:
+            self._paused.pop(job, None)
+            self._waiting.pop(job, None)
+            self._weights.pop(job, None)
+            if self._jobs.pop(job, False) is False:
+                return
+            self._rebalance()
+
+    def job_paused(self, job):
+        """任務暫停：讓出頻寬與連線數給其他任務"""
+        with self._lock:
+            if job in self._waiting:
+                self._paused[job] = self._waiting.pop(job)
+                return
+            if job not in self._jobs:
+                return
+            self._paused[job] = self._jobs.pop(job)
+            self._rebalance()
+
+    def job_resumed(self, job):
+        """任務繼續：再次收到資料時重新參與分配"""
+        with self._lock:
+            if job not in self._paused:
+                return
+            self._waiting[job] = self._paused.pop(job)
+
+    def bind(self, job, params):
+        """登記任務目前使用的 yt-dlp 參數，重新分配時直接更新（一般 HTTP 下載每個區塊都會讀取 ratelimit）"""
+        with self._lock:
+            if job in self._jobs:
+                self._jobs[job] = params
+            elif job in self._paused:
+                self._paused[job] = params
+            else:
+                self._waiting[job] = params
+            params.update(self._job_options(job))
+
+    def active_count(self):
+        """正在傳輸資料的任務數量"""
+        with self._lock:
+            return len(self._jobs)
+
+    # ---- 分配 ----
+
+    def _share(self, job):
+        """任務可分得的比例（依權重；尚未登記的新任務以權重 1 計算）"""
+        weight = self._weights.get(job, 1)
+        total = sum(self._weights.get(other, 1) for other in self._jobs)
+        if job not in self._jobs:
+            total += weight
+        return weight / max(1, total)
+
+    def _job_options(self, job=None):
+        """依目前任務數量與權重計算單一任務的 yt-dlp 選項"""
+        active = max(1, len(self._jobs))
+        share_ratio = self._share(job)
+        # 每個任務可使用的緩衝記憶體
+        chunk_size = min(self.buffer_bytes, self.memory_bytes // active)
+        workers = self._fragment_workers(share_ratio)
+        options = {
+            'http_chunk_size': None,
+            'ratelimit': None,
+            'concurrent_fragment_downloads': workers,
+        }
+        block_size = min(chunk_size, self.MAX_BLOCK_SIZE)
+        if self.rate > 0:
+            # 總速度由共用令牌桶限制；單一任務最多可使用全部頻寬，其他任務沒用完的頻寬不會被閒置
+            # ratelimit 套用在每個片段連線上，同時下載多個片段時平分給每個連線
+            options['ratelimit'] = max(1, self.rate // workers)
+            # 有速度限制時以較小的分段請求與讀取區塊下載，避免流量忽快忽慢
+            options['http_chunk_size'] = max(self.MIN_BLOCK_SIZE, chunk_size)
+            block_size = min(block_size, options['ratelimit'])
+        options['buffersize'] = max(self.MIN_BLOCK_SIZE, block_size)
+        return options
+
+    def _fragment_workers(self, share_ratio):
+        """單一任務可同時下載的片段數：連線數上限依權重分給所有進行中的任務"""
+        if not self.fragment_concurrency:
+            return 1
+        return max(1, int(self.max_connections * share_ratio))
+
+    def job_rate(self, job=None):
+        """任務依權重分得的速度 (bytes/s)，沒有限制時返回 None
+
+        外部下載器（aria2c）不經過令牌桶，以此作為它的速度上限
+        """
+        with self._lock:
+            if self.rate <= 0:
+                return None
+            return max(1, int(self.rate * self._share(job)))
+
+    def connection_share(self, job=None):
+        """單一任務目前可使用的連線數（外部下載器的分段連線數）"""
+        with self._lock:
+            return max(1, int(self.max_connections * self._share(job)))
+
+    def _rebalance(self):
+        """任務數量、權重或設定改變時更新所有進行中任務的選項"""
+        for job, params in self._jobs.items():
+            if params is not None:
+                options = self._job_options(job)
+                params.update(options)
+                log(f"頻寬重新分配: {job} {options['concurrent_fragment_downloads']} 個片段同時下載", LOG_DEBUG)
+
+    def job_options(self, job=None):
+        """新建立的 yt-dlp 實例應使用的頻寬選項"""
+        with self._lock:
+            return self._job_options(job)
+
+    # ---- 令牌桶 ----
+
+    def reserve(self, nbytes, job=None):
+        """任務從共用令牌桶取用 nbytes 的流量，返回需要等待的秒數（無限制時為 0）
+
+        任務第一次取用時開始參與分配（已經在傳輸資料）
+        """
+        if nbytes <= 0:
+            return 0.0
+        with self._lock:
+            if job in self._waiting:
+                self._jobs[job] = self._waiting.pop(job)
+                self._rebalance()
+            if self.rate <= 0:
+                return 0.0
+            now = time.monotonic()
+            self._tokens = min(self._capacity(), self._tokens + (now - self._refilled) * self.rate)
+            self._refilled = now
+            self._tokens -= nbytes
+            if self._tokens >= 0:
+                return 0.0
+            # 令牌不足：先記帳，呼叫者等待到令牌補足為止（所有任務的預支依序排隊，總速度不超過上限）
+            return -self._tokens / self.rate
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多平台影片下載器 - 下載存檔（與 yt-dlp 的 download_archive 相容）
+
+存檔為文字檔，每行一筆「extractor 影片ID」（例如 "youtube dQw4w9WgXcQ"），
+可與 yt-dlp --download-archive 共用同一個檔案。
+啟動時在背景線程一次載入到記憶體中的雜湊集合，之後每個網址的查詢都是常數時間，
+貼上大量網址時不需要逐行掃描檔案，並且在解析影片資訊之前就能略過已下載的影片。
+"""
+
+import os
+import time
+import hashlib
+import threading
+from array import array
+from bisect import bisect_left
+
+from yt_dlp.utils import make_archive_id
+
+try:
+    from src.utils import log
+    from src.video_key import video_key
+except ImportError:
+    from utils import log
+    from video_key import video_key
+
+
+def archive_id(url):
+    """網址在存檔中的項目（不需要連線）；無法辨識時返回 None"""
+    key = video_key(url)
+    if key is None:
+        return None
+    return make_archive_id(key[0], key[1])
+
+
+def _digest(entry):
+    return int.from_bytes(hashlib.blake2b(entry.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class DownloadArchive:
+    """下載存檔的記憶體索引，可直接作為 yt-dlp 的 download_archive 選項（可在多個線程中同時使用）"""
+
+    # 超過此大小的存檔只保存每筆項目的 64 位元雜湊（已排序，二分搜尋），
+    # 每筆約 8 位元組；與 Bloom filter 不同，不會因誤判而略過沒有下載過的影片
+    COMPACT_BYTES = 32 * 1024 * 1024
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = set()  # 存檔項目（小型存檔及啟動後新增的項目）
+        self._digests = array("Q")  # 大型存檔項目的雜湊（已排序）
+        self._loaded = threading.Event()
+        threading.Thread(target=self._load, name="archive-load", daemon=True).start()
+
+    def _load(self):
+        start = time.monotonic()
+        try:
+            compact = os.path.getsize(self.path) > self.COMPACT_BYTES
+            with open(self.path, "r", encoding="utf-8", errors="replace") as archive_file:
+                entries = (line.strip() for line in archive_file)
+                if compact:
+                    self._digests = array("Q", sorted({_digest(entry) for entry in entries if entry}))
+                else:
+                    self._entries.update(entry for entry in entries if entry)
+            log(f"已載入下載存檔: {self.path}，共 {len(self._entries) + len(self._digests)} 筆，"
+                f"耗時 {time.monotonic() - start:.2f} 秒")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            log(f"無法讀取下載存檔: {str(e)}")
+        finally:
+            self._loaded.set()
+
+    def __contains__(self, entry):
+        return self.contains(entry)
+
+    def contains(self, entry, wait=True):
+        """項目是否在存檔中；wait 為 False 時不等待載入，尚未載入完成時返回 False"""
+        if not wait and not self._loaded.is_set():
+            return False
+        self._loaded.wait()
+        if entry in self._entries:
+            return True
+        if self._digests:
+            digest = _digest(entry)
+            index = bisect_left(self._digests, digest)
+            return index < len(self._digests) and self._digests[index] == digest
+        return False
+
+    def __len__(self):
+        self._loaded.wait()
+        return len(self._entries) + len(self._digests)
+
+    def add(self, entry):
+        """加入項目並附加到存檔檔案（yt-dlp 下載完成後呼叫；不等待載入，重複的行不影響讀取）"""
+        with self._lock:
+            if self.contains(entry, wait=False):
+                return
+            self._entries.add(entry)
+            try:
+                with open(self.path, "a", encoding="utf-8") as archive_file:
+                    archive_file.write(entry + "\n")
+            except OSError as e:
+                log(f"無法寫入下載存檔: {str(e)}")
+
+    def contains_url(self, url, wait=True):
+        """網址的影片是否已記錄在存檔中（wait 為 False 時尚未載入完成視為不在存檔中）"""
+        entry = archive_id(url)
+        return entry is not None and self.contains(entry, wait)
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多平台影片下載器 - 下載引擎
+
+native 使用 yt-dlp 內建的下載器；aria2c 透過 yt-dlp 的 external_downloader
+以多個連線分段下載單一檔案，適合對每個連線限速的 CDN。
+yt-dlp 的 aria2c 下載器不會回報進度，這裡的版本會解析 aria2c 的進度輸出，
+轉成一般的 progress_hooks 回調，下載列表可以照常顯示進度、速度與剩餘時間。
+aria2c 在另一個行程中下載，進度回調中等待無法限制它的速度，因此：
+- 以 --max-download-limit 傳入任務目前分得的頻寬，分配改變時重新啟動 aria2c（依控制檔續傳）
+- 暫停時結束 aria2c，繼續時重新啟動續傳
+找不到 aria2c 執行檔，或 yt-dlp 的內部結構改變而無法登記這個下載器時，自動改用 native。
+"""
+
+import re
+import time
+import subprocess
+from functools import lru_cache
+
+from yt_dlp.utils import Popen, parse_filesize
+
+# 以下依賴 yt-dlp 的內部結構（external._BY_NAME、Aria2cFD._make_cmd/_call_process），
+# 新版 yt-dlp 改變結構時不可讓程式無法啟動，改用 native 下載
+try:
+    from yt_dlp.downloader import external
+    from yt_dlp.downloader.external import Aria2cFD
+except ImportError:
+    external = None
+    Aria2cFD = object
+
+try:
+    from src.utils import log
+except ImportError:
+    from utils import log
+
+ENGINE_NATIVE = "native"
+ENGINE_ARIA2C = "aria2c"
+
+# 引擎名稱 -> 顯示名稱
+DOWNLOAD_ENGINES = {
+    ENGINE_NATIVE: "yt-dlp 內建下載器",
+    ENGINE_ARIA2C: "aria2c 多連線下載",
+}
+
+# aria2c 進度輸出，例如 [#2089b0 400.0MiB/1.3GiB(29%) CN:16 DL:20MiB ETA:46s]
+_READOUT_RE = re.compile(
+    r"\[#\w+\s+(?P<done>[\d.]+[KMGT]?i?B)/(?P<total>[\d.]+[KMGT]?i?B)"
+    r"(?:\(\d+%\))?(?:\s+CN:\d+)?(?:\s+DL:(?P<speed>[\d.]+[KMGT]?i?B))?(?:\s+ETA:(?P<eta>\w+))?")
+_ETA_RE = re.compile(r"(\d+)([hms])")
+_ETA_UNITS = {"h": 3600, "m": 60, "s": 1}
+
+
+def _parse_eta(text):
+    if not text:
+        return None
+    return sum(int(value) * _ETA_UNITS[unit] for value, unit in _ETA_RE.findall(text)) or None
+
+
+class Aria2cProgressFD(Aria2cFD):
+    """會回報下載進度、依任務頻寬限速並支援暫停的 aria2c 下載器
+
+    params 中的 aria2c_rate_limit（返回速度上限 bytes/s 或 None 的函式）與
+    aria2c_paused（返回是否暫停的函式）由下載線程透過 engine_options 提供
+    """
+
+    EXE_NAME = "aria2c"
+    RESTART_INTERVAL = 10  # 速度上限改變時，距離上次啟動至少此秒數才重新啟動 aria2c
+    LIMIT_TOLERANCE = 0.2  # 速度上限變化超過此比例才重新啟動
+    PAUSE_POLL = 0.2  # 暫停時檢查是否繼續的間隔（秒）
+
+    def real_download(self, filename, info_dict):
+        self._progress_filename = filename
+        return super().real_download(filename, info_dict)
+
+    def _make_cmd(self, tmpfilename, info_dict):
+        cmd = super()._make_cmd(tmpfilename, info_dict)
+        # yt-dlp 以 ratelimit 設定整體上限，改由 _call_process 依任務目前分得的頻寬設定
+        if "--max-overall-download-limit" in cmd:
+            index = cmd.index("--max-overall-download-limit")
+            del cmd[index:index + 2]
+        return cmd
+
+    def _rate_limit(self):
+        rate_limit = self.params.get("aria2c_rate_limit")
+        limit = rate_limit() if callable(rate_limit) else self.params.get("ratelimit")
+        return int(limit) if limit else None
+
+    def _paused(self):
+        paused = self.params.get("aria2c_paused")
+        return bool(paused()) if callable(paused) else False
+
+    def _limit_changed(self, current, limit):
+        if current is None or limit is None:
+            return current != limit
+        return abs(limit - current) > current * self.LIMIT_TOLERANCE
+
+    @staticmethod
+    def _with_limit(cmd, limit):
+        if not limit:
+            return cmd
+        index = cmd.index("--") if "--" in cmd else len(cmd)
+        return cmd[:index] + [f"--max-download-limit={limit}"] + cmd[index:]
+
+    def _call_process(self, cmd, info_dict):
+        # 分段 (fragments) 下載由 yt-dlp 自行逐段處理，沿用原本的方式
+        if "fragments" in info_dict:
+            return super()._call_process(cmd, info_dict)
+
+        output = []
+        while True:
+            limit = self._rate_limit()
+            started = time.monotonic()
+            restart = None
+            with Popen(self._with_limit(cmd, limit), stdout=subprocess.PIPE,
+                       stderr=subprocess.STDOUT, text=True) as proc:
+                try:
+                    for line in self._readout_lines(proc.stdout):
+                        if self._paused():
+                            restart = "pause"
+                            break
+                        if (time.monotonic() - started >= self.RESTART_INTERVAL
+                                and self._limit_changed(limit, self._rate_limit())):
+                            restart = "limit"
+                            break
+                        if not self._report_readout(line, info_dict):
+                            output.append(line)
+                    if restart:
+                        # aria2c 收到結束信號時會保存控制檔，重新啟動後從中斷處續傳
+                        proc.terminate()
+                    proc.wait()
+                except BaseException:
+                    # 進度回調中取消下載時結束 aria2c
+                    proc.kill()
+                    proc.wait()
+                    raise
+            if restart is None:
+                return "", "\n".join(output), proc.returncode
+            if restart == "pause":
+                while self._paused():
+                    time.sleep(self.PAUSE_POLL)
+            else:
+                self.to_screen(f"[aria2c] 速度上限改為 {(self._rate_limit() or 0) // 1024} KB/s，重新連線")
+
+    @staticmethod
+    def _readout_lines(stream):
+        """aria2c 在終端機以 \\r 更新同一行，其他情況以換行分隔，兩種都要處理"""
+        buffer = ""
+        while True:
+            chunk = stream.read(256)
+            if not chunk:
+                break
+            buffer += chunk
+            parts = re.split(r"[\r\n]", buffer)
+            buffer = parts.pop()
+            for part in parts:
+                if part.strip():
+                    yield part.strip()
+        if buffer.strip():
+            yield buffer.strip()
+
+    def _report_readout(self, line, info_dict):
+        match = _READOUT_RE.search(line)
+        if not match:
+            return False
+        downloaded = parse_filesize(match.group("done"))
+        total = parse_filesize(match.group("total"))
+        if not total:
+            # aria2c 還沒取得檔案大小
+            return True
+        self._hook_progress({
+            "status": "downloading",
+            "filename": self._progress_filename,
+            "downloaded_bytes": downloaded,
+            "total_bytes": total,
+            "speed": parse_filesize(match.group("speed")) if match.group("speed") else None,
+            "eta": _parse_eta(match.group("eta")),
+        }, info_dict)
+        return True
+
+
+# 覆寫或呼叫的 yt-dlp 內部方法，缺少任何一個都不登記
+_REQUIRED_METHODS = ("_make_cmd", "_call_process", "_hook_progress", "get_basename", "available")
+
+
+def _register():
+    """讓 yt-dlp 可以用 external_downloader 的名稱找到這個下載器，無法登記時返回 False"""
+    try:
+        missing = [name for name in _REQUIRED_METHODS if not callable(getattr(Aria2cFD, name, None))]
+        if missing:
+            raise AttributeError(f"Aria2cFD 缺少 {', '.join(missing)}")
+        registry = external._BY_NAME
+        name = Aria2cProgressFD.get_basename()
+        registry.setdefault(name, Aria2cProgressFD)
+        if registry.get(name) is not Aria2cProgressFD:
+            raise LookupError(f"下載器名稱 {name} 已被使用")
+        return True
+    except Exception as e:
+        log(f"無法登記 aria2c 進度下載器（yt-dlp 版本不相容）: {str(e)}")
+        return False
+
+
+_registered = _register()
+
+
+@lru_cache(maxsize=None)
+def aria2c_available():
+    """是否可以使用 aria2c：下載器已登記且找得到執行檔（只檢查一次）"""
+    return _registered and bool(Aria2cProgressFD.available())
+
+
+def resolve_engine(engine):
+    """返回實際可用的引擎，找不到外部下載器時改用 native"""
+    if engine == ENGINE_ARIA2C:
+        if aria2c_available():
+            return ENGINE_ARIA2C
+        log("無法使用 aria2c（找不到執行檔或 yt-dlp 版本不相容），改用 yt-dlp 內建下載器")
+    return ENGINE_NATIVE
+
+
+def engine_options(engine, connections=16, rate_limit=None, paused=None):
+    """下載引擎對應的 yt-dlp 選項；native 不需要額外選項
+
+    rate_limit: 返回任務目前速度上限 (bytes/s) 的函式；paused: 返回任務是否暫停的函式
+    """
+    if resolve_engine(engine) != ENGINE_ARIA2C:
+        return {}
+    connections = max(1, min(16, int(connections)))
+    downloader = Aria2cProgressFD.get_basename()
+    return {
+        'aria2c_rate_limit': rate_limit,
+        'aria2c_paused': paused,
+        # 只有一般 HTTP/FTP 檔案交給 aria2c，DASH/HLS 片段仍由 yt-dlp 下載
+        'external_downloader': {'http': downloader, 'ftp': downloader},
+        'external_downloader_args': {'aria2c': [
+            f'--max-connection-per-server={connections}',
+            f'--split={connections}',
+            '--min-split-size=1M',
+            '--enable-color=false',
+            '--console-log-level=warn',
+        ]},
+    }
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多平台影片下載器 - 已下載影片索引
+
+以 (extractor, 影片ID, 格式) 記錄已完成的下載並保存在 SQLite 中，
+加入佇列前先查詢，同一部影片以不同網址貼上、或程式重新啟動後再次貼上都不會重複下載。
+檔案已被使用者刪除時視為未下載。
+"""
+
+import os
+import time
+import sqlite3
+import threading
+
+try:
+    from src.utils import log
+    from src.video_key import video_key
+except ImportError:
+    from utils import log
+    from video_key import video_key
+
+
+def format_signature(format_option, resolution):
+    """下載格式的識別字串（僅音訊格式與解析度無關）"""
+    format_option = format_option or ""
+    if "僅音訊" in format_option:
+        return format_option
+    return f"{format_option}|{resolution or ''}"
+
+
+class DownloadIndex:
+    """已下載影片的索引（可在多個線程中同時使用）"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        try:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS downloads ("
+                "extractor TEXT NOT NULL, video_id TEXT NOT NULL, format TEXT NOT NULL, "
+                "file_path TEXT NOT NULL, url TEXT, completed REAL NOT NULL, "
+                "PRIMARY KEY (extractor, video_id, format))")
+            self._conn.commit()
+        except sqlite3.Error as e:
+            log(f"無法開啟已下載影片索引: {str(e)}")
+            self._conn = None
+
+    def lookup(self, url, signature):
+        """返回已下載的檔案路徑；沒有下載過或檔案已不存在時返回 None"""
+        key = video_key(url)
+        if self._conn is None or key is None:
+            return None
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT file_path FROM downloads WHERE extractor = ? AND video_id = ? AND format = ?",
+                    (key[0], key[1], signature)).fetchone()
+                if row is None:
+                    return None
+                if not os.path.exists(row[0]):
+                    self._conn.execute(
+                        "DELETE FROM downloads WHERE extractor = ? AND video_id = ? AND format = ?",
+                        (key[0], key[1], signature))
+                    self._conn.commit()
+                    return None
+            return row[0]
+        except sqlite3.Error as e:
+            log(f"查詢已下載影片索引失敗: {str(e)}")
+            return None
+
+    def record(self, url, signature, file_path):
+        """記錄完成的下載"""
+        key = video_key(url)
+        if self._conn is None or key is None or not file_path:
+            return
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO downloads (extractor, video_id, format, file_path, url, completed) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key[0], key[1], signature, os.path.abspath(file_path), url, time.time()))
+                self._conn.commit()
+        except sqlite3.Error as e:
+            log(f"寫入已下載影片索引失敗: {str(e)}")
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
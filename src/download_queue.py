@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多平台影片下載器 - 下載佇列排程模組
+"""
+
+import time
+import heapq
+from collections import deque, Counter
+
+from PySide6.QtCore import QObject, Signal, QTimer
+
+try:
+    from src.utils import log
+except ImportError:
+    from utils import log
+
+# 任務優先順序（數字越小越優先）
+PRIORITY_URGENT = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2
+
+PRIORITY_LABELS = {
+    PRIORITY_URGENT: "緊急",
+    PRIORITY_NORMAL: "一般",
+    PRIORITY_BACKGROUND: "背景",
+}
+
+# 公平分享與頻寬分配的權重：一般任務取得背景任務兩倍的名額與頻寬
+PRIORITY_WEIGHTS = {
+    PRIORITY_URGENT: 4,
+    PRIORITY_NORMAL: 2,
+    PRIORITY_BACKGROUND: 1,
+}
+
+DEFAULT_BATCH = 0  # 沒有指定批次的任務（例如恢復上次未完成的任務）
+
+
+class DownloadJob:
+    """佇列中的單一下載任務"""
+
+    def __init__(self, filename, url, priority=PRIORITY_NORMAL, batch=DEFAULT_BATCH):
+        self.filename = filename
+        self.url = url
+        self.priority = priority
+        self.batch = batch  # 同一次加入的任務屬於同一批次，批次之間公平分享名額
+        self.enqueued_at = time.time()
+        self.group = None  # 排程分組（例如平台名稱），分派時由 group_of 計算
+
+
+class DownloadQueue(QObject):
+    """下載佇列排程器
+
+    保存所有等待中的URL，依照最大同時下載數分派給下載線程，
+    每當有下載結束便自動補上空出的名額，不需要使用者重新貼上連結。
+    除了全域的最大同時下載數，每個分組（平台）也可以有自己的同時下載數上限；
+    設定 admission 後，暫時不能開始的任務（例如平台被限速）也會留在佇列中。
+    不能開始的任務不會擋住後面其他分組的任務，名額空出或等待時間結束後自動重新分派。
+
+    緊急任務一定在下一個空出的名額開始；其他任務在批次之間依權重公平分享名額
+    （start-time fair queuing），大量的背景批次不會讓之後加入的一般批次等到最後。
+    同一批次內依加入順序下載。
+    """
+
+    queue_changed = Signal(int, int)  # 等待中數量, 進行中數量
+    job_failed = Signal(str, str, str)  # 無法啟動的任務: 檔名, 網址, 錯誤訊息
+
+    def __init__(self, start_callback, max_concurrent=2, parent=None):
+        super().__init__(parent)
+        self.start_callback = start_callback  # 實際啟動下載的函數 (filename, url)
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.pending = deque()  # 等待中的任務
+        self.pending_names = set()  # 等待中的任務檔名，用於快速查重
+        self.active = set()  # 進行中的任務檔名
+        self.group_of = None  # (網址) -> 分組名稱；None 表示不分組
+        self.group_limits = {}  # 分組 -> 同時下載數上限（沒有設定或 0 表示只受全域上限限制）
+        self.active_groups = Counter()  # 分組 -> 進行中的任務數
+        self._active_group_of = {}  # 進行中的任務檔名 -> 分組
+        self.admission = None  # (任務) -> 需要等待的秒數，0 表示可以開始；None 表示不限制
+        self._dispatch_scheduled = False
+        self._wake_timer = QTimer(self)  # 等待中的任務可以開始時重新分派
+        self._wake_timer.setSingleShot(True)
+        self._wake_timer.timeout.connect(self.schedule_dispatch)
+        self._job_info = {}  # 任務檔名 -> (優先順序, 批次)，重試時沿用
+        self._virtual_time = 0.0  # 公平分享的虛擬時間
+        self._batch_finish = {}  # 批次 -> 下一個任務的虛擬開始時間
+
+    def enqueue(self, filename, url, front=False, priority=None, batch=None):
+        """將任務加入佇列（沒有指定優先順序與批次時沿用此任務上次的設定）"""
+        if filename in self.active or filename in self.pending_names:
+            log(f"任務已在佇列中，略過: {filename}")
+            return False
+
+        last_priority, last_batch = self._job_info.get(filename, (PRIORITY_NORMAL, DEFAULT_BATCH))
+        priority = last_priority if priority is None else priority
+        batch = last_batch if batch is None else batch
+        self._job_info[filename] = (priority, batch)
+
+        job = DownloadJob(filename, url, priority, batch)
+        if front:
+            self.pending.appendleft(job)
+        else:
+            self.pending.append(job)
+        self.pending_names.add(filename)
+
+        self.schedule_dispatch()
+        return True
+
+    def remove(self, filename):
+        """從等待佇列中移除尚未開始的任務"""
+        if filename not in self.pending_names:
+            return False
+
+        for job in list(self.pending):
+            if job.filename == filename:
+                self.pending.remove(job)
+                break
+        self.pending_names.discard(filename)
+        self.queue_changed.emit(len(self.pending), len(self.active))
+        return True
+
+    def clear(self):
+        """清空所有等待中的任務（不影響進行中的下載）"""
+        self.pending.clear()
+        self.pending_names.clear()
+        self.queue_changed.emit(0, len(self.active))
+
+    def job_finished(self, filename):
+        """下載結束時釋放名額並繼續分派"""
+        if filename in self.active:
+            self.active.discard(filename)
+            self._release_group(filename)
+            self.schedule_dispatch()
+
+    def set_priority(self, filename, priority):
+        """變更任務的優先順序（等待中的任務立即依新的順序分派，進行中的任務在重試時沿用）"""
+        batch = self._job_info.get(filename, (PRIORITY_NORMAL, DEFAULT_BATCH))[1]
+        self._job_info[filename] = (priority, batch)
+        if filename in self.pending_names:
+            for job in self.pending:
+                if job.filename == filename:
+                    job.priority = priority
+                    break
+            self.schedule_dispatch()
+
+    def priority_of(self, filename):
+        """任務目前的優先順序"""
+        return self._job_info.get(filename, (PRIORITY_NORMAL, DEFAULT_BATCH))[0]
+
+    def set_group_limits(self, limits):
+        """更新各分組的同時下載數上限"""
+        self.group_limits = {group: int(limit) for group, limit in (limits or {}).items() if int(limit) > 0}
+        self.schedule_dispatch()
+
+    def _release_group(self, filename):
+        group = self._active_group_of.pop(filename, None)
+        if group is not None:
+            self.active_groups[group] -= 1
+            if self.active_groups[group] <= 0:
+                del self.active_groups[group]
+
+    def set_max_concurrent(self, value):
+        """更新最大同時下載數"""
+        self.max_concurrent = max(1, int(value))
+        self.schedule_dispatch()
+
+    def pending_count(self):
+        """等待中的任務數量"""
+        return len(self.pending)
+
+    def active_count(self):
+        """進行中的任務數量"""
+        return len(self.active)
+
+    def peek(self, count):
+        """取得大約最先分派的 count 個等待中的任務（依優先順序與加入順序，不移出佇列）"""
+        return [job for _, _, job in heapq.nsmallest(
+            count, ((job.priority, index, job) for index, job in enumerate(self.pending)))]
+
+    def schedule_dispatch(self):
+        """排程一次分派，同一個事件循環內的多次請求只會分派一次"""
+        if not self._dispatch_scheduled:
+            self._dispatch_scheduled = True
+            QTimer.singleShot(0, self._dispatch)
+
+    def _dispatch(self):
+        """在名額允許的範圍內啟動等待中的任務"""
+        self._dispatch_scheduled = False
+
+        wait = 0
+        while self.pending and len(self.active) < self.max_concurrent:
+            job, wait = self._next_job()
+            if job is None:
+                break
+            self.pending_names.discard(job.filename)
+            self.active.add(job.filename)
+            if job.group is not None:
+                self._active_group_of[job.filename] = job.group
+                self.active_groups[job.group] += 1
+            self._charge_batch(job)
+            try:
+                self.start_callback(job.filename, job.url)
+            except Exception as e:
+                # 不放回佇列（同樣的錯誤會不斷重複），回報為失敗讓介面顯示並記錄
+                log(f"佇列啟動下載失敗: {job.filename}, {str(e)}")
+                self.active.discard(job.filename)
+                self._release_group(job.filename)
+                self.job_failed.emit(job.filename, job.url, str(e))
+
+        if wait > 0:
+            self._wake_timer.start(int(wait * 1000) + 50)
+        self.queue_changed.emit(len(self.pending), len(self.active))
+
+    def _next_job(self):
+        """移出下一個應該開始的任務，返回 (任務, 0)；都不能開始時返回 (None, 最短等待秒數)
+
+        每個批次取第一個可以開始的任務作為候選，緊急任務優先，其餘選虛擬開始時間最早的批次。
+        分組已達上限的任務等名額空出時再分派（不需要計時），admission 要求等待的任務依等待時間重新分派
+        """
+        wait = None
+        best = None  # (排序鍵, 任務)
+        blocked = set()  # 本次已確認不能開始的分組，同組的任務不必重複檢查
+        candidates = set()  # 已有候選任務的 (批次, 是否緊急)
+        for index, job in enumerate(self.pending):
+            urgent = job.priority == PRIORITY_URGENT
+            if (job.batch, urgent) in candidates:
+                continue
+            if job.group is None and self.group_of is not None:
+                job.group = self.group_of(job.url)
+            if job.group is not None:
+                if job.group in blocked:
+                    continue
+                limit = self.group_limits.get(job.group)
+                if limit and self.active_groups[job.group] >= limit:
+                    blocked.add(job.group)
+                    continue
+            delay = self.admission(job) if self.admission is not None else 0
+            if delay > 0:
+                if job.group is not None:
+                    blocked.add(job.group)
+                wait = delay if wait is None else min(wait, delay)
+                continue
+            candidates.add((job.batch, urgent))
+            key = (not urgent, self._start_tag(job), index)
+            if best is None or key < best[0]:
+                best = (key, job)
+
+        if best is None:
+            return None, wait or 0
+        self.pending.remove(best[1])
+        return best[1], 0
+
+    def _start_tag(self, job):
+        """批次下一個任務的虛擬開始時間；新加入的批次從目前的虛擬時間開始"""
+        return max(self._virtual_time, self._batch_finish.get(job.batch, 0.0))
+
+    def _charge_batch(self, job):
+        """任務開始後推進批次的虛擬時間（權重越高前進得越慢，分到越多名額）"""
+        start = self._start_tag(job)
+        self._virtual_time = start
+        self._batch_finish[job.batch] = start + 1.0 / PRIORITY_WEIGHTS.get(job.priority, 1)
+        if len(self._batch_finish) > 256:
+            # 已經落後於虛擬時間的批次與新批次相同，不需要保留
+            self._batch_finish = {batch: finish for batch, finish in self._batch_finish.items()
+                                  if finish > self._virtual_time}
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多平台影片下載器 - 影片資訊快取
+
+extract_info 的結果以影片的標準 ID（extractor:id）為鍵保存在 SQLite 中，
+重試、備用下載方法、重新啟動後的續傳都直接使用快取，不再向平台重新解析。
+每個平台的有效時間依照其簽名下載連結的有效期限設定，過期自動丟棄；
+總大小超過上限時，最久沒有使用的項目優先刪除。
+"""
+
+import json
+import time
+import zlib
+import sqlite3
+import threading
+
+from yt_dlp import YoutubeDL
+
+try:
+    from src.utils import log, LOG_DEBUG
+    from src.platform_registry import lookup_platform
+    from src.video_key import canonical_key
+except ImportError:
+    from utils import log, LOG_DEBUG
+    from platform_registry import lookup_platform
+    from video_key import canonical_key
+
+# 各平台快取有效時間（秒），須短於平台簽名下載連結的有效期限
+PLATFORM_TTL = {
+    "YouTube": 5 * 3600,  # googlevideo 連結約 6 小時後失效
+    "Bilibili": 90 * 60,
+    "TikTok": 60 * 60,
+    "抖音": 60 * 60,
+    "X": 60 * 60,
+    "Facebook": 60 * 60,
+    "Instagram": 60 * 60,
+    "Threads": 60 * 60,
+}
+DEFAULT_TTL = 30 * 60  # 其他平台的快取有效時間（秒）
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # 快取總大小上限（壓縮後）
+
+
+class InfoCache:
+    """影片資訊的 SQLite 快取（可在多個線程中同時使用）"""
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = None
+        try:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS info ("
+                "key TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, expires REAL NOT NULL, accessed REAL NOT NULL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS info_accessed ON info (accessed)")
+            self._conn.execute("DELETE FROM info WHERE expires < ?", (time.time(),))
+            self._conn.commit()
+        except sqlite3.Error as e:
+            log(f"無法開啟影片資訊快取: {str(e)}")
+            self._conn = None
+
+    @staticmethod
+    def ttl_for(url):
+        return PLATFORM_TTL.get(lookup_platform(url)["name"], DEFAULT_TTL)
+
+    def get(self, url):
+        """取得網址的快取資訊，沒有或已過期時返回 None"""
+        if self._conn is None:
+            return None
+        key = canonical_key(url)
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT data, expires FROM info WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                if row[1] < now:
+                    self._conn.execute("DELETE FROM info WHERE key = ?", (key,))
+                    self._conn.commit()
+                    return None
+                self._conn.execute("UPDATE info SET accessed = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+            info = json.loads(zlib.decompress(row[0]).decode("utf-8"))
+            log(f"使用快取的影片資訊: {key}", LOG_DEBUG)
+            return info
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            log(f"讀取影片資訊快取失敗: {str(e)}")
+            return None
+
+    def put(self, url, info):
+        """保存網址的影片資訊（只保存單一影片，播放清單不快取）"""
+        if self._conn is None or not info or info.get("_type", "video") != "video":
+            return
+        key = canonical_key(url)
+        now = time.time()
+        try:
+            data = zlib.compress(json.dumps(YoutubeDL.sanitize_info(dict(info)),
+                                            ensure_ascii=False).encode("utf-8"))
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO info (key, data, size, created, expires, accessed) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, data, len(data), now, now + self.ttl_for(url), now))
+                self._evict()
+                self._conn.commit()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            log(f"寫入影片資訊快取失敗: {str(e)}")
+
+    def invalidate(self, url):
+        """刪除網址的快取（例如下載連結已失效）"""
+        if self._conn is None:
+            return
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM info WHERE key = ?", (canonical_key(url),))
+                self._conn.commit()
+        except sqlite3.Error as e:
+            log(f"刪除影片資訊快取失敗: {str(e)}")
+
+    def _evict(self):
+        """刪除過期項目，總大小超過上限時刪除最久沒有使用的項目"""
+        self._conn.execute("DELETE FROM info WHERE expires < ?", (time.time(),))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM info").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        removed = []
+        for key, size in self._conn.execute("SELECT key, size FROM info ORDER BY accessed"):
+            removed.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM info WHERE key = ?", removed)
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
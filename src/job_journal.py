@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多平台影片下載器 - 下載任務日誌模組
+
+以只追加 (append-only) 的 JSONL 檔案記錄每個下載任務的狀態，
+程式意外關閉後可依日誌恢復未完成的任務。
+寫入磁碟由背景線程負責，一次寫入累積的所有記錄後才 fsync，
+貼上大量網址或展開整個頻道時不會讓介面等待磁碟。
+"""
+
+import os
+import json
+import time
+import queue
+import threading
+
+try:
+    from src.utils import log
+except ImportError:
+    from utils import log
+
+# 任務狀態
+STATE_QUEUED = "queued"
+STATE_RUNNING = "running"
+STATE_DONE = "done"
+STATE_FAILED = "failed"
+STATE_CANCELLED = "cancelled"
+STATE_SKIPPED = "skipped"  # 已在下載存檔中，沒有下載
+
+# 需要在下次啟動時恢復的狀態
+UNFINISHED_STATES = (STATE_QUEUED, STATE_RUNNING)
+
+
+class JobJournal:
+    """下載任務日誌
+
+    每次狀態變更寫入一行 JSON，由寫入線程批次 flush/fsync，程式崩潰時最多遺失最後一批尚未寫入的記錄。
+    啟動時重播日誌即可得到每個任務的最後狀態。
+    """
+
+    COMPACT_THRESHOLD = 5000  # 日誌行數超過此值時壓縮
+    PROGRESS_INTERVAL = 5.0  # 同一個任務記錄已下載位元組數的最短間隔（秒），只保留最新的進度
+
+    def __init__(self, journal_path):
+        self.journal_path = journal_path
+        self.jobs = {}  # 檔名 -> 最後狀態記錄
+        self._line_count = 0
+        self._compact_at = self.COMPACT_THRESHOLD  # 日誌行數超過此值時壓縮
+        self._progress_at = {}  # 檔名 -> 上次記錄已下載位元組數的時間
+        self._file = None  # 只在寫入線程中使用
+        self._closed = False
+        self._queue = queue.Queue()  # 等待寫入的日誌行；("compact", 任務列表) 表示重寫日誌檔
+        self._writer = None
+        self.replay()
+
+    def replay(self):
+        """讀取日誌檔並重建每個任務的最後狀態"""
+        self.jobs = {}
+        self._line_count = 0
+        if not os.path.exists(self.journal_path):
+            return self.jobs
+
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 崩潰時可能留下寫到一半的最後一行，直接略過
+                        continue
+                    self._line_count += 1
+                    self._apply(entry)
+        except Exception as e:
+            log(f"讀取下載任務日誌失敗: {str(e)}")
+
+        return self.jobs
+
+    def _apply(self, entry):
+        """將一筆日誌記錄合併到任務狀態"""
+        filename = entry.get("job")
+        if not filename:
+            return
+        job = self.jobs.setdefault(filename, {"job": filename})
+        job.update(entry)
+
+    def _write(self, entry):
+        """更新任務狀態並將日誌行交給寫入線程"""
+        if self._closed:
+            return
+        self._apply(entry)
+        self._submit(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._line_count += 1
+
+        if self._line_count > self._compact_at:
+            self.compact()
+
+    def _submit(self, item):
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._run_writer, name="job-journal", daemon=True)
+            self._writer.start()
+        self._queue.put(item)
+
+    def _run_writer(self):
+        """寫入線程：取出目前累積的所有日誌行一次寫入，最後只 fsync 一次"""
+        while True:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = False
+            lines = []
+            for item in items:
+                if item is None:
+                    stop = True
+                elif isinstance(item, tuple):
+                    # 壓縮前先寫入之前的記錄，之後的記錄寫到新的檔案
+                    self._append(lines)
+                    lines = []
+                    self._rewrite(item[1])
+                else:
+                    lines.append(item)
+            self._append(lines)
+            for _ in items:
+                self._queue.task_done()
+            if stop:
+                if self._file is not None:
+                    try:
+                        self._file.close()
+                    except Exception:
+                        pass
+                    self._file = None
+                return
+
+    def _append(self, lines):
+        if not lines:
+            return
+        try:
+            if self._file is None:
+                journal_dir = os.path.dirname(self.journal_path)
+                if journal_dir and not os.path.exists(journal_dir):
+                    os.makedirs(journal_dir)
+                self._file = open(self.journal_path, "a", encoding="utf-8")
+                if not self._ends_with_newline():
+                    # 崩潰時寫到一半的最後一行沒有換行，先補上，避免和下一筆記錄接成同一行
+                    lines = ["\n"] + lines
+            self._file.write("".join(lines))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except Exception as e:
+            log(f"寫入下載任務日誌失敗: {str(e)}")
+
+    def _ends_with_newline(self):
+        """日誌檔是否為空或以換行結尾"""
+        try:
+            with open(self.journal_path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    return True
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) == b"\n"
+        except OSError:
+            return True
+
+    def _rewrite(self, jobs):
+        """以任務的最後狀態重寫日誌檔"""
+        try:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            temp_path = self.journal_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                for job in jobs:
+                    f.write(json.dumps(job, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.journal_path)
+        except Exception as e:
+            log(f"壓縮下載任務日誌失敗: {str(e)}")
+
+    def record(self, filename, state, url=None, **fields):
+        """記錄任務狀態變更"""
+        entry = {"job": filename, "state": state, "ts": time.time()}
+        if url:
+            entry["url"] = url
+        entry.update({key: value for key, value in fields.items() if value is not None})
+        self._write(entry)
+
+    def record_progress(self, filename, bytes_done, now=None):
+        """記錄下載中任務的已下載位元組數（同一個任務每 PROGRESS_INTERVAL 秒最多記錄一次）"""
+        job = self.jobs.get(filename)
+        if job is None or job.get("state") != STATE_RUNNING or bytes_done == job.get("bytes_done"):
+            return False
+        now = time.time() if now is None else now
+        if now - self._progress_at.get(filename, float("-inf")) < self.PROGRESS_INTERVAL:
+            return False
+        self._progress_at[filename] = now
+        # 沒有 state 欄位，重播時只更新已下載位元組數，狀態不變
+        self._write({"job": filename, "bytes_done": bytes_done, "ts": now})
+        return True
+
+    def flush(self):
+        """等待目前所有記錄寫入磁碟"""
+        if self._writer is not None:
+            self._queue.join()
+
+    def unfinished_jobs(self):
+        """返回上次未完成的任務（依加入順序）"""
+        jobs = [job for job in self.jobs.values()
+                if job.get("state") in UNFINISHED_STATES and job.get("url")]
+        return sorted(jobs, key=lambda job: job.get("queued_at", job.get("ts", 0)))
+
+    def compact(self):
+        """只保留未完成任務的最後狀態，由寫入線程重寫日誌檔"""
+        if self._closed:
+            return
+        self.jobs = {filename: job for filename, job in self.jobs.items()
+                     if job.get("state") in UNFINISHED_STATES}
+        self._progress_at = {filename: at for filename, at in self._progress_at.items() if filename in self.jobs}
+        self._submit(("compact", [dict(job) for job in self.jobs.values()]))
+        self._line_count = len(self.jobs)
+        # 未完成的任務很多時，壓縮後的行數仍可能超過門檻，須等日誌行數達到壓縮後的兩倍才再次壓縮
+        self._compact_at = max(self.COMPACT_THRESHOLD, 2 * self._line_count)
+
+    def close(self):
+        """停止記錄並等待已記錄的內容寫入磁碟（程式關閉時呼叫，之後的取消不會被記為失敗）"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join(timeout=5)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多平台影片下載器 - 影片資訊預先解析
+
+下載佇列中排在前面的網址由獨立的線程池預先執行 extract_info，
+下載名額空出時，下載線程直接使用已解析好的影片資訊，只負責傳輸資料。
+短片（TikTok、X）大部分時間花在解析資訊上，預先解析可以讓下載名額一直保持在傳輸狀態。
+"""
+
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import yt_dlp
+
+try:
+    from src.utils import log
+except ImportError:
+    from utils import log
+
+
+class MetadataPrefetcher:
+    """影片資訊預先解析池（只在 GUI 線程中呼叫）"""
+
+    DEFAULT_WORKERS = 4  # 預設同時解析的數量
+    MAX_AGE = 30 * 60  # 預先解析的資訊最多保留多久（秒），影片連結過期後需要重新解析
+    MAX_ENTRIES = 200  # 最多保留的預先解析結果數量
+
+    def __init__(self, max_workers=DEFAULT_WORKERS):
+        self.max_workers = max(1, int(max_workers))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="prefetch")
+        self._futures = OrderedDict()  # 網址 -> (Future, 建立時間)
+        self.cookies_file = None
+        self.info_cache = None  # 共用的影片資訊快取（可為 None）
+
+    def set_max_workers(self, max_workers):
+        """調整同時解析的數量（進行中的解析會在舊的線程池中完成）"""
+        max_workers = max(1, int(max_workers))
+        if max_workers == self.max_workers:
+            return
+        self.max_workers = max_workers
+        old_executor = self._executor
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        old_executor.shutdown(wait=False)
+        log(f"影片資訊預先解析數量: {max_workers}")
+
+    def lookahead(self):
+        """應該預先解析的佇列長度"""
+        return self.max_workers * 2
+
+    def prefetch(self, urls):
+        """為尚未解析的網址排程解析"""
+        self._drop_expired()
+        for url in urls:
+            if url in self._futures:
+                continue
+            future = self._executor.submit(self._extract, url, self.cookies_file, self.info_cache)
+            self._futures[url] = (future, time.monotonic())
+        while len(self._futures) > self.MAX_ENTRIES:
+            future, _ = self._futures.popitem(last=False)[1]
+            future.cancel()
+
+    def take(self, url):
+        """取得網址的解析結果（Future），沒有預先解析時返回 None；每個結果只能取得一次"""
+        entry = self._futures.pop(url, None)
+        if entry is None:
+            return None
+        future, created = entry
+        if time.monotonic() - created > self.MAX_AGE or future.cancel():
+            # 已過期，或尚未開始解析（取消後由下載線程自行解析）
+            return None
+        return future
+
+    def shutdown(self):
+        """停止所有尚未開始的解析"""
+        self._futures.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _drop_expired(self):
+        now = time.monotonic()
+        for url in [url for url, (_, created) in self._futures.items() if now - created > self.MAX_AGE]:
+            del self._futures[url]
+
+    @staticmethod
+    def _extract(url, cookies_file, info_cache):
+        """與下載線程相同的方式解析影片資訊（process=False，不選擇格式）"""
+        if info_cache is not None:
+            info = info_cache.get(url)
+            if info is not None:
+                return info
+
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'noplaylist': True,
+            'nocheckcertificate': True,
+            'socket_timeout': 30,
+            'http_headers': {
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+            },
+        }
+        if cookies_file:
+            ydl_opts['cookiefile'] = cookies_file
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=False, process=False)
+        if info is None:
+            raise Exception("無法獲取影片資訊")
+        if info_cache is not None:
+            info_cache.put(url, info)
+        log(f"已預先解析影片資訊: {url}")
+        return info
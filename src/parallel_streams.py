@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多平台影片下載器 - 影片與音訊並行下載
+
+選擇 bestvideo+bestaudio 這類需要合併的格式時，yt-dlp 會依序下載影片與音訊，
+兩者都完成後才開始合併。這裡先以 yt-dlp 相同的暫存檔名同時下載所有串流，
+接著照常交給 yt-dlp 處理：已完成的串流會被視為「已下載」直接跳過，立即進入合併，
+後處理、post_hooks 等流程都與原本相同。並行下載失敗時 yt-dlp 會從 .part 檔接續依序下載。
+
+YoutubeDL 不是執行緒安全的（下載器、輸出、cookies 等狀態），每個串流使用自己的 YoutubeDL，
+共用同一份 params（頻寬管理器調整的速度上限、進度回調等設定對所有串流生效）。
+"""
+
+import os
+import copy
+from concurrent.futures import ThreadPoolExecutor
+
+from yt_dlp import YoutubeDL
+from yt_dlp.downloader import get_suitable_downloader
+from yt_dlp.downloader.external import FFmpegFD
+from yt_dlp.postprocessor import FFmpegMergerPP
+from yt_dlp.utils import prepend_extension
+
+try:
+    from src.utils import log
+except ImportError:
+    from utils import log
+
+
+def _correct_ext(filename, old_ext, new_ext):
+    """與 yt-dlp 相同的副檔名修正方式，確保暫存檔名一致"""
+    filename_real_ext = os.path.splitext(filename)[1][1:]
+    if filename_real_ext in (old_ext, new_ext):
+        filename = os.path.splitext(filename)[0]
+    return f"{filename}.{new_ext}"
+
+
+def plan_parallel_streams(ydl, info):
+    """
+    計算可以並行下載的串流，返回 [(暫存檔路徑, 串流資訊), ...]；
+    不需要合併、無法合併或已經下載過時返回 None
+    """
+    if info.get('_type', 'video') != 'video':
+        return None
+
+    info = ydl.process_ie_result(copy.deepcopy(info), download=False)
+    requested_formats = info.get('requested_formats') or []
+    if len(requested_formats) < 2:
+        return None
+    if not FFmpegMergerPP(ydl).available:
+        return None
+    # 由 ffmpeg 直接下載時 yt-dlp 本身就會一次取得所有串流
+    if get_suitable_downloader(info, ydl.params) is FFmpegFD:
+        return None
+
+    full_filename = ydl.prepare_filename(info)
+    temp_filename = ydl.prepare_filename(info, 'temp')
+    if '-' in (full_filename, temp_filename):
+        return None
+
+    ext = info['ext']
+    full_filename = _correct_ext(full_filename, ext, ext)
+    temp_filename = _correct_ext(temp_filename, ext, ext)
+    if os.path.exists(full_filename) or os.path.exists(temp_filename):
+        return None
+
+    plan = []
+    for fmt in requested_formats:
+        stream_info = dict(info)
+        del stream_info['requested_formats']
+        stream_info.update(fmt)
+        filename = prepend_extension(
+            _correct_ext(temp_filename, ext, stream_info['ext']),
+            f"f{fmt['format_id']}", stream_info['ext'])
+        plan.append((filename, stream_info))
+    return plan
+
+
+def _download_stream(ydl, filename, stream_info):
+    directory = os.path.dirname(os.path.abspath(filename))
+    if not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    success, _ = ydl.dl(filename, stream_info)
+    if not success:
+        raise Exception(f"串流下載失敗: {os.path.basename(filename)}")
+
+
+def fetch_streams(ydl, plan):
+    """同時下載所有串流，返回發生的錯誤（全部成功時為空清單）"""
+    errors = []
+    # 在目前的線程建立所有 YoutubeDL（建立時會修改共用的 params），進度回調由 params 中的 progress_hooks 登記
+    stream_ydls = [YoutubeDL(ydl.params) for _ in plan]
+    try:
+        with ThreadPoolExecutor(max_workers=len(plan), thread_name_prefix="stream") as executor:
+            futures = [executor.submit(_download_stream, stream_ydl, filename, stream_info)
+                       for stream_ydl, (filename, stream_info) in zip(stream_ydls, plan)]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    errors.append(e)
+    finally:
+        # 所有串流結束後才依序關閉（關閉時會寫入 cookies 檔，不可同時寫入）
+        for stream_ydl in stream_ydls:
+            stream_ydl.close()
+    if not errors:
+        log(f"已同時下載 {len(plan)} 個串流，開始合併")
+    return errors
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多平台影片下載器 - 平台識別
+
+所有平台的網域與正則表達式在模組載入時建立一次。
+識別時先解析網址的主機名稱查表，查不到才使用預先編譯的正則表達式，
+結果依網址快取，大量貼上的網址也能在數毫秒內分類完成。
+"""
+
+import re
+from functools import lru_cache
+from types import MappingProxyType
+from urllib.parse import urlsplit
+
+# 一般平台的預設下載格式
+MP4_FORMAT = "best[ext=mp4]/bestvideo[ext=mp4]+bestaudio/best"
+# YouTube 的預設下載格式
+YOUTUBE_FORMAT = "bestvideo[height<=1080][ext=mp4]+bestaudio[ext=m4a]/best[height<=1080][ext=mp4]/best"
+
+UNKNOWN_PLATFORM = "未知"
+
+# 平台定義：(名稱, 網域, 備用正則表達式, 是否需要登入, 預設格式)
+# 網域會連同所有子網域一起比對，例如 tiktok.com 也包含 vm.tiktok.com
+PLATFORM_DEFINITIONS = [
+    ("YouTube", ("youtube.com", "youtu.be", "youtube-nocookie.com"),
+     r"(?:https?://)?(?:www\.|m\.)?(?:youtube\.com|youtu\.be)/.+", False, YOUTUBE_FORMAT),
+    ("TikTok", ("tiktok.com",),
+     r"(?:https?://)?(?:www\.|m\.)?(?:tiktok\.com|vm\.tiktok\.com|vt\.tiktok\.com)/.+", False, MP4_FORMAT),
+    ("抖音", ("douyin.com", "iesdouyin.com"),
+     r"(?:https?://)?(?:www\.|v\.)?douyin\.com/.+", False, MP4_FORMAT),
+    ("Facebook", ("facebook.com", "fb.com", "fb.watch"),
+     r"(?:https?://)?(?:www\.|m\.)?(?:facebook\.com|fb\.com|fb\.watch)/.+", True, MP4_FORMAT),
+    ("Instagram", ("instagram.com",),
+     r"(?:https?://)?(?:www\.|m\.)?instagram\.com/.+", True, MP4_FORMAT),
+    ("Bilibili", ("bilibili.com", "b23.tv"),
+     r"(?:https?://)?(?:www\.|m\.)?(?:bilibili\.com|b23\.tv)/.+", False, MP4_FORMAT),
+    ("X", ("twitter.com", "x.com"),
+     r"(?:https?://)?(?:www\.|mobile\.)?(?:twitter\.com|x\.com)/.+", False, MP4_FORMAT),
+    ("Threads", ("threads.net", "threads.com"),
+     r"(?:https?://)?(?:www\.)?threads\.(?:net|com)/.+", False, MP4_FORMAT),
+]
+
+URL_CACHE_SIZE = 16384  # 快取的網址數量上限
+
+
+def _make_descriptor(name, needs_login=False, download_format=None):
+    """建立唯讀的平台資訊（與舊版 dict 相同的鍵，可直接以 info["name"] 存取）"""
+    download_options = MappingProxyType({"format": download_format} if download_format else {})
+    return MappingProxyType({
+        "name": name,
+        "needs_login": needs_login,
+        "download_options": download_options,
+    })
+
+
+UNKNOWN_DESCRIPTOR = _make_descriptor(UNKNOWN_PLATFORM)
+
+# 平台名稱 -> 平台資訊
+PLATFORMS = {}
+# 網域 -> 平台資訊
+_HOST_TABLE = {}
+# (預先編譯的正則表達式, 平台資訊)
+_PATTERNS = []
+
+for _name, _hosts, _pattern, _needs_login, _format in PLATFORM_DEFINITIONS:
+    _descriptor = _make_descriptor(_name, _needs_login, _format)
+    PLATFORMS[_name] = _descriptor
+    for _host in _hosts:
+        _HOST_TABLE[_host] = _descriptor
+    _PATTERNS.append((re.compile(_pattern, re.IGNORECASE), _descriptor))
+
+
+def _lookup_host(host):
+    """依主機名稱查表，逐層去掉子網域直到找到對應的平台"""
+    while host:
+        descriptor = _HOST_TABLE.get(host)
+        if descriptor is not None:
+            return descriptor
+        dot = host.find(".")
+        if dot < 0:
+            return None
+        host = host[dot + 1:]
+    return None
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def lookup_platform(url):
+    """識別網址所屬的平台，返回唯讀的平台資訊"""
+    url = url.strip()
+    if not url:
+        return UNKNOWN_DESCRIPTOR
+
+    # 快速路徑：解析主機名稱後查表（沒有協定的網址補上 // 讓 urlsplit 取得主機）
+    try:
+        target = url if "://" in url else "//" + url
+        host = urlsplit(target).hostname
+    except ValueError:
+        host = None
+    if host:
+        descriptor = _lookup_host(host)
+        if descriptor is not None:
+            return descriptor
+
+    # 備用路徑：預先編譯的正則表達式
+    for pattern, descriptor in _PATTERNS:
+        if pattern.match(url):
+            return descriptor
+
+    return UNKNOWN_DESCRIPTOR
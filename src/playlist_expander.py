@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多平台影片下載器 - 播放清單展開
+
+播放清單、頻道網址在背景線程以 extract_flat 逐頁列出影片，
+每取得一批影片就交給下載佇列，第一部影片解析完成即可開始下載，
+不需要等待整個頻道（可能有數千部影片）全部列出。
+"""
+
+import re
+import time
+from urllib.parse import urlsplit, parse_qs
+
+import yt_dlp
+from PySide6.QtCore import QThread, Signal
+
+try:
+    from src.utils import log
+except ImportError:
+    from utils import log
+
+# 這些網址是播放清單或頻道，而不是單一影片
+_COLLECTION_PATTERNS = [
+    re.compile(r"youtube\.com/(?:playlist\b|@[^/]+/?(?:videos|shorts|streams|playlists)?/?$|"
+               r"(?:channel|c|user)/[^/]+/?(?:videos|shorts|streams|playlists)?/?$)", re.IGNORECASE),
+    re.compile(r"(?:space\.bilibili\.com/\d+|bilibili\.com/(?:medialist|list|festival)/)", re.IGNORECASE),
+    re.compile(r"tiktok\.com/@[^/?#]+/?(?:[?#].*)?$", re.IGNORECASE),
+]
+
+# 這些 extractor 返回的是另一個播放清單（例如頻道的「影片」分頁），需要繼續展開
+_NESTED_PLAYLIST_IE = re.compile(r"(?:Tab|Playlist|Channel|User|Series|Season)$")
+
+MAX_REDIRECTS = 3  # 最多跟隨幾次轉址結果（_type 為 url / url_transparent）
+BATCH_SIZE = 50  # 每批交給佇列的最大影片數
+BATCH_INTERVAL = 0.5  # 每批最長的等待時間（秒）
+
+
+def is_collection_url(url):
+    """網址是否為需要展開的播放清單或頻道"""
+    for pattern in _COLLECTION_PATTERNS:
+        if pattern.search(url):
+            return True
+    # 只有 list= 而沒有指定影片的 YouTube 網址
+    parts = urlsplit(url if "://" in url else "//" + url)
+    if parts.hostname and parts.hostname.endswith("youtube.com"):
+        query = parse_qs(parts.query)
+        return "list" in query and "v" not in query
+    return False
+
+
+class PlaylistExpander(QThread):
+    """在背景展開播放清單/頻道，分批送出影片網址"""
+
+    # 來源網址, [(影片網址, 標題), ...]
+    entries_found = Signal(str, list)
+    # 來源網址, 影片總數, 錯誤訊息（成功時為空字串）
+    expansion_finished = Signal(str, int, str)
+
+    def __init__(self, url, cookies_file=None, parent=None):
+        super().__init__(parent)
+        self.url = url
+        self.cookies_file = cookies_file
+        self.is_cancelled = False
+        self.count = 0
+        self._batch = []
+        self._last_emit = 0.0
+        self._seen = set()
+
+    def cancel(self):
+        """停止展開（已送出的影片不受影響）"""
+        self.is_cancelled = True
+
+    def run(self):
+        error = ""
+        ydl_opts = {
+            'extract_flat': 'in_playlist',  # 只列出影片，不解析每部影片的格式
+            'lazy_playlist': True,  # 逐頁取得，不先列出全部
+            'skip_download': True,
+            'quiet': True,
+            'no_warnings': True,
+            'ignoreerrors': True,
+            'nocheckcertificate': True,
+        }
+        if self.cookies_file:
+            ydl_opts['cookiefile'] = self.cookies_file
+        try:
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                info = ydl.extract_info(self.url, download=False, process=False)
+                if info is None:
+                    raise Exception("無法取得播放清單資訊")
+                self._expand(ydl, info, depth=0)
+        except Exception as e:
+            error = str(e)
+            log(f"展開播放清單失敗: {self.url}, {error}")
+        finally:
+            self._flush()
+            self.expansion_finished.emit(self.url, self.count, error)
+
+    def _resolve(self, ydl, info):
+        """跟隨轉址結果（例如 watch?list= 轉到播放清單、地區頻道轉到主頻道），返回實際的結果"""
+        for _ in range(MAX_REDIRECTS):
+            if info is None or info.get('_type') not in ('url', 'url_transparent') or self.is_cancelled:
+                break
+            info = ydl.extract_info(info['url'], download=False, process=False, ie_key=info.get('ie_key'))
+        return info
+
+    def _expand(self, ydl, info, depth):
+        info = self._resolve(ydl, info)
+        if info is None:
+            return
+        if info.get('_type') not in ('playlist', 'multi_video'):
+            self._add(info)
+            return
+
+        # entries 是 generator/分頁清單，逐一取得時才會向平台請求下一頁
+        for entry in info.get('entries') or []:
+            if self.is_cancelled:
+                return
+            if not entry:
+                continue
+            if depth < 2 and (entry.get('_type') == 'playlist'
+                              or _NESTED_PLAYLIST_IE.search(entry.get('ie_key') or "")):
+                self._expand(ydl, entry, depth + 1)
+                continue
+            self._add(entry)
+
+    def _add(self, entry):
+        url = entry.get('webpage_url') or entry.get('url')
+        if not url or not url.startswith(("http://", "https://")) or url in self._seen:
+            return
+        self._seen.add(url)
+        self._batch.append((url, entry.get('title') or ""))
+        self.count += 1
+
+        # 第一部影片立即送出，之後依數量或時間分批
+        now = time.monotonic()
+        if self.count == 1 or len(self._batch) >= BATCH_SIZE or now - self._last_emit >= BATCH_INTERVAL:
+            self._flush()
+
+    def _flush(self):
+        if self._batch:
+            self.entries_found.emit(self.url, self._batch)
+            self._batch = []
+        self._last_emit = time.monotonic()
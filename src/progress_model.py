@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多平台影片下載器 - 下載進度列表模型
+
+以 QAbstractTableModel 保存所有下載項目的資料，搭配自訂委派繪製進度條，
+只有畫面上可見的列才會被繪製，數千個項目也不會讓介面停頓。
+"""
+
+from enum import Enum
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QRect
+from PySide6.QtGui import QColor, QPen, QFont
+from PySide6.QtWidgets import QStyledItemDelegate, QStyle
+
+# 各種下載狀態的進度條顏色
+PROGRESS_STYLE_COLORS = {
+    "waiting": "#cccccc",  # 準備中 - 灰色
+    "downloading": "#0078d7",  # 下載中 - 藍色
+    "failed": "#d9534f",  # 失敗 - 紅色
+    "processing": "#5bc0de",  # 合併處理中 - 淺藍色
+    "paused": "#f0ad4e",  # 暫停 - 黃色
+    "completed": "#5cb85c",  # 完成 - 綠色
+    "skipped": "#9e9e9e",  # 已略過 - 深灰色
+    "other": "#605ca8",  # 其他狀態 - 紫色
+}
+
+
+class DownloadState(Enum):
+    """下載項目狀態"""
+    WAITING = "waiting"  # 準備中
+    DOWNLOADING = "downloading"  # 下載中
+    PROCESSING = "processing"  # 合併/後處理中
+    PAUSED = "paused"  # 已暫停
+    COMPLETED = "completed"  # 已完成
+    FAILED = "failed"  # 失敗
+    SKIPPED = "skipped"  # 已在下載存檔中，略過下載
+
+
+# 計入總進度的狀態（暫停的項目也算入進度）
+PROGRESS_STATES = (DownloadState.DOWNLOADING, DownloadState.PROCESSING, DownloadState.PAUSED)
+
+# 狀態欄文字顏色
+STATUS_TEXT_COLORS = {
+    DownloadState.COMPLETED: "#2e7d32",
+    DownloadState.FAILED: "#d9534f",
+    DownloadState.SKIPPED: "#757575",
+}
+
+# 進度條資料使用的自訂角色
+PROGRESS_ROLE = Qt.UserRole + 1
+
+
+class DownloadListModel(QAbstractTableModel):
+    """下載進度列表模型
+
+    每個項目以一個 dict 保存（檔名 -> 項目資料），
+    列的順序另存於清單中，更新單一項目時只通知該列重繪。
+    各狀態的項目數量與總位元組數只在項目變更時增減，計算總進度不需走訪所有項目。
+    """
+
+    COLUMN_FILENAME = 0
+    COLUMN_PROGRESS = 1
+    COLUMN_STATUS = 2
+    COLUMN_SPEED = 3
+    COLUMN_ETA = 4
+    COLUMN_URL = 5
+
+    HEADERS = ["檔案名稱", "進度", "狀態", "速度", "剩餘時間", "網址"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.items = {}  # 檔名 -> 項目資料
+        self._order = []  # 依加入順序排列的檔名
+        self._rows = {}  # 檔名 -> 列索引
+        self._reset_aggregates()
+
+    def _reset_aggregates(self):
+        """重設總計資料"""
+        self.state_counts = {state: 0 for state in DownloadState}
+        self.bytes_done = 0  # 進行中項目的已下載位元組總和（僅限已知大小的項目）
+        self.bytes_total = 0  # 進行中項目的總位元組總和
+        self.percent_sum = 0  # 進行中但大小未知的項目的進度總和
+        self.percent_count = 0  # 進行中但大小未知的項目數量
+
+    def _apply_contribution(self, item, sign):
+        """將項目計入（sign=1）或移出（sign=-1）總計"""
+        self.state_counts[item['state']] += sign
+        if item['state'] not in PROGRESS_STATES:
+            return
+        if item['bytes_total'] > 0:
+            self.bytes_done += sign * min(item['bytes_done'], item['bytes_total'])
+            self.bytes_total += sign * item['bytes_total']
+        elif 0 < item['percent'] < 100:
+            self.percent_sum += sign * item['percent']
+            self.percent_count += sign
+
+    def progress_item_count(self):
+        """計入總進度的項目數量"""
+        return sum(self.state_counts[state] for state in PROGRESS_STATES)
+
+    def total_percent(self):
+        """依位元組加權的總進度百分比；沒有任何已知大小的項目時使用平均進度"""
+        if self.bytes_total > 0:
+            return int(self.bytes_done * 100 / self.bytes_total)
+        if self.percent_count > 0:
+            return int(self.percent_sum / self.percent_count)
+        return 0
+
+    @staticmethod
+    def new_item(url):
+        """建立新項目的預設資料"""
+        return {
+            'url': url,
+            'percent': 0,
+            'bar_text': "0%",
+            'style_kind': "waiting",
+            'status_text': "準備中...",
+            'speed_text': "--",
+            'eta_text': "--",
+            'is_paused': False,
+            'state': DownloadState.WAITING,
+            'bytes_done': 0,
+            'bytes_total': 0,
+            'file_path': "",
+            'message': "",
+        }
+
+    # ---- Qt 模型介面 ----
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._order)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._order):
+            return None
+
+        item = self.items[self._order[index.row()]]
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            if column == self.COLUMN_FILENAME:
+                return self._order[index.row()]
+            if column == self.COLUMN_PROGRESS:
+                return item['bar_text']
+            if column == self.COLUMN_STATUS:
+                return item['status_text']
+            if column == self.COLUMN_SPEED:
+                return item['speed_text']
+            if column == self.COLUMN_ETA:
+                return item['eta_text']
+            if column == self.COLUMN_URL:
+                return item['url']
+        elif role == PROGRESS_ROLE and column == self.COLUMN_PROGRESS:
+            return item['percent'], item['bar_text'], PROGRESS_STYLE_COLORS.get(item['style_kind'], "#605ca8")
+        elif role == Qt.ToolTipRole:
+            if column == self.COLUMN_FILENAME:
+                return item['file_path'] or self._order[index.row()]
+            if column == self.COLUMN_URL:
+                return item['url']
+            if column == self.COLUMN_STATUS and item['message']:
+                return item['message']
+        elif role == Qt.ForegroundRole and column == self.COLUMN_STATUS:
+            color = STATUS_TEXT_COLORS.get(item['state'])
+            if color:
+                return QColor(color)
+        elif role == Qt.FontRole and column == self.COLUMN_STATUS:
+            if item['state'] in STATUS_TEXT_COLORS:
+                font = QFont()
+                font.setBold(True)
+                return font
+        return None
+
+    # ---- 項目操作 ----
+
+    def add_item(self, filename, url):
+        """新增項目到列表末端，返回項目資料"""
+        if filename in self.items:
+            return self.items[filename]
+
+        row = len(self._order)
+        self.beginInsertRows(QModelIndex(), row, row)
+        item = self.new_item(url)
+        self.items[filename] = item
+        self._order.append(filename)
+        self._rows[filename] = row
+        self._apply_contribution(item, 1)
+        self.endInsertRows()
+        return item
+
+    def update_item(self, filename, state=None, percent=None, bytes_done=None, bytes_total=None):
+        """更新項目的狀態與進度，同步調整總計（不通知重繪）"""
+        item = self.items.get(filename)
+        if item is None:
+            return
+
+        self._apply_contribution(item, -1)
+        if state is not None:
+            item['state'] = state
+        if percent is not None:
+            item['percent'] = percent
+        if bytes_done is not None:
+            item['bytes_done'] = bytes_done
+        if bytes_total is not None:
+            item['bytes_total'] = bytes_total
+        self._apply_contribution(item, 1)
+
+    def remove_items(self, filenames):
+        """移除多個項目"""
+        targets = [filename for filename in filenames if filename in self.items]
+        if not targets:
+            return
+
+        if len(targets) == 1:
+            row = self._rows[targets[0]]
+            self.beginRemoveRows(QModelIndex(), row, row)
+            self._remove_data(targets)
+            self.endRemoveRows()
+        else:
+            # 一次移除多列時直接重設模型，避免逐列通知
+            self.beginResetModel()
+            self._remove_data(targets)
+            self.endResetModel()
+
+    def _remove_data(self, filenames):
+        remove_set = set(filenames)
+        for filename in remove_set:
+            self._apply_contribution(self.items.pop(filename), -1)
+        self._order = [filename for filename in self._order if filename not in remove_set]
+        self._rows = {filename: row for row, filename in enumerate(self._order)}
+
+    def clear(self):
+        """清空所有項目"""
+        self.beginResetModel()
+        self.items.clear()
+        self._order = []
+        self._rows = {}
+        self._reset_aggregates()
+        self.endResetModel()
+
+    def item_changed(self, filename):
+        """通知檢視重繪指定項目所在的列"""
+        row = self._rows.get(filename)
+        if row is not None:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+
+    def filename_at(self, row):
+        """取得指定列的檔名"""
+        if 0 <= row < len(self._order):
+            return self._order[row]
+        return None
+
+    def row_of(self, filename):
+        """取得檔名所在的列，不存在時返回 None"""
+        return self._rows.get(filename)
+
+
+class ProgressBarDelegate(QStyledItemDelegate):
+    """直接繪製進度條的委派，不需要為每一列建立 QProgressBar 元件"""
+
+    def paint(self, painter, option, index):
+        value = index.data(PROGRESS_ROLE)
+        if value is None:
+            super().paint(painter, option, index)
+            return
+
+        percent, text, color = value
+        percent = max(0, min(100, percent))
+
+        painter.save()
+
+        # 選取時先畫選取背景
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+
+        bar_rect = option.rect.adjusted(3, 3, -3, -3)
+        bar_color = QColor(color)
+
+        # 背景與外框
+        painter.setRenderHint(painter.RenderHint.Antialiasing, True)
+        painter.setPen(QPen(bar_color, 1))
+        painter.setBrush(QColor("#f5f5f5"))
+        painter.drawRoundedRect(bar_rect, 4, 4)
+
+        # 進度區塊
+        if percent > 0:
+            chunk_width = int((bar_rect.width() - 2) * percent / 100)
+            chunk_rect = QRect(bar_rect.left() + 1, bar_rect.top() + 1, chunk_width, bar_rect.height() - 1)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(bar_color)
+            painter.drawRoundedRect(chunk_rect, 4, 4)
+
+        # 進度文字
+        font = QFont(option.font)
+        font.setBold(True)
+        painter.setFont(font)
+        painter.setPen(QColor("black"))
+        painter.drawText(bar_rect, Qt.AlignCenter, text)
+
+        painter.restore()
@@ -8,14 +8,58 @@
 import os
 import sys
 import time
-import json # Added for saving settings
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
-    QProgressBar, QScrollArea, QFrame, QMessageBox, QLineEdit,
-    QGroupBox, QGridLayout
+    QProgressBar, QMessageBox, QGroupBox, QTableView, QHeaderView,
+    QAbstractItemView, QMenu
 )
 
+# 導入設定服務 - 使用適應打包環境的導入方式
+try:
+    from src.settings_service import get_app_settings
+except ImportError:
+    from settings_service import get_app_settings
+
+# 導入下載進度列表模型 - 使用適應打包環境的導入方式
+try:
+    from src.progress_model import DownloadListModel, ProgressBarDelegate, DownloadState
+except ImportError:
+    from progress_model import DownloadListModel, ProgressBarDelegate, DownloadState
+
+try:
+    from src.download_queue import PRIORITY_URGENT, PRIORITY_NORMAL, PRIORITY_BACKGROUND, PRIORITY_LABELS
+except ImportError:
+    from download_queue import PRIORITY_URGENT, PRIORITY_NORMAL, PRIORITY_BACKGROUND, PRIORITY_LABELS
+
+# 總進度條在各種狀態下的顏色 (外框, 進度區塊, 文字)
+TOTAL_PROGRESS_COLORS = {
+    "error": ("#d9534f", "#d9534f", "black"),  # 有錯誤 - 紅色
+    "paused": ("#f0ad4e", "#f0ad4e", "black"),  # 有暫停 - 橙色
+    "active": ("#0078d7", "#0078d7", "black"),  # 下載中 - 藍色
+    "completed": ("#5cb85c", "#5cb85c", "black"),  # 全部完成 - 綠色
+    "default": ("#cccccc", "#5cb85c", "black"),  # 預設樣式
+    "empty": ("#cccccc", "#cccccc", "#666666"),  # 沒有下載項目
+}
+
+def total_progress_style(border_color, chunk_color, text_color):
+    """產生總進度條樣式表"""
+    return f"""
+        QProgressBar {{
+            border: 1px solid {border_color};
+            border-radius: 5px;
+            text-align: center;
+            background-color: #f5f5f5;
+            color: {text_color};
+            font-weight: bold;
+            min-height: 25px;
+        }}
+        QProgressBar::chunk {{
+            background-color: {chunk_color};
+            border-radius: 5px;
+        }}
+    """
+
 class ProgressTab(QWidget):
     """下載進度標籤頁"""
     
@@ -23,11 +67,13 @@ class ProgressTab(QWidget):
         super().__init__(parent)
         self.parent = parent
         self.download_path = download_path or os.path.expanduser("~/Downloads")
-        self.download_items = {}  # 儲存下載項目的相關資訊
+        self.downloads_model = DownloadListModel(self)  # 下載項目列表模型
+        self.download_items = self.downloads_model.items  # 儲存下載項目的相關資訊（檔名 -> 項目資料）
         self.download_threads = {}  # 儲存下載線程
         self.error_dialogs = {}  # 儲存錯誤對話框
         self.format_dialogs = {}  # 儲存格式選項對話框
         self.download_completed_dialogs = {}  # 儲存下載完成對話框
+        self._total_style_kind = None  # 總進度條目前的樣式類型
         self.init_ui()
     
     def set_download_path(self, new_path):
@@ -37,38 +83,16 @@ class ProgressTab(QWidget):
     def save_settings(self):
         """保存進度標籤頁設定"""
         try:
-            # 使用通用的設定檔路徑
-            settings_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'setup.json')
-            
-            # 讀取現有設定（如果存在）
-            settings = {}
-            if os.path.exists(settings_path):
-                with open(settings_path, "r", encoding="utf-8") as f:
-                    try:
-                        settings = json.load(f)
-                    except:
-                        settings = {}
-            
-            # 確保progress_tab區段存在
-            if "progress_tab" not in settings:
-                settings["progress_tab"] = {}
-                
             # 保存正在進行的下載數量
-            active_downloads = 0
-            completed_downloads = 0
-            for filename, item in self.download_items.items():
-                if 'progress' in item and 0 < item['progress'].value() < 100:
-                    active_downloads += 1
-                elif 'progress' in item and item['progress'].value() == 100:
-                    completed_downloads += 1
+            active_downloads = self.downloads_model.progress_item_count()
+            completed_downloads = self.downloads_model.state_counts[DownloadState.COMPLETED]
                     
-            settings["progress_tab"]["active_downloads"] = active_downloads
-            settings["progress_tab"]["completed_downloads"] = completed_downloads
-            settings["progress_tab"]["total_downloads"] = len(self.download_items)
-            
-            # 保存設定
-            with open(settings_path, "w", encoding="utf-8") as f:
-                json.dump(settings, f, ensure_ascii=False, indent=4)
+            # 使用共用的設定服務（與其他標籤頁同一個設定檔，延遲寫入）
+            get_app_settings().update_section("progress_tab", {
+                "active_downloads": active_downloads,
+                "completed_downloads": completed_downloads,
+                "total_downloads": len(self.download_items),
+            })
                 
             # 輸出日誌
             from datetime import datetime
@@ -81,6 +105,7 @@ class ProgressTab(QWidget):
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             print(f"[{timestamp}] 保存進度標籤頁設定失敗：{str(e)}")
     
+    
     def init_ui(self):
         """初始化用戶界面"""
         main_layout = QVBoxLayout(self)
@@ -110,22 +135,55 @@ class ProgressTab(QWidget):
         header_layout.addWidget(resume_all_btn)
         
         header_layout.addStretch(1)
-        main_layout.addLayout(header_layout)
         
-        # 建立下載項目的捲動區域
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        main_layout.addWidget(scroll_area)
+        # 針對選取項目的操作按鈕
+        pause_selected_btn = QPushButton("暫停/繼續")
+        pause_selected_btn.setToolTip("暫停或繼續選取的下載")
+        pause_selected_btn.clicked.connect(self.toggle_pause_selected)
+        header_layout.addWidget(pause_selected_btn)
+        
+        retry_selected_btn = QPushButton("重試")
+        retry_selected_btn.setToolTip("重新嘗試下載選取的失敗項目")
+        retry_selected_btn.clicked.connect(self.retry_selected)
+        header_layout.addWidget(retry_selected_btn)
         
-        # 建立容器小部件來放置下載項目
-        self.downloads_container = QWidget()
-        self.downloads_layout = QVBoxLayout(self.downloads_container)
-        self.downloads_layout.setContentsMargins(0, 0, 0, 0)
-        self.downloads_layout.setSpacing(10)
-        self.downloads_layout.addStretch(1)
+        delete_selected_btn = QPushButton("刪除")
+        delete_selected_btn.setToolTip("取消並刪除選取的下載")
+        delete_selected_btn.clicked.connect(self.delete_selected)
+        header_layout.addWidget(delete_selected_btn)
         
-        scroll_area.setWidget(self.downloads_container)
+        main_layout.addLayout(header_layout)
+        
+        # 下載項目列表 - 只有可見的列會被繪製，項目數量再多也不會拖慢介面
+        self.downloads_view = QTableView()
+        self.downloads_view.setModel(self.downloads_model)
+        self.downloads_view.setItemDelegateForColumn(DownloadListModel.COLUMN_PROGRESS, ProgressBarDelegate(self.downloads_view))
+        self.downloads_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.downloads_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.downloads_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.downloads_view.setAlternatingRowColors(True)
+        self.downloads_view.setWordWrap(False)
+        self.downloads_view.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.downloads_view.customContextMenuRequested.connect(self.show_item_context_menu)
+        self.downloads_view.doubleClicked.connect(self.on_item_double_clicked)
+        
+        # 固定列高，避免依內容計算每一列的大小
+        vertical_header = self.downloads_view.verticalHeader()
+        vertical_header.setVisible(False)
+        vertical_header.setSectionResizeMode(QHeaderView.Fixed)
+        vertical_header.setDefaultSectionSize(28)
+        
+        horizontal_header = self.downloads_view.horizontalHeader()
+        horizontal_header.setSectionResizeMode(QHeaderView.Interactive)
+        horizontal_header.setStretchLastSection(True)
+        for column, width in ((DownloadListModel.COLUMN_FILENAME, 220),
+                              (DownloadListModel.COLUMN_PROGRESS, 200),
+                              (DownloadListModel.COLUMN_STATUS, 200),
+                              (DownloadListModel.COLUMN_SPEED, 100),
+                              (DownloadListModel.COLUMN_ETA, 90)):
+            self.downloads_view.setColumnWidth(column, width)
+        
+        main_layout.addWidget(self.downloads_view)
         
         # 添加總進度顯示
         progress_group = QGroupBox("總進度")
@@ -135,242 +193,117 @@ class ProgressTab(QWidget):
         self.total_progress.setRange(0, 100)
         self.total_progress.setValue(0)
         self.total_progress.setFormat("%p% (0/0)")
-        self.total_progress.setStyleSheet("""
-            QProgressBar {
-                border: 1px solid #cccccc;
-                border-radius: 5px;
-                text-align: center;
-                background-color: #f5f5f5;
-                color: black;
-                font-weight: bold;
-                min-height: 25px;
-            }
-            QProgressBar::chunk {
-                background-color: #5cb85c;
-                border-radius: 5px;
-            }
-        """)
+        self.total_progress.setStyleSheet(total_progress_style(*TOTAL_PROGRESS_COLORS["default"]))
         progress_layout.addWidget(self.total_progress)
         
+        # 目前的同時下載數（自動調整時顯示調整結果與總速度）
+        self.concurrency_label = QLabel("")
+        self.concurrency_label.setStyleSheet("color: #555555;")
+        progress_layout.addWidget(self.concurrency_label)
+        
         main_layout.addWidget(progress_group)
     
-    def update_download_progress(self, filename, message, percent, speed, eta):
-        """更新下載進度 - 增強版，確保項目可見且正確顯示"""
+    def apply_progress_updates(self, updates):
+        """套用進度快照表送來的合併更新，只重繪有變動的項目"""
+        for filename, (message, percent, speed, eta, bytes_done, bytes_total, state) in updates.items():
+            # 尚未加入進度頁的項目略過，同步加入時會讀取快照表中的最新進度
+            if filename in self.download_items:
+                self.update_download_progress(filename, message, percent, speed, eta,
+                                              bytes_done, bytes_total, state, update_total=False)
+        
+        # 整批更新後只重新計算一次總進度
+        self.update_total_progress()
+    
+    def update_download_progress(self, filename, message, percent, speed, eta,
+                                 bytes_done=None, bytes_total=None, state=None, update_total=True):
+        """更新下載進度
+
+        state: 下載線程回報的 DownloadState，決定項目狀態與進度條樣式；
+        None 表示只更新訊息與進度，狀態不變
+        """
         try:
-            # 輸出更詳細的診斷日誌
-            from datetime import datetime
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
             if filename not in self.download_items:
+                from datetime import datetime
+                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 print(f"[{timestamp}] 警告: 找不到下載項目 [{filename}] 無法更新進度")
                 return
             
-            # 更新進度條
-            if 'progress' in self.download_items[filename]:
-                progress_bar = self.download_items[filename]['progress']
-                
-                # 確保進度條可見
-                if not progress_bar.isVisible():
-                    progress_bar.setVisible(True)
-                    print(f"[{timestamp}] 設置進度條可見: [{filename}]")
-                
-                # 設定進度條格式和樣式 - 確保進度文字清晰可見
-                progress_bar.setFormat(f"{percent}%")
-                
-                # 設置進度文字格式 - 更加明確的狀態顯示
-                if "下載中" in message or "downloading" in message.lower():
-                    # 顯示進度百分比和MB大小（如果可用）
-                    progress_bar.setFormat(f"{percent}% 下載中")
-                    
-                    # 進度條使用藍色
-                    progress_bar.setStyleSheet("""
-                        QProgressBar {
-                            border: 1px solid #0078d7;
-                            border-radius: 5px;
-                            text-align: center;
-                            background-color: #f5f5f5;
-                            color: black;
-                            font-weight: bold;
-                        }
-                        QProgressBar::chunk {
-                            background-color: #0078d7;
-                            border-radius: 5px;
-                        }
-                    """)
-                elif "失敗" in message or "錯誤" in message:
-                    # 失敗時使用紅色
-                    progress_bar.setFormat("失敗 - 點擊「重試」")
-                    progress_bar.setStyleSheet("""
-                        QProgressBar {
-                            border: 1px solid #d9534f;
-                            border-radius: 5px;
-                            text-align: center;
-                            background-color: #f5f5f5;
-                            color: black;
-                            font-weight: bold;
-                        }
-                        QProgressBar::chunk {
-                            background-color: #d9534f;
-                            border-radius: 5px;
-                        }
-                    """)
-                elif "合併" in message or "處理" in message:
-                    # 處理中使用藍色
-                    progress_bar.setFormat("合併處理中...")
-                    progress_bar.setStyleSheet("""
-                        QProgressBar {
-                            border: 1px solid #5bc0de;
-                            border-radius: 5px;
-                            text-align: center;
-                            background-color: #f5f5f5;
-                            color: black;
-                            font-weight: bold;
-                        }
-                        QProgressBar::chunk {
-                            background-color: #5bc0de;
-                            border-radius: 5px;
-                        }
-                    """)
-                elif "暫停" in message:
-                    # 暫停時使用黃色
-                    progress_bar.setFormat("已暫停 - 點擊「繼續」")
-                    progress_bar.setStyleSheet("""
-                        QProgressBar {
-                            border: 1px solid #f0ad4e;
-                            border-radius: 5px;
-                            text-align: center;
-                            background-color: #f5f5f5;
-                            color: black;
-                            font-weight: bold;
-                        }
-                        QProgressBar::chunk {
-                            background-color: #f0ad4e;
-                            border-radius: 5px;
-                        }
-                    """)
-                elif "完成" in message:
-                    # 完成時使用綠色
-                    progress_bar.setFormat("100% - 下載完成!")
-                    progress_bar.setStyleSheet("""
-                        QProgressBar {
-                            border: 1px solid #5cb85c;
-                            border-radius: 5px;
-                            text-align: center;
-                            background-color: #f5f5f5;
-                            color: black;
-                            font-weight: bold;
-                        }
-                        QProgressBar::chunk {
-                            background-color: #5cb85c;
-                            border-radius: 5px;
-                        }
-                    """)
-                else:
-                    # 其他狀態使用紫色
-                    progress_bar.setFormat(f"{percent}% - {message}")
-                    progress_bar.setStyleSheet("""
-                        QProgressBar {
-                            border: 1px solid #605ca8;
-                            border-radius: 5px;
-                            text-align: center;
-                            background-color: #f5f5f5;
-                            color: black;
-                            font-weight: bold;
-                        }
-                        QProgressBar::chunk {
-                            background-color: #605ca8;
-                            border-radius: 5px;
-                        }
-                    """)
-                
-                # 更新進度值
-                if percent >= 0 and percent <= 100:
-                    progress_bar.setValue(percent)
-                else:
-                    # 如果進度值超出範圍，設為0
-                    progress_bar.setValue(0)
-                    
-                # 確保父元件可見
-                parent_item = self.download_items[filename].get('frame')
-                if parent_item and not parent_item.isVisible():
-                    parent_item.setVisible(True)
-                    print(f"[{timestamp}] 設置項目框架可見: [{filename}]")
+            item = self.download_items[filename]
+            
+            # 負數表示訊息沒有附帶進度（暫停、繼續、重新連線等），保留原本的進度值
+            known = percent is not None and percent >= 0
+            percent_text = f"{percent}% " if known else ""
+            
+            # 依下載狀態決定進度條文字與顏色
+            if state == DownloadState.DOWNLOADING:
+                item['bar_text'] = f"{percent_text}下載中"
+            elif state == DownloadState.FAILED:
+                item['bar_text'] = "失敗 - 點擊「重試」"
+            elif state == DownloadState.PROCESSING:
+                item['bar_text'] = "合併處理中..."
+            elif state == DownloadState.PAUSED:
+                item['bar_text'] = "已暫停 - 點擊「繼續」"
+            elif state == DownloadState.COMPLETED:
+                item['bar_text'] = "100% - 下載完成!"
             else:
-                print(f"[{timestamp}] 警告: [{filename}] 沒有進度條元件")
+                item['bar_text'] = f"{percent}% - {message}" if known else message
+            item['style_kind'] = state.value if state is not None and state != DownloadState.WAITING else "other"
+            
+            # 更新狀態與進度值（沒有附帶進度時不變），總計由模型同步調整
+            self.downloads_model.update_item(
+                filename,
+                state=state,
+                percent=min(percent, 100) if known else None,
+                bytes_done=bytes_done,
+                bytes_total=bytes_total,
+            )
             
-            # 更新狀態標籤
-            if 'status' in self.download_items[filename]:
-                status_label = self.download_items[filename]['status']
-                if "下載中" in message or "downloading" in message.lower():
-                    status_label.setText(f"狀態: 下載中 {percent}%")
-                elif "處理中" in message or "合併" in message:
-                    status_label.setText(f"狀態: 處理中 {percent}%")
-                else:
-                    status_label.setText(f"狀態: {message}")
+            # 更新狀態文字
+            if state == DownloadState.DOWNLOADING:
+                item['status_text'] = f"下載中 {percent}%" if known else message
+            elif state == DownloadState.PROCESSING:
+                item['status_text'] = f"處理中 {percent}%" if known else message
+            else:
+                item['status_text'] = message
             
-            # 更新速度標籤
-            if 'speed' in self.download_items[filename]:
-                speed_label = self.download_items[filename]['speed']
-                speed_label.setText(f"速度: {speed}")
+            item['speed_text'] = speed
+            item['eta_text'] = eta
             
-            # 更新ETA標籤
-            if 'eta' in self.download_items[filename]:
-                eta_label = self.download_items[filename]['eta']
-                eta_label.setText(f"剩餘時間: {eta}")
+            # 只重繪這一列
+            self.downloads_model.item_changed(filename)
             
             # 更新總進度
-            self.update_total_progress()
-            
-            # 每10%或者每分鐘記錄一次詳細日誌
-            if percent % 10 == 0 and percent > 0:
-                print(f"[{timestamp}] 進度更新 [{filename}]: {percent}%, 速度: {speed}, ETA: {eta}")
+            if update_total:
+                self.update_total_progress()
         except Exception as e:
-            print(f"[{timestamp}] 更新進度條時發生錯誤: {str(e)}")
+            print(f"更新進度條時發生錯誤: {str(e)}")
             import traceback
             traceback.print_exc()
     
+    def set_concurrency_status(self, level, auto, throughput=0):
+        """顯示目前的同時下載數"""
+        if auto:
+            speed_text = f"，總速度 {throughput / (1024 * 1024):.1f} MB/s" if throughput else ""
+            self.concurrency_label.setText(f"同時下載數: {level}（自動調整{speed_text}）")
+        else:
+            self.concurrency_label.setText(f"同時下載數: {level}")
+    
     def update_total_progress(self):
-        """更新總進度條和狀態資訊"""
-        total_percent = 0
-        active_items = 0
-        completed_items = 0
-        error_items = 0
-        paused_items = 0
+        """更新總進度條和狀態資訊（直接讀取模型維護的總計，不走訪項目）"""
+        model = self.downloads_model
+        counts = model.state_counts
+        active_items = counts[DownloadState.DOWNLOADING] + counts[DownloadState.PROCESSING]
+        completed_items = counts[DownloadState.COMPLETED]
+        error_items = counts[DownloadState.FAILED]
+        paused_items = counts[DownloadState.PAUSED]
+        skipped_items = counts[DownloadState.SKIPPED]
         total_items = len(self.download_items)
         
-        # 計算各種狀態的項目數量和總進度
-        for filename, item_data in self.download_items.items():
-            if 'progress' in item_data:
-                progress_bar = item_data['progress']
-                current_progress = progress_bar.value()
-                status_text = ""
-                
-                if 'status' in item_data:
-                    status_text = item_data['status'].text().lower()
-                
-                # 檢查項目狀態
-                if "失敗" in status_text or "錯誤" in status_text:
-                    error_items += 1
-                elif "暫停" in status_text:
-                    paused_items += 1
-                    # 暫停的項目也算入進度
-                    if 0 < current_progress < 100:
-                        total_percent += current_progress
-                        active_items += 1
-                elif current_progress == 100:
-                    completed_items += 1
-                elif 0 < current_progress < 100:
-                    total_percent += current_progress
-                    active_items += 1
-        
-        # 計算平均進度
-        if active_items > 0:
-            avg_percent = total_percent / active_items
-        else:
-            avg_percent = 0
+        # 依位元組加權的總進度
+        avg_percent = model.total_percent()
         
         # 設置總進度條
-        self.total_progress.setValue(int(avg_percent))
+        self.total_progress.setValue(avg_percent)
         
         # 設置總進度條顯示文字，包含各種狀態的項目數量
         if total_items > 0:
@@ -386,6 +319,8 @@ class ProgressTab(QWidget):
                 status_parts.append(f"暫停: {paused_items}")
             if error_items > 0:
                 status_parts.append(f"失敗: {error_items}")
+            if skipped_items > 0:
+                status_parts.append(f"略過: {skipped_items}")
                 
             status_text += ", ".join(status_parts) + ")"
             
@@ -393,122 +328,31 @@ class ProgressTab(QWidget):
             
             # 更新進度條顏色
             if error_items > 0:
-                # 有錯誤時使用紅色
-                self.total_progress.setStyleSheet("""
-                    QProgressBar {
-                        border: 1px solid #d9534f;
-                        border-radius: 5px;
-                        text-align: center;
-                        background-color: #f5f5f5;
-                        color: black;
-                        font-weight: bold;
-                        min-height: 25px;
-                    }
-                    QProgressBar::chunk {
-                        background-color: #d9534f;
-                        border-radius: 5px;
-                    }
-                """)
+                style_kind = "error"
             elif paused_items > 0:
-                # 有暫停項目時使用橙色
-                self.total_progress.setStyleSheet("""
-                    QProgressBar {
-                        border: 1px solid #f0ad4e;
-                        border-radius: 5px;
-                        text-align: center;
-                        background-color: #f5f5f5;
-                        color: black;
-                        font-weight: bold;
-                        min-height: 25px;
-                    }
-                    QProgressBar::chunk {
-                        background-color: #f0ad4e;
-                        border-radius: 5px;
-                    }
-                """)
+                style_kind = "paused"
             elif active_items > 0:
-                # 有活動項目時使用藍色
-                self.total_progress.setStyleSheet("""
-                    QProgressBar {
-                        border: 1px solid #0078d7;
-                        border-radius: 5px;
-                        text-align: center;
-                        background-color: #f5f5f5;
-                        color: black;
-                        font-weight: bold;
-                        min-height: 25px;
-                    }
-                    QProgressBar::chunk {
-                        background-color: #0078d7;
-                        border-radius: 5px;
-                    }
-                """)
-            elif completed_items == total_items:
-                # 全部完成時使用綠色
-                self.total_progress.setStyleSheet("""
-                    QProgressBar {
-                        border: 1px solid #5cb85c;
-                        border-radius: 5px;
-                        text-align: center;
-                        background-color: #f5f5f5;
-                        color: black;
-                        font-weight: bold;
-                        min-height: 25px;
-                    }
-                    QProgressBar::chunk {
-                        background-color: #5cb85c;
-                        border-radius: 5px;
-                    }
-                """)
+                style_kind = "active"
+            elif completed_items + skipped_items == total_items:
+                style_kind = "completed"
             else:
-                # 預設樣式
-                self.total_progress.setStyleSheet("""
-                    QProgressBar {
-                        border: 1px solid #cccccc;
-                        border-radius: 5px;
-                        text-align: center;
-                        background-color: #f5f5f5;
-                        color: black;
-                        font-weight: bold;
-                        min-height: 25px;
-                    }
-                    QProgressBar::chunk {
-                        background-color: #5cb85c;
-                        border-radius: 5px;
-                    }
-                """)
+                style_kind = "default"
         else:
             # 沒有下載項目
             self.total_progress.setValue(0)
             self.total_progress.setFormat("沒有進行中的下載")
-            self.total_progress.setStyleSheet("""
-                QProgressBar {
-                    border: 1px solid #cccccc;
-                    border-radius: 5px;
-                    text-align: center;
-                    background-color: #f5f5f5;
-                    color: #666666;
-                    font-weight: bold;
-                    min-height: 25px;
-                }
-                QProgressBar::chunk {
-                    background-color: #cccccc;
-                    border-radius: 5px;
-                                     }
-                 """)
-          # 已經在上面的條件分支中設置了格式，所以此行應該刪除
-          # self.total_progress.setFormat(f"%p% ({completed_items}/{active_items + completed_items})")
+            style_kind = "empty"
+        
+        # 只有顏色改變時才重設樣式表
+        if style_kind != self._total_style_kind:
+            self.total_progress.setStyleSheet(total_progress_style(*TOTAL_PROGRESS_COLORS[style_kind]))
+            self._total_style_kind = style_kind
     
     def clear_completed_downloads(self):
-        """清除已完成的下載項目"""
-        items_to_remove = []
-        
+        """清除已完成（及已略過）的下載項目"""
         # 找出所有已完成的下載項目
-        for filename, item_data in self.download_items.items():
-            if 'progress' in item_data:
-                progress_bar = item_data['progress']
-                if progress_bar.value() == 100:
-                    items_to_remove.append(filename)
+        items_to_remove = [filename for filename, item_data in self.download_items.items()
+                           if item_data['state'] in (DownloadState.COMPLETED, DownloadState.SKIPPED)]
         
         # 記錄已完成項目的URL，防止在下載頁面重新顯示
         if hasattr(self.parent, 'download_tab'):
@@ -518,47 +362,57 @@ class ProgressTab(QWidget):
                 
             # 保存這些項目的URL
             for filename in items_to_remove:
-                if 'url' in self.download_items[filename]:
-                    url = self.download_items[filename]['url']
+                url = self.download_items[filename].get('url')
+                if url:
                     self.parent.download_tab._completed_urls.add(url)
         
-        # 移除已完成的項目
-        for filename in items_to_remove:
-            self.remove_item_from_ui(filename)
-        
-        # 更新總進度
-        self.update_total_progress()
+        # 一次移除所有已完成的項目
+        self.remove_items_from_ui(items_to_remove)
         
         # 顯示通知
         if len(items_to_remove) > 0:
             QMessageBox.information(self, "清除完成", f"已清除 {len(items_to_remove)} 個已完成的下載項目")
     
+    def get_item_thread(self, filename):
+        """取得項目對應的下載線程"""
+        thread = self.download_threads.get(filename)
+        if thread is None and hasattr(self.parent, "download_tab") and hasattr(self.parent.download_tab, "download_threads"):
+            thread = self.parent.download_tab.download_threads.get(filename)
+        return thread
+    
+    def set_item_paused(self, filename, paused):
+        """暫停或繼續單一項目，返回是否有改變"""
+        thread = self.get_item_thread(filename)
+        if thread is None or thread.is_paused == paused:
+            return False
+        
+        item = self.download_items[filename]
+        if paused:
+            thread.pause()
+            item['is_paused'] = True
+            self.downloads_model.update_item(filename, state=DownloadState.PAUSED)
+            item['style_kind'] = "paused"
+            item['bar_text'] = "已暫停 - 點擊「繼續」"
+            item['status_text'] = "已暫停"
+        else:
+            thread.resume()
+            item['is_paused'] = False
+            self.downloads_model.update_item(filename, state=DownloadState.DOWNLOADING)
+            item['style_kind'] = "downloading"
+            item['bar_text'] = f"{item['percent']}% 下載中"
+            item['status_text'] = "正在下載..."
+        self.downloads_model.item_changed(filename)
+        return True
+    
     def pause_all_downloads(self):
         """暫停所有下載"""
         paused_count = 0
         
-        for filename, item_data in self.download_items.items():
-            if 'thread' in item_data and item_data['thread'] is not None and not item_data['thread'].is_paused:
-                # 暫停下載線程
-                item_data['thread'].pause()
-                
-                # 更新暫停/繼續按鈕
-                if 'pause_btn' in item_data:
-                    item_data['pause_btn'].setText("繼續")
-                    item_data['pause_btn'].setStyleSheet("""
-                        QPushButton {
-                            background-color: #5cb85c;
-                            color: white;
-                            border-radius: 3px;
-                            padding: 3px 8px;
-                        }
-                        QPushButton:hover {
-                            background-color: #4cae4c;
-                        }
-                    """)
-                
+        for filename in list(self.download_items.keys()):
+            if self.set_item_paused(filename, True):
                 paused_count += 1
         
+        self.update_total_progress()
         if paused_count > 0:
             QMessageBox.information(self, "暫停下載", f"已暫停 {paused_count} 個下載任務")
     
@@ -566,28 +420,11 @@ class ProgressTab(QWidget):
         """繼續所有下載"""
         resumed_count = 0
         
-        for filename, item_data in self.download_items.items():
-            if 'thread' in item_data and item_data['thread'] is not None and item_data['thread'].is_paused:
-                # 繼續下載線程
-                item_data['thread'].resume()
-                
-                # 更新暫停/繼續按鈕
-                if 'pause_btn' in item_data:
-                    item_data['pause_btn'].setText("暫停")
-                    item_data['pause_btn'].setStyleSheet("""
-                        QPushButton {
-                            background-color: #f0ad4e;
-                            color: white;
-                            border-radius: 3px;
-                            padding: 3px 8px;
-                        }
-                        QPushButton:hover {
-                            background-color: #ec971f;
-                        }
-                    """)
-                
+        for filename in list(self.download_items.keys()):
+            if self.set_item_paused(filename, False):
                 resumed_count += 1
         
+        self.update_total_progress()
         if resumed_count > 0:
             QMessageBox.information(self, "繼續下載", f"已繼續 {resumed_count} 個下載任務")
     
@@ -596,115 +433,8 @@ class ProgressTab(QWidget):
         # 如果項目已存在，不要重複添加
         if filename in self.download_items:
             return
-            
-        # 創建下載項目容器
-        item_frame = QFrame()
-        item_frame.setFrameStyle(QFrame.StyledPanel)
-        item_frame.setStyleSheet("""
-            QFrame {
-                border: 1px solid #cccccc;
-                border-radius: 5px;
-                background-color: #f8f8f8;
-            }
-        """)
-        
-        # 建立網格佈局
-        grid_layout = QGridLayout(item_frame)
-        grid_layout.setContentsMargins(10, 10, 10, 10)
-        grid_layout.setSpacing(5)
-        
-        # 檔案名稱顯示
-        filename_label = QLabel(f"<b>{filename}</b>")
-        filename_label.setWordWrap(True)
-        filename_label.setToolTip(filename)
-        grid_layout.addWidget(filename_label, 0, 0, 1, 2)
-        
-        # URL 輸入框（顯示用）
-        url_input = QLineEdit(url)
-        url_input.setReadOnly(True)
-        url_input.setStyleSheet("background-color: #f0f0f0; color: #666666;")
-        grid_layout.addWidget(url_input, 1, 0, 1, 2)
-        
-        # 進度條
-        progress_bar = QProgressBar()
-        progress_bar.setRange(0, 100)
-        progress_bar.setValue(0)
-        progress_bar.setFormat("%p%")
-        progress_bar.setTextVisible(True)
-        progress_bar.setStyleSheet("""
-            QProgressBar {
-                border: 1px solid #cccccc;
-                border-radius: 5px;
-                text-align: center;
-                background-color: #f5f5f5;
-                color: black;
-                font-weight: bold;
-            }
-            QProgressBar::chunk {
-                background-color: #0078d7;
-                border-radius: 5px;
-            }
-        """)
-        grid_layout.addWidget(progress_bar, 2, 0, 1, 2)
-        
-        # 狀態資訊
-        status_label = QLabel("狀態: 準備中...")
-        grid_layout.addWidget(status_label, 3, 0)
-        
-        speed_label = QLabel("速度: --")
-        grid_layout.addWidget(speed_label, 3, 1)
-        
-        eta_label = QLabel("剩餘時間: --")
-        grid_layout.addWidget(eta_label, 4, 0)
-        
-        # 控制按鈕容器
-        button_layout = QHBoxLayout()
-        
-        # 暫停/繼續按鈕
-        pause_btn = QPushButton("暫停")
-        pause_btn.setToolTip("暫停或繼續下載")
-        pause_btn.setFixedWidth(80)
-        pause_btn.clicked.connect(lambda: self.toggle_pause_item(filename))
-        button_layout.addWidget(pause_btn)
-        
-        # 刪除按鈕
-        delete_btn = QPushButton("刪除")
-        delete_btn.setToolTip("取消並刪除下載")
-        delete_btn.setFixedWidth(80)
-        delete_btn.clicked.connect(lambda: self.delete_item(filename))
-        button_layout.addWidget(delete_btn)
         
-        # 外部下載按鈕 (開始時隱藏)
-        external_btn = QPushButton("外部下載")
-        external_btn.setToolTip("使用外部網站下載")
-        external_btn.setFixedWidth(80)
-        external_btn.setVisible(False)  # 初始隱藏
-        external_btn.clicked.connect(lambda: self.open_external_download_site(filename, url))
-        button_layout.addWidget(external_btn)
-        
-        grid_layout.addLayout(button_layout, 4, 1)
-        
-        # 將項目添加到佈局中
-        # 在插入新項目之前先移除stretch
-        if self.downloads_layout.count() > 0 and self.downloads_layout.itemAt(self.downloads_layout.count()-1).spacerItem():
-            self.downloads_layout.removeItem(self.downloads_layout.itemAt(self.downloads_layout.count()-1))
-            
-        self.downloads_layout.addWidget(item_frame)
-        self.downloads_layout.addStretch(1)  # 重新添加stretch以推高所有項目
-        
-        # 保存項目資訊和控制項的引用
-        self.download_items[filename] = {
-            'frame': item_frame,
-            'url': url,
-            'progress': progress_bar,
-            'status': status_label,
-            'speed': speed_label,
-            'eta': eta_label,
-            'pause_btn': pause_btn,
-            'delete_btn': delete_btn,
-            'external_btn': external_btn,
-            'is_paused': False
-        }
+        self.downloads_model.add_item(filename, url)
         
         # 保存線程引用
         if thread:
@@ -717,80 +447,146 @@ class ProgressTab(QWidget):
         from datetime import datetime
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         print(f"[{timestamp}] 進度標籤頁添加下載項目: {filename}, URL: {url}")
-        
-        return item_frame
     
     def remove_item_from_ui(self, filename):
         """從UI中移除下載項目"""
-        if filename in self.download_items:
-            # 移除部件
-            item_frame = self.download_items[filename]['frame']
-            self.downloads_layout.removeWidget(item_frame)
-            item_frame.setParent(None)
-            item_frame.deleteLater()
-            
-            # 清理線程
-            if 'thread' in self.download_items[filename] and self.download_items[filename]['thread'] is not None:
-                self.download_items[filename]['thread'].cancel()
-            
-            # 從字典中移除
-            del self.download_items[filename]
-            
-            # 更新總進度
-            self.update_total_progress()
+        self.remove_items_from_ui([filename])
+    
+    def remove_items_from_ui(self, filenames):
+        """從UI中一次移除多個下載項目"""
+        filenames = [filename for filename in filenames if filename in self.download_items]
+        if not filenames:
+            return
+        
+        self.downloads_model.remove_items(filenames)
+        for filename in filenames:
+            self.download_threads.pop(filename, None)
+        
+        # 更新總進度
+        self.update_total_progress()
+    
+    def selected_filenames(self):
+        """取得目前選取的項目檔名（依列表順序）"""
+        rows = sorted(index.row() for index in self.downloads_view.selectionModel().selectedRows())
+        return [self.downloads_model.filename_at(row) for row in rows if self.downloads_model.filename_at(row)]
+    
+    def show_item_context_menu(self, pos):
+        """顯示項目的右鍵選單"""
+        index = self.downloads_view.indexAt(pos)
+        if not index.isValid():
+            return
+        
+        # 右鍵點擊未選取的項目時，改為只選取該項目
+        if not self.downloads_view.selectionModel().isRowSelected(index.row(), index.parent()):
+            self.downloads_view.selectRow(index.row())
+        
+        filenames = self.selected_filenames()
+        if not filenames:
+            return
+        
+        menu = QMenu(self)
+        menu.addAction("暫停/繼續", self.toggle_pause_selected)
+        menu.addAction("重試", self.retry_selected)
+        menu.addAction("刪除", self.delete_selected)
+        if hasattr(self.parent, "download_tab") and hasattr(self.parent.download_tab, "set_job_priority"):
+            priority_menu = menu.addMenu("優先順序")
+            for priority in (PRIORITY_URGENT, PRIORITY_NORMAL, PRIORITY_BACKGROUND):
+                priority_menu.addAction(PRIORITY_LABELS[priority],
+                                        lambda p=priority: self.set_priority_selected(p))
+        menu.addSeparator()
+        menu.addAction("外部下載", self.open_external_selected)
+        
+        if len(filenames) == 1:
+            file_path = self.download_items[filenames[0]].get('file_path')
+            if file_path and os.path.exists(file_path):
+                menu.addSeparator()
+                menu.addAction("開啟檔案", lambda: self.open_file(file_path))
+                menu.addAction("開啟資料夾", lambda: self.open_folder(os.path.dirname(file_path)))
+        
+        menu.exec(self.downloads_view.viewport().mapToGlobal(pos))
+    
+    def on_item_double_clicked(self, index):
+        """雙擊項目：已完成則開啟檔案，失敗則重試，其他則暫停/繼續"""
+        filename = self.downloads_model.filename_at(index.row())
+        if not filename:
+            return
+        
+        item = self.download_items[filename]
+        if item['state'] == DownloadState.COMPLETED and item.get('file_path'):
+            self.open_file(item['file_path'])
+        elif item['state'] in (DownloadState.FAILED, DownloadState.SKIPPED):
+            self.retry_download(filename)
+        else:
+            self.toggle_pause_item(filename)
+    
+    def toggle_pause_selected(self):
+        """切換選取項目的暫停/繼續狀態"""
+        for filename in self.selected_filenames():
+            self.toggle_pause_item(filename)
+    
+    def retry_selected(self):
+        """重試選取的失敗項目"""
+        for filename in self.selected_filenames():
+            if self.download_items[filename]['state'] in (DownloadState.FAILED, DownloadState.SKIPPED):
+                self.retry_download(filename)
+    
+    def set_priority_selected(self, priority):
+        """變更選取項目的優先順序（已完成的項目略過；等待自動重試的項目在重新排入佇列時套用）"""
+        for filename in self.selected_filenames():
+            if self.download_items[filename]['state'] not in (DownloadState.COMPLETED, DownloadState.SKIPPED):
+                self.parent.download_tab.set_job_priority(filename, priority)
+    
+    def open_external_selected(self):
+        """以外部網站下載選取的項目"""
+        for filename in self.selected_filenames():
+            self.open_external_download_site(filename, self.download_items[filename].get('url', ''))
     
     def toggle_pause_item(self, filename):
         """切換下載項目的暫停/繼續狀態"""
-        if filename in self.download_items and 'thread' in self.download_items[filename]:
-            thread = self.download_items[filename]['thread']
+        if filename in self.download_items:
+            thread = self.get_item_thread(filename)
             if thread is not None:
-                if thread.is_paused:
-                    # 繼續下載
-                    thread.resume()
-                    self.download_items[filename]['pause_btn'].setText("暫停")
-                    self.download_items[filename]['pause_btn'].setStyleSheet("""
-                        QPushButton {
-                            background-color: #f0ad4e;
-                            color: white;
-                            border-radius: 3px;
-                            padding: 3px 8px;
-                        }
-                        QPushButton:hover {
-                            background-color: #ec971f;
-                        }
-                    """)
-                    self.download_items[filename]['status'].setText("狀態: 正在下載...")
-                else:
-                    # 暫停下載
-                    thread.pause()
-                    self.download_items[filename]['pause_btn'].setText("繼續")
-                    self.download_items[filename]['pause_btn'].setStyleSheet("""
-                        QPushButton {
-                            background-color: #5cb85c;
-                            color: white;
-                            border-radius: 3px;
-                            padding: 3px 8px;
-                        }
-                        QPushButton:hover {
-                            background-color: #4cae4c;
-                        }
-                    """)
-                    self.download_items[filename]['status'].setText("狀態: 已暫停")
+                self.set_item_paused(filename, not thread.is_paused)
+                self.update_total_progress()
     
     def delete_item(self, filename):
         """刪除下載項目"""
         if filename in self.download_items:
-            # 詢問用戶是否確認刪除
-            reply = QMessageBox.question(
-                self, 
-                "確認取消", 
-                f"確定要取消下載 '{filename}' 嗎？",
-                QMessageBox.Yes | QMessageBox.No, 
-                QMessageBox.No
-            )
-            
-            if reply == QMessageBox.Yes:
-                self.remove_item_from_ui(filename)
+            self.confirm_and_delete([filename])
+    
+    def delete_selected(self):
+        """刪除選取的下載項目"""
+        filenames = self.selected_filenames()
+        if filenames:
+            self.confirm_and_delete(filenames)
+    
+    def confirm_and_delete(self, filenames):
+        """詢問用戶後取消並刪除下載項目"""
+        if len(filenames) == 1:
+            question = f"確定要取消下載 '{filenames[0]}' 嗎？"
+        else:
+            question = f"確定要取消選取的 {len(filenames)} 個下載嗎？"
+        
+        reply = QMessageBox.question(
+            self, 
+            "確認取消", 
+            question,
+            QMessageBox.Yes | QMessageBox.No, 
+            QMessageBox.No
+        )
+        
+        if reply == QMessageBox.Yes:
+            # 通知下載任務頁取消任務，避免下次啟動時被恢復
+            if hasattr(self.parent, "download_tab") and hasattr(self.parent.download_tab, "cancel_job"):
+                for filename in filenames:
+                    self.parent.download_tab.cancel_job(filename)
+            self.remove_items_from_ui(filenames)
+    
+    def set_item_status(self, filename, status_text):
+        """設定項目的狀態文字"""
+        if filename in self.download_items:
+            self.download_items[filename]['status_text'] = status_text
+            self.downloads_model.item_changed(filename)
                 
     def update_task_status(self, filename, success, message, file_path):
         """更新任務狀態 - 增強版，提供更明確的完成狀態"""
@@ -813,151 +609,57 @@ class ProgressTab(QWidget):
         # 如果任務已存在，更新其狀態
         if filename in self.download_items:
             item_data = self.download_items[filename]
-            progress_bar = item_data.get('progress')
-            status_label = item_data.get('status')
-            
-            if progress_bar and status_label:
-                if success:
-                    # 下載成功
-                    progress_bar.setValue(100)
-                    progress_bar.setFormat("100% - 完成!")
-                    
-                    # 使用明顯的綠色進度條顯示完成
-                    progress_bar.setStyleSheet("""
-                        QProgressBar {
-                            border: 1px solid #5cb85c;
-                            border-radius: 5px;
-                            text-align: center;
-                            background-color: #f5f5f5;
-                            color: black;
-                            font-weight: bold;
-                        }
-                        QProgressBar::chunk {
-                            background-color: #5cb85c;
-                            border-radius: 5px;
-                        }
-                    """)
-                    
-                    # 更新狀態標籤
-                    status_label.setText("已完成下載 ✓")
-                    status_label.setStyleSheet("color: green; font-weight: bold;")
-                    
-                    # 更新控制按鈕
-                    if 'pause_btn' in item_data:
-                        item_data['pause_btn'].setText("完成")
-                        item_data['pause_btn'].setEnabled(False)
-                        item_data['pause_btn'].setStyleSheet("""
-                            QPushButton {
-                                background-color: #5cb85c;
-                                color: white;
-                                border-radius: 3px;
-                                padding: 3px 8px;
-                            }
-                        """)
-                    
-                    # 顯示檔案資訊
-                    if file_path and os.path.exists(file_path):
-                        try:
-                            file_size = os.path.getsize(file_path)
-                            size_str = self.format_file_size(file_size)
-                            
-                            # 更新ETA標籤顯示檔案大小
-                            if 'eta_label' in item_data:
-                                item_data['eta_label'].setText(f"檔案大小: {size_str}")
-                            
-                            # 更新速度標籤顯示完成時間
-                            if 'speed_label' in item_data:
-                                item_data['speed_label'].setText(f"完成時間: {timestamp.split()[1]}")
-                                
-                            # 顯示彈出通知
-                            self.show_complete_notification(filename, file_path)
-                        except Exception as e:
-                            print(f"[{timestamp}] 獲取檔案大小失敗: {str(e)}")
-                else:
-                    # 下載失敗
-                    progress_bar.setValue(0)
-                    progress_bar.setFormat("0% - 失敗")
-                    
-                    # 使用紅色進度條顯示失敗
-                    progress_bar.setStyleSheet("""
-                        QProgressBar {
-                            border: 1px solid #d9534f;
-                            border-radius: 5px;
-                            text-align: center;
-                            background-color: #f5f5f5;
-                            color: black;
-                            font-weight: bold;
-                        }
-                        QProgressBar::chunk {
-                            background-color: #d9534f;
-                            border-radius: 5px;
-                        }
-                    """)
-                    
-                    # 更新狀態標籤
-                    status_label.setText(f"下載失敗 ❌ 點擊「重試」按鈕")
-                    status_label.setStyleSheet("color: red; font-weight: bold;")
-                    
-                    # 更新控制按鈕
-                    if 'pause_btn' in item_data:
-                        item_data['pause_btn'].setText("失敗")
-                        item_data['pause_btn'].setEnabled(False)
-                        item_data['pause_btn'].setStyleSheet("""
-                            QPushButton {
-                                background-color: #d9534f;
-                                color: white;
-                                border-radius: 3px;
-                                padding: 3px 8px;
-                            }
-                        """)
-                    
-                    # 新增重試按鈕
-                    if 'retry_btn' not in item_data:
-                        retry_btn = QPushButton("重試")
-                        retry_btn.setToolTip("重新嘗試下載")
-                        retry_btn.setFixedWidth(80)
-                        retry_btn.setStyleSheet("""
-                            QPushButton {
-                                background-color: #5cb85c;
-                                color: white;
-                                border-radius: 3px;
-                                padding: 3px 8px;
-                            }
-                            QPushButton:hover {
-                                background-color: #449d44;
-                            }
-                        """)
-                        retry_btn.clicked.connect(lambda: self.retry_download(filename))
-                        item_data['retry_btn'] = retry_btn
-                        
-                        # 嘗試將按鈕添加到佈局
-                        parent_frame = item_data.get('frame')
-                        if parent_frame and hasattr(parent_frame, 'layout'):
-                            layout = parent_frame.layout()
-                            if layout:
-                                # 尋找按鈕區域並添加重試按鈕
-                                for i in range(layout.count()):
-                                    item = layout.itemAt(i)
-                                    if item and isinstance(item, QHBoxLayout):
-                                        item.addWidget(retry_btn)
-                                        break
-                    else:
-                        # 顯示已有的重試按鈕
-                        item_data['retry_btn'].setVisible(True)
-                    
-                    # 顯示外部下載按鈕
-                    if 'external_btn' in item_data:
-                        item_data['external_btn'].setVisible(True)
+            item_data['message'] = message
+            item_data['is_paused'] = False
+            
+            if success:
+                # 下載成功，使用綠色進度條顯示完成
+                self.downloads_model.update_item(filename, state=DownloadState.COMPLETED, percent=100)
+                item_data['bar_text'] = "100% - 完成!"
+                item_data['style_kind'] = "completed"
+                item_data['status_text'] = "已完成下載 ✓"
+                item_data['file_path'] = file_path or ""
+                
+                # 顯示檔案資訊
+                if file_path and os.path.exists(file_path):
+                    try:
+                        file_size = os.path.getsize(file_path)
+                        item_data['eta_text'] = f"檔案大小: {self.format_file_size(file_size)}"
+                        item_data['speed_text'] = f"完成時間: {timestamp.split()[1]}"
                         
-                    # 更新錯誤信息
-                    if 'eta_label' in item_data:
-                        item_data['eta_label'].setText("狀態: 下載失敗")
-                    
-                    if 'speed_label' in item_data:
-                        item_data['speed_label'].setText(f"錯誤信息: {message[:30]}...")
+                        # 顯示彈出通知
+                        self.show_complete_notification(filename, file_path)
+                    except Exception as e:
+                        print(f"[{timestamp}] 獲取檔案大小失敗: {str(e)}")
+            else:
+                # 下載失敗，使用紅色進度條顯示失敗
+                self.downloads_model.update_item(filename, state=DownloadState.FAILED, percent=0)
+                item_data['bar_text'] = "0% - 失敗"
+                item_data['style_kind'] = "failed"
+                item_data['status_text'] = "下載失敗 ❌ 雙擊或按「重試」"
+                item_data['speed_text'] = f"錯誤信息: {message[:30]}..."
+                item_data['eta_text'] = "--"
+            
+            self.downloads_model.item_changed(filename)
                         
         # 更新總進度
         self.update_total_progress()
+    
+    def mark_item_skipped(self, filename, message):
+        """影片已在下載存檔中而沒有下載（與完成分開顯示，可雙擊或按「重試」強制下載）"""
+        if filename not in self.download_items:
+            return
+        item_data = self.download_items[filename]
+        item_data['message'] = message
+        item_data['is_paused'] = False
+        self.downloads_model.update_item(filename, state=DownloadState.SKIPPED, percent=0)
+        item_data['bar_text'] = "已略過"
+        item_data['style_kind'] = "skipped"
+        item_data['status_text'] = "已在下載存檔中，略過 ⏭ 雙擊或按「重試」強制下載"
+        item_data['speed_text'] = "--"
+        item_data['eta_text'] = "--"
+        self.downloads_model.item_changed(filename)
+        self.update_total_progress()
         
     def format_file_size(self, size_bytes):
         """格式化檔案大小"""
@@ -1060,9 +762,12 @@ class ProgressTab(QWidget):
                 # 移除舊的下載項目
                 self.remove_item_from_ui(filename)
                 
-                # 請求主程式重新下載
+                # 請求主程式重新下載（透過下載佇列，遵守最大同時下載數）
                 if hasattr(self.parent, "download_tab"):
-                    self.parent.download_tab.start_download_for_item(filename, url)
+                    if hasattr(self.parent.download_tab, "queue_download"):
+                        self.parent.download_tab.queue_download(filename, url, front=True, bypass_archive=True)
+                    else:
+                        self.parent.download_tab.start_download_for_item(filename, url)
                     print(f"[{timestamp}] 已請求重新下載: {filename}")
             else:
                 print(f"[{timestamp}] 無法重試，找不到原始URL: {filename}")
@@ -1072,12 +777,8 @@ class ProgressTab(QWidget):
     def clear_all(self):
         """清空所有下載項目"""
         try:
-            # 移除所有下載項目
-            for filename in list(self.download_items.keys()):
-                self.remove_item_from_ui(filename)
-            
-            # 清空集合
-            self.download_items.clear()
+            # 移除所有下載項目並清空集合
+            self.downloads_model.clear()
             self.download_threads.clear()
             
             # 更新總進度
@@ -1153,22 +854,12 @@ class ProgressTab(QWidget):
             }
             
             # 嘗試從設定檔載入
-            import os
-            import json
-            
-            if hasattr(self, "parent") and hasattr(self.parent, "download_path"):
-                settings_path = os.path.join(os.path.dirname(self.parent.download_path), "setup.json")
-            else:
-                settings_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "setup.json")
-                
-            if os.path.exists(settings_path):
-                with open(settings_path, "r", encoding="utf-8") as f:
-                    settings = json.load(f)
-                    if "external_urls" in settings:
-                        # 合併預設設定和用戶設定
-                        urls = default_urls.copy()
-                        urls.update(settings["external_urls"])
-                        return urls
+            saved_urls = get_app_settings().get_section("external_urls")
+            if saved_urls:
+                # 合併預設設定和用戶設定
+                urls = default_urls.copy()
+                urls.update(saved_urls)
+                return urls
             
             # 如果沒有設定檔或沒有外部URL設定，返回預設值
             return default_urls
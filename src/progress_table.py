@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多平台影片下載器 - 下載進度快照表
+
+下載線程只把最新進度寫入共用的快照表，
+由GUI線程的定時器定期取出有變動的項目並一次更新畫面，
+不論同時下載多少個影片、回報多頻繁，介面的更新成本都維持固定。
+"""
+
+import threading
+
+from PySide6.QtCore import QObject, Signal, QTimer
+
+
+class ProgressSnapshotTable(QObject):
+    """執行緒安全的下載進度快照表"""
+
+    # {檔名: (訊息, 進度百分比, 速度, ETA, 已下載位元組, 總位元組, 下載狀態)}，只包含上次更新後有變動的項目
+    updates_ready = Signal(dict)
+
+    DEFAULT_INTERVAL = 100  # 畫面更新間隔（毫秒），約 10 Hz
+
+    def __init__(self, interval=DEFAULT_INTERVAL, parent=None):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._snapshots = {}  # 檔名 -> 最新進度
+        self._dirty = set()  # 上次更新後有變動的檔名
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.flush)
+        self.timer.start(interval)
+
+    def update(self, filename, message, percent, speed, eta, bytes_done=None, bytes_total=None, state=None):
+        """寫入最新進度（可在下載線程中呼叫）；state 為下載線程目前的 DownloadState"""
+        snapshot = (message, percent, speed, eta, bytes_done, bytes_total, state)
+        with self._lock:
+            if self._snapshots.get(filename) == snapshot:
+                return
+            self._snapshots[filename] = snapshot
+            self._dirty.add(filename)
+
+    def discard(self, filename):
+        """移除項目，尚未送出的進度也一併丟棄"""
+        with self._lock:
+            self._snapshots.pop(filename, None)
+            self._dirty.discard(filename)
+
+    def snapshot(self, filename):
+        """取得項目的最新進度"""
+        with self._lock:
+            return self._snapshots.get(filename)
+
+    def flush(self):
+        """取出有變動的項目並發送一次更新信號（在GUI線程中執行）"""
+        with self._lock:
+            if not self._dirty:
+                return
+            updates = {filename: self._snapshots[filename] for filename in self._dirty}
+            self._dirty.clear()
+        self.updates_ready.emit(updates)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多平台影片下載器 - 重試策略
+
+依錯誤類型決定是否重試：影片不存在、私人影片等永久錯誤不重試，
+伺服器錯誤 (5xx)、逾時、連線中斷一定重試，重試之間以加上隨機抖動的指數退避等待。
+每個平台（或主機）各有一個斷路器：收到 429 (Too Many Requests) 或連續失敗時暫停分派該平台的任務，
+冷卻時間過後先放行一個任務試探，成功才恢復，避免持續請求被限速的平台讓後面的任務全部失敗。
+"""
+
+import random
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+try:
+    from src.utils import log
+    from src.platform_registry import lookup_platform, UNKNOWN_PLATFORM
+except ImportError:
+    from utils import log
+    from platform_registry import lookup_platform, UNKNOWN_PLATFORM
+
+# 錯誤類型
+ERROR_PERMANENT = "permanent"  # 重試也不會成功（私人影片、已移除、需要登入...）
+ERROR_RATE_LIMITED = "rate_limited"  # 平台限速 (429)
+ERROR_TRANSIENT = "transient"  # 暫時性錯誤（5xx、逾時、連線中斷）
+ERROR_UNKNOWN = "unknown"  # 其他錯誤（包括 403：通常是影片資訊已過期），可嘗試備用下載方法重新解析
+
+_PERMANENT_PATTERNS = re.compile(
+    r"private video|video is private|video unavailable|has been removed|been terminated|"
+    r"does not exist|not available in your country|geo.?restrict|copyright|"
+    r"members.only|join this channel|sign in to confirm your age|age.restricted|confirm your age|"
+    r"login required|requires? (?:a )?log ?in|unsupported url|HTTP Error 404|HTTP Error 410|"
+    r"無法辨識或不支援此平台|影片已被移除", re.IGNORECASE)
+_RATE_LIMIT_PATTERNS = re.compile(
+    r"HTTP Error 429|too many requests|rate.?limit|sign in to confirm you.re not a bot", re.IGNORECASE)
+_TRANSIENT_PATTERNS = re.compile(
+    r"HTTP Error 5\d\d|timed? ?out|timeout|connection (?:reset|refused|aborted)|"
+    r"remote end closed|incomplete ?read|temporary failure|network is unreachable|"
+    r"IncompleteRead|ConnectionError|SSL: |EOF occurred", re.IGNORECASE)
+
+
+def classify_error(message):
+    """依錯誤訊息判斷錯誤類型"""
+    message = message or ""
+    if _PERMANENT_PATTERNS.search(message):
+        return ERROR_PERMANENT
+    if _RATE_LIMIT_PATTERNS.search(message):
+        return ERROR_RATE_LIMITED
+    if _TRANSIENT_PATTERNS.search(message):
+        return ERROR_TRANSIENT
+    return ERROR_UNKNOWN
+
+
+def host_key(url):
+    """斷路器的分組：已知平台使用平台名稱（包含所有網域），其他網站使用主機名稱"""
+    name = lookup_platform(url)["name"]
+    if name != UNKNOWN_PLATFORM:
+        return name
+    try:
+        return urlsplit(url if "://" in url else "//" + url).hostname or url
+    except ValueError:
+        return url
+
+
+class RetryPolicy:
+    """重試次數與退避等待時間"""
+
+    MAX_DELAY = 300  # 單次等待上限（秒）
+
+    def __init__(self, max_retries=3, base_delay=5):
+        self.max_retries = max(0, int(max_retries))
+        self.base_delay = max(0.1, float(base_delay))
+
+    def should_retry(self, error_class, attempt):
+        """第 attempt 次失敗（從 1 開始）後是否重試"""
+        if error_class == ERROR_PERMANENT:
+            return False
+        return attempt <= self.max_retries
+
+    def delay(self, attempt):
+        """第 attempt 次重試前的等待秒數：指數成長，取一半固定加一半隨機，避免多個任務同時重試"""
+        ceiling = min(self.MAX_DELAY, self.base_delay * (2 ** max(0, attempt - 1)))
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+class _Breaker:
+    __slots__ = ("failures", "trips", "open_until", "probing")
+
+    def __init__(self):
+        self.failures = 0  # 連續失敗次數
+        self.trips = 0  # 連續跳脫次數，決定冷卻時間
+        self.open_until = 0.0  # 冷卻結束時間 (monotonic)
+        self.probing = False  # 冷卻結束後已放行一個試探任務
+
+
+class HostCircuitBreakers:
+    """每個平台/主機的斷路器（可在多個線程中同時使用）"""
+
+    FAILURE_THRESHOLD = 5  # 連續暫時性錯誤達此次數時跳脫
+    BASE_COOLDOWN = 60  # 第一次跳脫的冷卻時間（秒），之後每次加倍
+    MAX_COOLDOWN = 15 * 60
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._breakers = {}  # 分組 -> _Breaker
+
+    def wait_time(self, key):
+        """分組需要等待多久才能分派新任務（秒），0 表示可以開始"""
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None or breaker.open_until == 0:
+                return 0
+            remaining = breaker.open_until - time.monotonic()
+            if remaining > 0:
+                return remaining
+            if breaker.probing:
+                # 試探任務尚未結束，其他任務繼續等待
+                return self.BASE_COOLDOWN / 4
+            return 0
+
+    def job_started(self, key):
+        """分派任務時呼叫：冷卻結束後的第一個任務作為試探"""
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is not None and breaker.open_until:
+                breaker.probing = True
+
+    def job_released(self, key):
+        """任務結束但沒有平台狀態的結果（取消、略過、永久錯誤）：試探任務視為沒有發生，下一個任務重新試探"""
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is not None:
+                breaker.probing = False
+
+    def record_success(self, key):
+        with self._lock:
+            breaker = self._breakers.pop(key, None)
+        if breaker is not None and breaker.open_until:
+            log(f"斷路器恢復: {key}")
+
+    def record_failure(self, key, error_class):
+        """記錄失敗；限速或連續失敗時跳脫，返回冷卻秒數（沒有跳脫時為 0）"""
+        if error_class == ERROR_PERMANENT:
+            # 單一影片的問題，與平台狀態無關
+            self.job_released(key)
+            return 0
+        with self._lock:
+            breaker = self._breakers.setdefault(key, _Breaker())
+            breaker.failures += 1
+            half_open = breaker.probing
+            breaker.probing = False
+            if not (error_class == ERROR_RATE_LIMITED or half_open
+                    or breaker.failures >= self.FAILURE_THRESHOLD):
+                return 0
+            cooldown = min(self.MAX_COOLDOWN, self.BASE_COOLDOWN * (2 ** breaker.trips))
+            cooldown *= random.uniform(0.9, 1.1)
+            breaker.trips += 1
+            breaker.failures = 0
+            breaker.open_until = time.monotonic() + cooldown
+        log(f"斷路器跳脫: {key}，暫停分派 {int(cooldown)} 秒")
+        return cooldown
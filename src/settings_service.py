@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多平台影片下載器 - 設定服務
+
+設定檔只在第一次使用或檔案被外部修改（修改時間/大小改變）時才重新解析，
+其餘讀取直接從記憶體取得。寫入會合併在短時間內的多次修改，
+並以暫存檔加 os.replace 的方式原子寫入，程式崩潰也不會留下寫到一半的設定檔。
+"""
+
+import os
+import sys
+import copy
+import json
+import atexit
+import tempfile
+import threading
+
+try:
+    from src.utils import log
+except ImportError:
+    from utils import log
+
+
+class SettingsService:
+    """單一設定檔的快取與寫入服務（可在多個線程中使用）"""
+
+    SAVE_DELAY = 0.5  # 合併寫入的延遲時間（秒）
+
+    def __init__(self, settings_path):
+        self.settings_path = os.path.abspath(settings_path)
+        self._lock = threading.RLock()
+        self._data = {}
+        self._signature = None  # 上次載入時檔案的 (修改時間, 大小)
+        self._dirty = False
+        self._save_timer = None
+
+    # ---- 讀取 ----
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.settings_path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def _ensure_loaded(self):
+        """檔案有變動時重新載入（有尚未寫入的修改時以記憶體內容為準）"""
+        signature = self._file_signature()
+        if signature == self._signature or self._dirty:
+            return
+
+        data = {}
+        if signature is not None:
+            try:
+                with open(self.settings_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if not isinstance(data, dict):
+                    data = {}
+            except Exception as e:
+                log(f"讀取設定檔失敗: {str(e)}")
+                data = {}
+        self._data = data
+        self._signature = signature
+
+    def exists(self):
+        """設定檔是否存在（或有尚未寫入的設定）"""
+        with self._lock:
+            return self._dirty or self._file_signature() is not None
+
+    def get(self, key, default=None):
+        """取得設定值（dict/list 會返回複本，修改後需呼叫 set 才會保存）"""
+        with self._lock:
+            self._ensure_loaded()
+            value = self._data.get(key, default)
+            if isinstance(value, (dict, list)):
+                return copy.deepcopy(value)
+            return value
+
+    def get_bool(self, key, default=False):
+        value = self.get(key, default)
+        if isinstance(value, str):
+            return value.strip().lower() in ("1", "true", "yes", "on")
+        return bool(value)
+
+    def get_int(self, key, default=0):
+        try:
+            return int(self.get(key, default))
+        except (TypeError, ValueError):
+            return default
+
+    def get_float(self, key, default=0.0):
+        try:
+            return float(self.get(key, default))
+        except (TypeError, ValueError):
+            return default
+
+    def get_str(self, key, default=""):
+        value = self.get(key, default)
+        return default if value is None else str(value)
+
+    def get_section(self, name):
+        """取得某個區段（dict）的複本，不存在時返回空 dict"""
+        section = self.get(name, {})
+        return section if isinstance(section, dict) else {}
+
+    def as_dict(self):
+        """取得全部設定的複本"""
+        with self._lock:
+            self._ensure_loaded()
+            return copy.deepcopy(self._data)
+
+    # ---- 寫入 ----
+
+    def set(self, key, value, immediate=False):
+        """設定單一值"""
+        self.update({key: value}, immediate=immediate)
+
+    def update(self, values, immediate=False):
+        """合併多個設定值"""
+        with self._lock:
+            self._ensure_loaded()
+            self._data.update(copy.deepcopy(values))
+            self._mark_dirty(immediate)
+
+    def update_section(self, name, values, immediate=False):
+        """合併某個區段（dict）內的設定值"""
+        with self._lock:
+            self._ensure_loaded()
+            section = self._data.get(name)
+            if not isinstance(section, dict):
+                section = {}
+                self._data[name] = section
+            section.update(copy.deepcopy(values))
+            self._mark_dirty(immediate)
+
+    def _mark_dirty(self, immediate):
+        self._dirty = True
+        if immediate:
+            self.flush()
+            return
+        # 延遲寫入，期間的其他修改一起寫入
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.SAVE_DELAY, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        """立即寫入尚未保存的修改"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._dirty:
+                return True
+
+            settings_dir = os.path.dirname(self.settings_path)
+            temp_path = None
+            try:
+                if settings_dir and not os.path.exists(settings_dir):
+                    os.makedirs(settings_dir)
+                fd, temp_path = tempfile.mkstemp(prefix=".setup_", suffix=".tmp", dir=settings_dir or None)
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(self._data, f, ensure_ascii=False, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                # mkstemp 建立的檔案只有擁有者可讀寫，沿用原設定檔的權限
+                try:
+                    mode = os.stat(self.settings_path).st_mode & 0o777
+                except OSError:
+                    mode = 0o644
+                os.chmod(temp_path, mode)
+                os.replace(temp_path, self.settings_path)
+                self._signature = self._file_signature()
+                self._dirty = False
+                return True
+            except Exception as e:
+                log(f"寫入設定檔失敗: {str(e)}")
+                if temp_path and os.path.exists(temp_path):
+                    try:
+                        os.remove(temp_path)
+                    except OSError:
+                        pass
+                return False
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def default_settings_path():
+    """應用程式設定檔 setup.json 的路徑"""
+    if hasattr(sys, '_MEIPASS'):
+        base_dir = sys._MEIPASS
+    else:
+        base_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
+    return os.path.join(base_dir, 'setup.json')
+
+
+def get_settings_service(settings_path):
+    """取得設定檔對應的共用設定服務（同一個檔案只會有一個實例）"""
+    key = os.path.normcase(os.path.abspath(settings_path))
+    with _services_lock:
+        service = _services.get(key)
+        if service is None:
+            service = SettingsService(settings_path)
+            _services[key] = service
+        return service
+
+
+def get_app_settings():
+    """取得應用程式設定檔 setup.json 的設定服務"""
+    return get_settings_service(default_settings_path())
+
+
+def flush_all_settings():
+    """寫入所有設定服務尚未保存的修改"""
+    with _services_lock:
+        services = list(_services.values())
+    for service in services:
+        service.flush()
+
+
+atexit.register(flush_all_settings)
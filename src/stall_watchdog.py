@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多平台影片下載器 - 下載停滯監控
+
+所有下載任務共用一個監控線程，以 monotonic 時鐘記錄每個任務的已下載位元組數：
+- 長時間沒有任何新資料：判定為停滯
+- 速度持續低於任務自身移動平均的一定比例：判定為速度驟降（CDN 連線卡在極低速度）
+判定後通知下載線程中斷目前的連線，由下載線程從 .part 檔的位置重新連線續傳，
+卡住的任務不會一直佔用下載名額。
+只在實際傳輸資料時監控，解析資訊、合併檔案、暫停期間不會被誤判。
+"""
+
+import time
+import threading
+
+try:
+    from src.utils import log
+except ImportError:
+    from utils import log
+
+
+class StallDetected(Exception):
+    """監控判定連線停滯，中斷目前的下載以便重新連線"""
+
+
+class _JobState:
+    __slots__ = ("on_stall", "rate_cap", "active", "bytes", "last_advance",
+                 "sample_time", "sample_bytes", "active_since", "average", "slow_since")
+
+    def __init__(self, on_stall, rate_cap):
+        self.on_stall = on_stall
+        self.rate_cap = rate_cap
+        self.active = False
+        self.average = None  # 速度的指數移動平均 (bytes/s)
+        self.reset(0, time.monotonic())
+
+    def reset(self, nbytes, now):
+        self.bytes = nbytes
+        self.last_advance = now
+        self.sample_time = now
+        self.sample_bytes = nbytes
+        self.active_since = now
+        self.slow_since = None
+
+
+class StallWatchdog:
+    """下載停滯監控服務（可在多個下載線程中同時使用）"""
+
+    CHECK_INTERVAL = 2.0  # 檢查間隔（秒）
+    STALL_SECONDS = 45  # 超過此時間沒有新資料即判定停滯（須長於 socket_timeout，讓 yt-dlp 先自行重試）
+    COLLAPSE_RATIO = 0.1  # 速度低於移動平均的此比例視為驟降
+    COLLAPSE_SECONDS = 20  # 速度驟降持續此時間才判定
+    WARMUP_SECONDS = 10  # 開始傳輸後先建立移動平均，這段時間不判定驟降
+    MIN_AVERAGE = 32 * 1024  # 移動平均低於此速度 (bytes/s) 時不判定驟降（來源本來就慢）
+    EMA_ALPHA = 0.2  # 移動平均的權重
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs = {}  # 任務名稱 -> _JobState
+        self._stop = threading.Event()
+        self._thread = None
+
+    def watch(self, job, on_stall, rate_cap=None):
+        """開始監控任務；判定停滯時在監控線程中呼叫 on_stall(原因)
+
+        rate_cap: 返回任務目前速度上限 (bytes/s) 的函式，頻寬限制造成的降速不視為驟降
+        """
+        with self._lock:
+            self._jobs[job] = _JobState(on_stall, rate_cap)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stall-watchdog", daemon=True)
+                self._thread.start()
+
+    def unwatch(self, job):
+        """停止監控任務（下載結束）"""
+        with self._lock:
+            self._jobs.pop(job, None)
+
+    def progress(self, job, downloaded_bytes):
+        """回報目前已下載的位元組數（在下載線程的進度回調中呼叫）"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._jobs.get(job)
+            if state is None:
+                return
+            if not state.active:
+                # 開始或恢復傳輸，重新計時
+                state.active = True
+                state.reset(downloaded_bytes, now)
+                return
+            if downloaded_bytes != state.bytes:
+                if downloaded_bytes < state.bytes:
+                    # 開始下載新的檔案（例如影片下載完換音訊）
+                    state.sample_bytes = 0
+                state.bytes = downloaded_bytes
+                state.last_advance = now
+
+    def idle(self, job):
+        """任務暫時沒有傳輸資料（暫停、合併檔案等），下次回報進度前不監控"""
+        with self._lock:
+            state = self._jobs.get(job)
+            if state is not None:
+                state.active = False
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.CHECK_INTERVAL):
+            now = time.monotonic()
+            stalled = []
+            with self._lock:
+                for job, state in self._jobs.items():
+                    if not state.active:
+                        continue
+                    reason = self._check(state, now)
+                    if reason:
+                        state.active = False
+                        stalled.append((job, state.on_stall, reason))
+            for job, on_stall, reason in stalled:
+                log(f"下載監控: {job} {reason}")
+                try:
+                    on_stall(reason)
+                except Exception as e:
+                    log(f"下載監控通知失敗: {str(e)}")
+
+    def _check(self, state, now):
+        """返回停滯原因，正常時返回 None"""
+        if now - state.last_advance >= self.STALL_SECONDS:
+            return f"超過 {int(now - state.last_advance)} 秒沒有收到資料"
+
+        elapsed = now - state.sample_time
+        rate = max(0, state.bytes - state.sample_bytes) / elapsed if elapsed > 0 else 0
+        state.sample_time = now
+        state.sample_bytes = state.bytes
+
+        if now - state.active_since < self.WARMUP_SECONDS or state.average is None:
+            if rate > 0:
+                state.average = rate if state.average is None else \
+                    self.EMA_ALPHA * rate + (1 - self.EMA_ALPHA) * state.average
+            return None
+
+        baseline = state.average
+        cap = state.rate_cap() if state.rate_cap is not None else None
+        if cap:
+            baseline = min(baseline, cap)
+        if baseline >= self.MIN_AVERAGE and rate < baseline * self.COLLAPSE_RATIO:
+            if state.slow_since is None:
+                state.slow_since = now
+            elif now - state.slow_since >= self.COLLAPSE_SECONDS:
+                return (f"速度降至 {rate / 1024:.1f} KB/s，"
+                        f"低於平均 {baseline / 1024:.1f} KB/s 的 {int(self.COLLAPSE_RATIO * 100)}%")
+            return None
+
+        # 速度正常時才更新移動平均，避免驟降本身拉低平均
+        state.slow_since = None
+        state.average = self.EMA_ALPHA * rate + (1 - self.EMA_ALPHA) * state.average
+        return None
@@ -10,7 +10,7 @@ import sys
 import time
 import webbrowser
 import re
-import json
+import copy
 import subprocess
 import platform
 import traceback
@@ -51,13 +51,107 @@ from PySide6.QtWidgets import (
     QButtonGroup, QGridLayout, QFormLayout, QStyledItemDelegate
 )
 
+# 導入下載佇列排程模組 - 使用適應打包環境的導入方式
+try:
+    from src.download_queue import (DownloadQueue, PRIORITY_URGENT, PRIORITY_NORMAL,
+                                    PRIORITY_BACKGROUND, PRIORITY_LABELS, PRIORITY_WEIGHTS)
+except ImportError:
+    from download_queue import (DownloadQueue, PRIORITY_URGENT, PRIORITY_NORMAL,
+                                PRIORITY_BACKGROUND, PRIORITY_LABELS, PRIORITY_WEIGHTS)
+
+# 導入下載進度快照表模組
+try:
+    from src.progress_table import ProgressSnapshotTable
+    from src.progress_model import DownloadState
+except ImportError:
+    from progress_table import ProgressSnapshotTable
+    from progress_model import DownloadState
+
+# 導入下載任務日誌模組
+try:
+    from src.job_journal import JobJournal, STATE_QUEUED, STATE_RUNNING, STATE_DONE, STATE_FAILED, STATE_CANCELLED, STATE_SKIPPED
+except ImportError:
+    from job_journal import JobJournal, STATE_QUEUED, STATE_RUNNING, STATE_DONE, STATE_FAILED, STATE_CANCELLED, STATE_SKIPPED
+
+# 導入設定服務 - 使用適應打包環境的導入方式
+try:
+    from src.settings_service import get_app_settings, default_settings_path
+except ImportError:
+    from settings_service import get_app_settings, default_settings_path
+
+# 導入頻寬管理器 - 使用適應打包環境的導入方式
+try:
+    from src.bandwidth import BandwidthManager
+except ImportError:
+    from bandwidth import BandwidthManager
+
+# 導入影片與音訊並行下載 - 使用適應打包環境的導入方式
+try:
+    from src.parallel_streams import plan_parallel_streams, fetch_streams
+except ImportError:
+    from parallel_streams import plan_parallel_streams, fetch_streams
+
+# 導入下載引擎 - 使用適應打包環境的導入方式
+try:
+    from src.download_engine import DOWNLOAD_ENGINES, ENGINE_NATIVE, engine_options
+except ImportError:
+    from download_engine import DOWNLOAD_ENGINES, ENGINE_NATIVE, engine_options
+
+# 導入播放清單展開 - 使用適應打包環境的導入方式
+try:
+    from src.playlist_expander import PlaylistExpander, is_collection_url
+except ImportError:
+    from playlist_expander import PlaylistExpander, is_collection_url
+
+# 導入影片資訊預先解析 - 使用適應打包環境的導入方式
+try:
+    from src.metadata_prefetch import MetadataPrefetcher
+except ImportError:
+    from metadata_prefetch import MetadataPrefetcher
+
+# 導入影片資訊快取 - 使用適應打包環境的導入方式
+try:
+    from src.info_cache import InfoCache
+except ImportError:
+    from info_cache import InfoCache
+
+# 導入已下載影片索引 - 使用適應打包環境的導入方式
+try:
+    from src.download_index import DownloadIndex, format_signature
+    from src.video_key import warm_up as warm_up_video_keys
+except ImportError:
+    from download_index import DownloadIndex, format_signature
+    from video_key import warm_up as warm_up_video_keys
+
+# 導入下載存檔 - 使用適應打包環境的導入方式
+try:
+    from src.download_archive import DownloadArchive, archive_id
+except ImportError:
+    from download_archive import DownloadArchive, archive_id
+
+# 導入下載停滯監控 - 使用適應打包環境的導入方式
+try:
+    from src.stall_watchdog import StallWatchdog, StallDetected
+except ImportError:
+    from stall_watchdog import StallWatchdog, StallDetected
+
+# 導入重試策略 - 使用適應打包環境的導入方式
+try:
+    from src.retry_policy import (RetryPolicy, HostCircuitBreakers, classify_error, host_key,
+                                  ERROR_PERMANENT, ERROR_RATE_LIMITED, ERROR_TRANSIENT)
+except ImportError:
+    from retry_policy import (RetryPolicy, HostCircuitBreakers, classify_error, host_key,
+                              ERROR_PERMANENT, ERROR_RATE_LIMITED, ERROR_TRANSIENT)
+
+# 導入同時下載數自動調整模組
+try:
+    from src.adaptive_concurrency import AdaptiveConcurrency
+except ImportError:
+    from adaptive_concurrency import AdaptiveConcurrency
+
 def get_settings_path():
     """獲取設定檔路徑"""
-    if hasattr(sys, '_MEIPASS'):
-        base_dir = sys._MEIPASS
-    else:
-        base_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
-    return os.path.join(base_dir, 'setup.json')
+    return default_settings_path()
 
 def get_system_info():
     """獲取系統信息"""
@@ -166,16 +260,41 @@ def create_error_log(error_info, url, format_option, resolution, output_path):
         print(f"創建錯誤日誌失敗: {str(e)}")
         return None
 
-# 日誌函數
-def log(message):
-    """記錄日誌"""
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] {message}")
+# 日誌函數 - 使用 utils 的非同步日誌寫入器（背景線程批次寫入檔案）
+try:
+    from src.utils import log, LOG_DEBUG
+except ImportError:
+    from utils import log, LOG_DEBUG
+
+# 導入平台識別 - 使用適應打包環境的導入方式
+try:
+    from src.platform_registry import lookup_platform, UNKNOWN_PLATFORM, PLATFORMS
+except ImportError:
+    from platform_registry import lookup_platform, UNKNOWN_PLATFORM, PLATFORMS
+
+# 介面上顯示的平台名稱（抖音與 TikTok 共用下載流程）
+PLATFORM_DISPLAY_NAMES = {
+    "抖音": "TikTok",
+    UNKNOWN_PLATFORM: "未知平台",
+}
+
+# 各平台同時下載數上限的預設值（0 表示只受最大同時下載數限制）
+# Instagram、X 等平台同時連線超過 2 個就會開始限速
+DEFAULT_PLATFORM_LIMITS = {
+    "YouTube": 8,
+    "TikTok": 4,
+    "抖音": 4,
+    "Facebook": 2,
+    "Instagram": 2,
+    "Bilibili": 4,
+    "X": 2,
+    "Threads": 2,
+}
 
 # SSL修復函數
 def apply_ssl_fix():
     """應用SSL修復（V1.73特色功能）"""
-    log("自動套用SSL證書修復...")
+    log("自動套用SSL證書修復...", LOG_DEBUG)
     try:
         # 更安全的SSL設定
         import ssl
@@ -195,7 +314,7 @@ def apply_ssl_fix():
         except:
             pass  # 如果urllib3不可用，直接忽略
         
-        log("SSL證書驗證已停用，這可以解決某些SSL錯誤")
+        log("SSL證書驗證已停用，這可以解決某些SSL錯誤", LOG_DEBUG)
         return True
     except Exception as e:
         log(f"SSL修復遇到問題: {e}")
@@ -216,24 +335,11 @@ apply_ssl_fix()
 
 # 平台識別函數
 def identify_platform(url):
-    """識別影片平台"""
-    url_lower = url.lower()
-    if 'youtube.com' in url_lower or 'youtu.be' in url_lower:
-        return "YouTube"
-    elif 'tiktok.com' in url_lower or 'douyin.com' in url_lower:
-        return "TikTok"
-    elif 'facebook.com' in url_lower or 'fb.com' in url_lower or 'fb.watch' in url_lower:
-        return "Facebook"
-    elif 'instagram.com' in url_lower:
-        return "Instagram"
-    elif 'bilibili.com' in url_lower or 'b23.tv' in url_lower:
-        return "Bilibili"
-    elif 'twitter.com' in url_lower or 'x.com' in url_lower:
-        return "X"
-    elif 'threads.net' in url_lower:
-        return "Threads"
-    else:
+    """識別影片平台（返回平台名稱）"""
+    if not isinstance(url, str):
         return "未知平台"
+    name = lookup_platform(url)["name"]
+    return PLATFORM_DISPLAY_NAMES.get(name, name)
 
 # 支援平台列表
 def get_supported_platforms():
@@ -286,8 +392,11 @@ class DownloadThread(QThread):
     """下載線程類"""
     progress = Signal(str, int, str, str)  # 訊息, 進度百分比, 速度, ETA
     finished = Signal(bool, str, str)  # 成功/失敗, 訊息, 檔案路徑
+    skipped = Signal(str)  # 已在下載存檔中，沒有下載（訊息）
     platform_detected = Signal(str, str)  # 平台名稱, URL
     
+    MAX_STALL_RESTARTS = 3  # 停滯時從 .part 檔重新連線的次數上限，超過後改用備用方法
+    
     def __init__(self, url, output_path, format_option, resolution, prefix, auto_merge):
         super().__init__()
         self.url = url
@@ -301,16 +410,196 @@ class DownloadThread(QThread):
         self.pause_condition = QWaitCondition()
         self.pause_mutex = QMutex()
         self.retry_count = 0
-        self.max_retries = 3
         self.last_error = None
         self.last_error_traceback = None
         self.last_progress_time = time.time()  # 記錄最後一次進度更新的時間
-        self.progress_timeout = 30  # 進度超時時間（秒）
-        self.download_speed_history = []  # 記錄下載速度歷史
-        self.stall_check_timer = QTimer()  # 添加定時器檢查下載是否卡住
-        self.stall_check_timer.timeout.connect(self.check_download_stall)
-        self.stall_check_timer.start(5000)  # 每5秒檢查一次
+        self.stall_watchdog = None  # 共用的下載停滯監控，由下載任務頁在啟動前設定
+        self.concurrency_controller = None  # 自動調整同時下載數時回報速度，由下載任務頁設定
+        self.retry_policy = RetryPolicy()  # 重試等待時間，由下載任務頁依設定替換
+        self.priority = PRIORITY_NORMAL  # 優先順序，決定分得的頻寬與連線數比例
+        self._stall_reason = None  # 監控判定停滯的原因，下一次進度回調時中斷連線
         self.platform_info = None  # 存儲平台信息
+        self.downloaded_bytes = 0  # 已下載位元組數（供任務日誌與總進度計算）
+        self.total_bytes = 0  # 檔案總位元組數，未知時為0
+        self.current_file = None  # 目前正在寫入的檔案路徑
+        self.info_dict = None  # 已解析的影片資訊，所有下載方法共用，只向平台請求一次
+        self.info_future = None  # 預先解析中的影片資訊（由下載任務頁在啟動前設定）
+        self.info_cache = None  # 共用的影片資訊快取，由下載任務頁在啟動前設定
+        self.download_archive = None  # 共用的下載存檔（yt-dlp download_archive），由下載任務頁在啟動前設定
+        self.final_filepath = None  # yt-dlp 回報的最終檔案路徑
+        self.progress_table = None  # 共用的進度快照表，由下載任務頁在啟動前設定
+        self.job_name = None  # 在進度快照表中的項目名稱
+        self.bandwidth = None  # 共用的頻寬管理器，由下載任務頁在啟動前設定
+        self._throttled_bytes = 0  # 已向頻寬管理器登記的位元組數
+        self.parallel_streams = False  # 是否同時下載影片與音訊串流後再合併
+        self.download_engine = ENGINE_NATIVE  # 下載引擎（native 或 aria2c）
+        self._stream_progress = None  # 並行下載時各串流的 (已下載, 總大小, 速度)
+        self._stream_count = 0  # 並行下載的串流數量
+        self._streams_finished = set()  # 已下載完成的串流檔名
+        self._progress_lock = threading.Lock()  # 多個串流同時回報進度時使用
+        self.state = DownloadState.WAITING  # 目前的下載狀態，隨進度一起回報，介面不必從訊息文字判斷
+    
+    def report_progress(self, message, percent, speed, eta, state=None):
+        """回報進度：有快照表時寫入快照表由GUI定時更新，否則直接發送信號
+
+        state: 狀態改變時傳入新的 DownloadState；None 表示只是訊息，狀態不變
+        """
+        if state is not None:
+            self.state = state
+        if self.progress_table is not None and self.job_name:
+            self.progress_table.update(self.job_name, message, percent, speed, eta,
+                                       self.downloaded_bytes, self.total_bytes, self.state)
+        else:
+            self.progress.emit(message, percent, speed, eta)
+    
+    def extract_video_info(self, ydl):
+        """取得影片資訊（整個下載流程只解析一次，備用方法直接沿用）"""
+        if self.info_dict is None and self.info_future is not None:
+            # 使用預先解析的結果，尚未完成時等待，不重複向平台請求
+            future, self.info_future = self.info_future, None
+            try:
+                self.info_dict = future.result()
+            except Exception as e:
+                log(f"預先解析影片資訊失敗，重新解析: {str(e)}")
+        if self.info_dict is None and self.info_cache is not None:
+            # 重試或稍早解析過的影片直接使用快取
+            self.info_dict = self.info_cache.get(self.url)
+        if self.info_dict is None:
+            self.info_dict = ydl.extract_info(self.url, download=False, process=False)
+            if self.info_cache is not None:
+                self.info_cache.put(self.url, self.info_dict)
+        return self.info_dict
+    
+    def download_from_info(self, ydl):
+        """以已取得的影片資訊直接下載，格式依照此 ydl 的選項重新選擇
+        
+        監控判定連線停滯時中斷下載，以同一個 ydl 重新下載，yt-dlp 會從 .part 檔的位置續傳
+        """
+        restarts = 0
+        while True:
+            self.final_filepath = None
+            self._stall_reason = None
+            try:
+                if self.parallel_streams:
+                    self.prefetch_streams(ydl)
+                result = ydl.process_ie_result(copy.deepcopy(self.info_dict), download=True)
+                return result or self.info_dict
+            except Exception:
+                reason = self._stall_reason
+                if reason is None or self.is_cancelled or restarts >= self.MAX_STALL_RESTARTS:
+                    raise
+                restarts += 1
+                log(f"下載停滯（{reason}），從已下載的部分重新連線 (第 {restarts} 次): {self.url}")
+                self.report_progress(f"下載停滯，重新連線續傳 (第 {restarts} 次)...", -1, "--", "--")
+    
+    def wait_before_retry(self, attempt):
+        """第 attempt 次重試前依退避時間等待（取消時立即返回）"""
+        delay = self.retry_policy.delay(attempt)
+        self.report_progress(f"{int(delay)} 秒後重試...", -1, "--", "--")
+        deadline = time.monotonic() + delay
+        while not self.is_cancelled and time.monotonic() < deadline:
+            time.sleep(0.1)
+    
+    def on_stall(self, reason):
+        """監控判定停滯（在監控線程中呼叫），下一次進度回調時中斷目前的連線"""
+        self._stall_reason = reason
+    
+    def current_rate_limit(self):
+        """此任務目前的速度上限 (bytes/s)，沒有限制時返回 None"""
+        if self.bandwidth is None:
+            return None
+        return self.bandwidth.job_rate(self.bandwidth_key())
+    
+    def prefetch_streams(self, ydl):
+        """需要合併的格式先同時下載影片與音訊，之後 yt-dlp 會跳過已下載的串流直接合併"""
+        try:
+            plan = plan_parallel_streams(ydl, self.info_dict)
+        except Exception as e:
+            log(f"無法規劃並行下載，改為依序下載: {str(e)}")
+            return
+        if not plan:
+            return
+        
+        self.report_progress(f"同時下載 {len(plan)} 個串流...", 0, "--", "--")
+        with self._progress_lock:
+            self._stream_progress = {}
+            self._stream_count = len(plan)
+            self._streams_finished = set()
+        try:
+            errors = fetch_streams(ydl, plan)
+        finally:
+            self._stream_progress = None
+        
+        if self.is_cancelled:
+            raise Exception("下載已取消")
+        if errors:
+            # 依序下載時會從 .part 檔接續
+            log(f"並行下載失敗，改為依序下載: {str(errors[0])}")
+    
+    def combine_stream_progress(self, filename, downloaded_bytes, total_bytes, speed):
+        """記錄單一串流的進度，返回所有串流合計的 (已下載, 總大小, 速度)"""
+        with self._progress_lock:
+            streams = self._stream_progress
+            if streams is None:
+                return downloaded_bytes, total_bytes, speed
+            streams[filename] = (downloaded_bytes, total_bytes, speed or 0)
+            return (sum(stream[0] for stream in streams.values()),
+                    sum(stream[1] for stream in streams.values()),
+                    sum(stream[2] for stream in streams.values()))
+
+    def finish_stream(self, filename, downloaded_bytes, total_bytes):
+        """記錄單一串流下載完成，返回是否所有串流都已完成（不是並行下載時一律返回 True）"""
+        with self._progress_lock:
+            streams = self._stream_progress
+            if streams is None:
+                return True
+            downloaded_bytes = downloaded_bytes or total_bytes or 0
+            streams[filename] = (downloaded_bytes, total_bytes or downloaded_bytes, 0)
+            self._streams_finished.add(filename)
+            return len(self._streams_finished) >= self._stream_count
+
+    def post_hook(self, filepath):
+        """yt-dlp 完成所有後處理後的回調，記錄最終的檔案路徑"""
+        self.final_filepath = filepath
+    
+    def resolve_output_path(self, info):
+        """取得 yt-dlp 實際寫入的檔案路徑，不需要掃描下載資料夾"""
+        candidates = [self.final_filepath]
+        if info:
+            for download in reversed(info.get('requested_downloads') or []):
+                candidates.append(download.get('filepath'))
+            candidates.append(info.get('filepath'))
+            candidates.append(info.get('_filename'))
+        for path in candidates:
+            if path and os.path.exists(path):
+                return path
+        return None
+    
+    def bandwidth_key(self):
+        """在頻寬管理器中代表此任務的名稱"""
+        return self.job_name or f"thread-{id(self)}"
+    
+    def bind_bandwidth(self, ydl):
+        """讓頻寬管理器可以隨時調整此 yt-dlp 實例的速度上限"""
+        if self.bandwidth is not None:
+            self.bandwidth.bind(self.bandwidth_key(), ydl.params)
+    
+    def throttle(self, downloaded_bytes):
+        """向共用令牌桶登記新下載的位元組，超過總速度限制時在此等待"""
+        if self.bandwidth is None:
+            return
+        with self._progress_lock:
+            delta = downloaded_bytes - self._throttled_bytes
+            if delta < 0:
+                # 開始下載新的檔案（例如影片下載完換音訊）
+                delta = downloaded_bytes
+            self._throttled_bytes = downloaded_bytes
+        
+        delay = self.bandwidth.reserve(delta, self.bandwidth_key())
+        deadline = time.monotonic() + delay
+        while delay > 0 and not self.is_cancelled:
+            time.sleep(min(delay, 0.1))
+            delay = deadline - time.monotonic()
     
     def run(self):
         """執行下載任務"""
@@ -319,7 +608,14 @@ class DownloadThread(QThread):
             self.start_time = time.time()
             self.last_progress_time = time.time()
             self.last_progress = 0
-            self.progress.emit(f"正在獲取影片資訊...", 0, "--", "--")
+            self.report_progress(f"正在獲取影片資訊...", 0, "--", "--")
+            
+            # 登記到頻寬管理器，與其他進行中的任務平分總頻寬
+            if self.bandwidth is not None:
+                self.bandwidth.job_started(self.bandwidth_key(), PRIORITY_WEIGHTS.get(self.priority, 1))
+            # 登記到停滯監控，連線卡住時自動重新連線
+            if self.stall_watchdog is not None:
+                self.stall_watchdog.watch(self.bandwidth_key(), self.on_stall, self.current_rate_limit)
             
             # 嘗試套用SSL修復
             apply_ssl_fix()
@@ -337,6 +633,12 @@ class DownloadThread(QThread):
             # 在日誌中顯示平台信息
             log(f"識別到平台: {platform_name}, URL: {self.url}")
             
+            # 下載存檔中已有的影片不需要解析資訊
+            if self.download_archive is not None and self.download_archive.contains_url(self.url):
+                log(f"下載存檔中已有此影片，略過: {self.url}")
+                self.skipped.emit("下載存檔中已有此影片，略過下載")
+                return
+            
             # 在日誌中明確顯示使用的前綴
             log(f"應用檔案名稱前綴: {self.prefix}")
             
@@ -345,16 +647,23 @@ class DownloadThread(QThread):
             
             # 執行下載
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                self.bind_bandwidth(ydl)
                 # 獲取影片信息
-                self.progress.emit("正在獲取影片資訊...", 0, "--", "--")
-                info = ydl.extract_info(self.url, download=False)
+                self.report_progress("正在獲取影片資訊...", 0, "--", "--")
+                info = self.extract_video_info(ydl)
                 
                 if info is None:
                     raise Exception("無法獲取影片資訊，可能是無效連結或該影片已被移除")
                 
+                # 網址無法離線辨識時，解析後才能比對下載存檔（yt-dlp 會直接略過，不會產生檔案）
+                if self.download_archive is not None and ydl.in_download_archive(info):
+                    log(f"下載存檔中已有此影片，略過: {self.url}")
+                    self.skipped.emit("下載存檔中已有此影片，略過下載")
+                    return
+                
                 # 獲取影片標題
                 title = info.get('title', 'Unknown Video')
-                self.progress.emit(f"開始下載: {title}", 0, "--", "--")
+                self.report_progress(f"開始下載: {title}", 0, "--", "--")
                 
                 # 檢查是否需要暫停
                 self.check_pause()
@@ -364,51 +673,41 @@ class DownloadThread(QThread):
                     self.finished.emit(False, "下載已取消", "")
                     return
                 
-                # 開始下載
-                ydl.download([self.url])
+                # 開始下載（直接使用已取得的影片資訊，不再重新解析）
+                info = self.download_from_info(ydl)
                 
-                # 構建下載的檔案路徑
-                file_ext = info.get('ext', 'mp4')
-                if "僅音訊 (MP3)" in self.format_option:
-                    file_ext = 'mp3'
-                elif "僅音訊 (WAV)" in self.format_option:
-                    file_ext = 'wav'
-                    
-                safe_title = self.sanitize_filename(title)
-                file_path = os.path.join(self.output_path, f'{self.prefix}{safe_title}.{file_ext}')
-                
-                # 檢查檔案是否存在
-                if not os.path.exists(file_path):
-                    # 嘗試查找可能的檔案名
-                    files = os.listdir(self.output_path)
-                    for file in files:
-                        if file.startswith(f"{self.prefix}{safe_title}"):
-                            file_path = os.path.join(self.output_path, file)
-                            break
+                # 使用 yt-dlp 回報的實際檔案路徑
+                file_path = self.resolve_output_path(info) or ""
                 
                 self.finished.emit(True, f"下載完成: {title}", file_path)
         except Exception as e:
             error_message = str(e)
             log(f"下載失敗: {error_message}")
             
+            # 影片連結已過期或被拒絕時，備用方法需要重新解析影片資訊
+            if "403" in error_message or "forbidden" in error_message.lower():
+                self.info_dict = None
+                if self.info_cache is not None:
+                    self.info_cache.invalidate(self.url)
+            
             # 檢查是否是年齡限制錯誤
-            is_age_restricted = False
             if ("age-restricted" in error_message.lower() or 
                 "sign in to confirm your age" in error_message.lower() or 
                 "confirm your age" in error_message.lower()):
-                is_age_restricted = True
-                self.progress.emit("檢測到年齡限制，需要使用 cookies 進行驗證", 0, "--", "--")
+                self.report_progress("檢測到年齡限制，需要使用 cookies 進行驗證", 0, "--", "--")
                 log("檢測到年齡限制影片，需要使用 cookies 進行驗證")
-                
-                # 直接返回年齡限制錯誤，不嘗試備用方法
-                if is_age_restricted:
-                    self.finished.emit(False, error_message, "")
-                    return
             
-            # 嘗試備用下載方法
+            # 永久錯誤（私人影片、已移除...）重試也不會成功；平台限速時不再請求，由下載任務頁等待後重新排程
+            error_class = classify_error(error_message)
+            if error_class in (ERROR_PERMANENT, ERROR_RATE_LIMITED) or self.is_cancelled:
+                self.finished.emit(False, error_message, "")
+                return
+            
+            # 嘗試備用下載方法（每次嘗試前依退避時間等待）
             if self.retry_count < 2:
                 self.retry_count += 1
-                self.progress.emit(f"第 {self.retry_count} 次重試，使用備用方法...", 0, "--", "--")
+                self.wait_before_retry(self.retry_count)
+                self.report_progress(f"第 {self.retry_count} 次重試，使用備用方法...", 0, "--", "--")
                 try:
                     success = self.fallback_download_method()
                     if success:
@@ -417,8 +716,9 @@ class DownloadThread(QThread):
                     error_message += f"\n\n備用方法也失敗: {str(fallback_error)}"
             
             # 如果重試次數達到上限，嘗試分段下載
-            if self.retry_count >= 2:
-                self.progress.emit("嘗試分段下載方法...", 0, "--", "--")
+            if self.retry_count >= 2 and classify_error(error_message) != ERROR_RATE_LIMITED:
+                self.wait_before_retry(self.retry_count + 1)
+                self.report_progress("嘗試分段下載方法...", 0, "--", "--")
                 try:
                     success = self.try_segment_download()
                     if success:
@@ -431,6 +731,12 @@ class DownloadThread(QThread):
             # 確保清理資源
             self.is_cancelled = True
             self.is_paused = False
+            if self.bandwidth is not None:
+                self.bandwidth.job_finished(self.bandwidth_key())
+            if self.stall_watchdog is not None:
+                self.stall_watchdog.unwatch(self.bandwidth_key())
+            if self.concurrency_controller is not None:
+                self.concurrency_controller.job_finished(self.bandwidth_key())
     
     def get_ydl_options(self):
         """獲取下載選項，根據重試次數調整設定"""
@@ -443,6 +749,9 @@ class DownloadThread(QThread):
         ydl_opts = {
             'outtmpl': os.path.join(self.output_path, f'{prefix}%(title)s.%(ext)s'),
             'progress_hooks': [self.progress_hook],
+            'post_hooks': [self.post_hook],  # 取得後處理完成後的最終檔案路徑
+            'continuedl': True,  # 從上次中斷留下的 .part 檔繼續下載
+            'noplaylist': True,  # 播放清單在加入佇列前已展開為個別任務
             'nocheckcertificate': True,
             'ignoreerrors': False,
             'socket_timeout': 30 + (self.retry_count * 10),  # 逐漸增加超時時間
@@ -463,22 +772,28 @@ class DownloadThread(QThread):
         # 檢查是否需要使用 cookies 檔案
         # 先從用戶設定中讀取
         try:
-            settings_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "setup.json")
-            if os.path.exists(settings_path):
-                with open(settings_path, "r", encoding="utf-8") as f:
-                    settings = json.load(f)
-                    
-                    # 如果啟用了 cookies 檔案
-                    if settings.get("use_cookies", False) and settings.get("cookies_file", ""):
-                        cookies_file = settings["cookies_file"]
-                        if os.path.exists(cookies_file):
-                            ydl_opts['cookiefile'] = cookies_file
-                            log(f"使用 cookies 檔案: {cookies_file}")
-                        else:
-                            log(f"找不到 cookies 檔案: {cookies_file}")
+            settings = get_app_settings()
+            
+            # 如果啟用了 cookies 檔案
+            if settings.get_bool("use_cookies") and settings.get_str("cookies_file"):
+                cookies_file = settings.get_str("cookies_file")
+                if os.path.exists(cookies_file):
+                    ydl_opts['cookiefile'] = cookies_file
+                    log(f"使用 cookies 檔案: {cookies_file}")
+                else:
+                    log(f"找不到 cookies 檔案: {cookies_file}")
         except Exception as e:
             log(f"讀取 cookies 設定失敗: {str(e)}")
         
+        # 下載完成後記錄到下載存檔（與 yt-dlp --download-archive 相同格式）
+        if self.download_archive is not None:
+            ydl_opts['download_archive'] = self.download_archive
+        
+        # 下載引擎（找不到 aria2c 時維持 yt-dlp 內建下載器）
+        connections = self.bandwidth.connection_share(self.bandwidth_key()) if self.bandwidth is not None else 16
+        ydl_opts.update(engine_options(self.download_engine, connections, self.current_rate_limit,
+                                       lambda: self.is_paused and not self.is_cancelled))
+        
         # 根據平台特定的設定
         format_str = 'bestvideo+bestaudio/best'  # 預設格式
         
@@ -539,15 +854,16 @@ class DownloadThread(QThread):
     def fallback_download_method(self):
         """備用下載方法，用於處理困難的影片"""
         try:
-            self.progress.emit(f"正在使用備用下載方法...", 0, "--", "--")
+            self.report_progress(f"正在使用備用下載方法...", 0, "--", "--")
             
             # 使用完全不同的設定
             ydl_opts = {
                 'outtmpl': os.path.join(self.output_path, f'{self.prefix}%(title)s.%(ext)s'),
                 'progress_hooks': [self.progress_hook],
+                'post_hooks': [self.post_hook],  # 取得後處理完成後的最終檔案路徑
                 'format': 'best',  # 使用最佳品質，通常更穩定
                 'nocheckcertificate': True,
-                'ignoreerrors': True,
+                'ignoreerrors': False,  # 下載失敗時拋出例外，不可當成成功
                 'quiet': False,
                 'no_warnings': False,
                 'socket_timeout': 60,
@@ -577,30 +893,26 @@ class DownloadThread(QThread):
                 ydl_opts['format'] = 'worst'  # 使用最低解析度
                 
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                self.progress.emit("使用備用方法獲取影片資訊...", 0, "--", "--")
-                info = ydl.extract_info(self.url, download=False)
+                self.bind_bandwidth(ydl)
+                self.report_progress("使用備用方法獲取影片資訊...", 0, "--", "--")
+                info = self.extract_video_info(ydl)
                 
                 if info is None:
                     # 檢查是否為年齡限制錯誤
                     error_message = "無法獲取影片資訊，可能是無效連結或該影片已被移除"
-                    self.progress.emit(f"備用方法失敗: {error_message}", 0, "--", "--")
+                    self.report_progress(f"備用方法失敗: {error_message}", 0, "--", "--")
                     raise Exception(error_message)
                 
                 title = info.get('title', 'Unknown Video')
-                self.progress.emit(f"開始備用下載: {title}", 0, "--", "--")
+                self.report_progress(f"開始備用下載: {title}", 0, "--", "--")
                 
                 if not self.is_cancelled:
-                    ydl.download([self.url])
+                    info = self.download_from_info(ydl)
                     
-                    # 構建下載的檔案路徑
-                    file_ext = info.get('ext', 'mp4')
-                    if "僅音訊 (MP3)" in self.format_option:
-                        file_ext = 'mp3'
-                    elif "僅音訊 (WAV)" in self.format_option:
-                        file_ext = 'wav'
-                        
-                    safe_title = self.sanitize_filename(title)
-                    file_path = os.path.join(self.output_path, f'{self.prefix}{safe_title}.{file_ext}')
+                    # 使用 yt-dlp 回報的實際檔案路徑，找不到檔案表示這個方法沒有下載成功
+                    file_path = self.resolve_output_path(info)
+                    if not file_path:
+                        raise Exception(f"備用下載沒有產生檔案: {title}")
                     
                     self.finished.emit(True, f"備用下載完成: {title}", file_path)
                     return True
@@ -613,21 +925,22 @@ class DownloadThread(QThread):
             if "age" in error_message.lower() and ("restrict" in error_message.lower() or "confirm" in error_message.lower()):
                 error_message = "此影片有年齡限制，需要使用 cookies 進行驗證。請在設定中啟用 cookies 選項並選擇有效的 cookies.txt 檔案。"
             
-            self.progress.emit(f"備用下載方法失敗: {error_message}", 0, "--", "--")
+            self.report_progress(f"備用下載方法失敗: {error_message}", 0, "--", "--")
             raise Exception(error_message)
             
     def try_segment_download(self):
         """嘗試分段下載方法，用於處理卡住的下載"""
         try:
-            self.progress.emit(f"正在嘗試分段下載...", 0, "--", "--")
+            self.report_progress(f"正在嘗試分段下載...", 0, "--", "--")
             
             # 使用分段下載設定
             ydl_opts = {
                 'outtmpl': os.path.join(self.output_path, f'{self.prefix}%(title)s.%(ext)s'),
                 'progress_hooks': [self.progress_hook],
+                'post_hooks': [self.post_hook],  # 取得後處理完成後的最終檔案路徑
                 'format': 'best',
                 'nocheckcertificate': True,
-                'ignoreerrors': True,
+                'ignoreerrors': False,  # 下載失敗時拋出例外，不可當成成功
                 'quiet': False,
                 'no_warnings': False,
                 'socket_timeout': 30,
@@ -651,34 +964,30 @@ class DownloadThread(QThread):
             }
             
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                self.progress.emit("使用分段下載獲取影片資訊...", 0, "--", "--")
-                info = ydl.extract_info(self.url, download=False)
+                self.bind_bandwidth(ydl)
+                self.report_progress("使用分段下載獲取影片資訊...", 0, "--", "--")
+                info = self.extract_video_info(ydl)
                 
                 if info is None:
                     raise Exception("無法獲取影片資訊，可能是無效連結或該影片已被移除")
                 
                 title = info.get('title', 'Unknown Video')
-                self.progress.emit(f"開始分段下載: {title}", 0, "--", "--")
+                self.report_progress(f"開始分段下載: {title}", 0, "--", "--")
                 
                 if not self.is_cancelled:
-                    ydl.download([self.url])
+                    info = self.download_from_info(ydl)
                     
-                    # 構建下載的檔案路徑
-                    file_ext = info.get('ext', 'mp4')
-                    if "僅音訊 (MP3)" in self.format_option:
-                        file_ext = 'mp3'
-                    elif "僅音訊 (WAV)" in self.format_option:
-                        file_ext = 'wav'
-                        
-                    safe_title = self.sanitize_filename(title)
-                    file_path = os.path.join(self.output_path, f'{self.prefix}{safe_title}.{file_ext}')
+                    # 使用 yt-dlp 回報的實際檔案路徑，找不到檔案表示這個方法沒有下載成功
+                    file_path = self.resolve_output_path(info)
+                    if not file_path:
+                        raise Exception(f"分段下載沒有產生檔案: {title}")
                     
                     self.finished.emit(True, f"分段下載完成: {title}", file_path)
                     return True
                     
             return False
         except Exception as e:
-            self.progress.emit(f"分段下載失敗: {str(e)}", 0, "--", "--")
+            self.report_progress(f"分段下載失敗: {str(e)}", 0, "--", "--")
             return False
     
     def progress_hook(self, d):
@@ -691,13 +1000,34 @@ class DownloadThread(QThread):
         
         if self.is_cancelled:
             raise Exception("下載已取消")
+        
+        # 監控判定連線停滯：中斷目前的連線，由 download_from_info 重新連線續傳
+        if self._stall_reason is not None:
+            raise StallDetected(self._stall_reason)
             
         if d['status'] == 'downloading':
             # 下載中
             try:
                 # 計算下載進度
-                downloaded_bytes = d.get('downloaded_bytes', 0)
-                total_bytes = d.get('total_bytes', 0) or d.get('total_bytes_estimate', 0)
+                downloaded_bytes = d.get('downloaded_bytes', 0) or 0
+                total_bytes = d.get('total_bytes', 0) or d.get('total_bytes_estimate', 0) or 0
+                speed = d.get('speed', 0)
+                eta = d.get('eta', 0)
+                if self._stream_progress is not None:
+                    # 同時下載多個串流時顯示合計的進度與速度
+                    downloaded_bytes, total_bytes, speed = self.combine_stream_progress(
+                        d.get('filename'), downloaded_bytes, total_bytes, speed)
+                    eta = (total_bytes - downloaded_bytes) / speed if speed and total_bytes > downloaded_bytes else 0
+                self.downloaded_bytes = downloaded_bytes or 0
+                self.total_bytes = total_bytes or 0
+                self.current_file = d.get('filename', self.current_file)
+                if self.stall_watchdog is not None:
+                    self.stall_watchdog.progress(self.bandwidth_key(), self.downloaded_bytes)
+                if self.concurrency_controller is not None:
+                    self.concurrency_controller.report(self.bandwidth_key(), speed)
+                
+                # 超過總速度限制時在此等待（所有任務共用同一個令牌桶）
+                self.throttle(self.downloaded_bytes)
                 
                 if total_bytes > 0:
                     percent = int(downloaded_bytes / total_bytes * 100)
@@ -705,15 +1035,9 @@ class DownloadThread(QThread):
                     percent = 0
                     
                 # 下載速度
-                speed = d.get('speed', 0)
                 try:
                     if speed:
                         speed_str = self.format_size(speed) + "/s"
-                        # 記錄下載速度歷史
-                        self.download_speed_history.append(speed)
-                        # 只保留最近10個速度記錄
-                        if len(self.download_speed_history) > 10:
-                            self.download_speed_history.pop(0)
                     else:
                         speed_str = "-- KB/s"
                 except Exception as e:
@@ -721,26 +1045,29 @@ class DownloadThread(QThread):
                     speed_str = "-- KB/s"
                     
                 # 剩餘時間
-                eta = d.get('eta', 0)
                 if eta:
                     eta_str = self.format_time(eta)
                 else:
                     eta_str = "--:--"
                     
                 # 發送進度信號
-                self.progress.emit(f"下載中: {percent}%", percent, speed_str, eta_str)
+                self.report_progress(f"下載中: {percent}%", percent, speed_str, eta_str, DownloadState.DOWNLOADING)
             except Exception as e:
                 error_msg = f"處理進度時錯誤: {str(e)}"
                 log(error_msg)  # 記錄到日誌
-                self.progress.emit(error_msg, 0, "--", "--")
+                self.report_progress(error_msg, 0, "--", "--")
                 
         elif d['status'] == 'finished':
-            # 下載完成，可能需要後處理
-            self.progress.emit("下載完成，正在處理...", 100, "--", "--")
+            # 下載完成，可能需要後處理（並行下載時其他串流仍在傳輸，等所有串流完成才停止監控並顯示）
+            if self.finish_stream(d.get('filename'), d.get('downloaded_bytes'), d.get('total_bytes')):
+                if self.stall_watchdog is not None:
+                    self.stall_watchdog.idle(self.bandwidth_key())
+                if self._stream_progress is None:
+                    self.report_progress("下載完成，正在處理...", 100, "--", "--", DownloadState.PROCESSING)
             
         elif d['status'] == 'error':
             # 下載錯誤
-            self.progress.emit(f"下載錯誤: {d.get('error', '未知錯誤')}", 0, "--", "--")
+            self.report_progress(f"下載錯誤: {d.get('error', '未知錯誤')}", 0, "--", "--")
             
         elif d['status'] == 'fragment':
             # 片段下載中
@@ -750,17 +1077,18 @@ class DownloadThread(QThread):
                 
                 if fragment_count > 0:
                     percent = int(fragment_index / fragment_count * 100)
-                    self.progress.emit(f"下載片段: {fragment_index}/{fragment_count} ({percent}%)", percent, "--", "--")
+                    self.report_progress(f"下載片段: {fragment_index}/{fragment_count} ({percent}%)", percent, "--", "--",
+                                         DownloadState.DOWNLOADING)
             except Exception as e:
-                self.progress.emit(f"處理片段進度時出錯: {str(e)}", 0, "--", "--")
+                self.report_progress(f"處理片段進度時出錯: {str(e)}", 0, "--", "--")
                 
         elif d['status'] == 'merging formats':
             # 合併格式中
             try:
                 filename = d.get('filename', '').split('/')[-1]
-                self.progress.emit(f"正在合併檔案: {filename}", 90, "--", "--")
+                self.report_progress(f"正在合併檔案: {filename}", 90, "--", "--", DownloadState.PROCESSING)
             except Exception as e:
-                self.progress.emit(f"處理合併進度時出錯: {str(e)}", 90, "--", "--")
+                self.report_progress(f"處理合併進度時出錯: {str(e)}", 90, "--", "--")
         
     def format_size(self, bytes):
         """格式化檔案大小"""
@@ -810,103 +1138,50 @@ class DownloadThread(QThread):
     
     def cancel(self):
         """取消下載"""
+        self.pause_mutex.lock()
         self.is_cancelled = True
         # 如果線程處於暫停狀態，喚醒它以便結束
-        if self.is_paused:
-            self.resume()
+        self.pause_condition.wakeAll()
+        self.pause_mutex.unlock()
             
     def pause(self):
-        """暫停下載"""
+        """暫停下載：下一次進度回調時停在 check_pause，不再讀取網路資料，並讓出頻寬給其他任務"""
+        self.pause_mutex.lock()
         self.is_paused = True
+        self.pause_mutex.unlock()
+        if self.bandwidth is not None:
+            self.bandwidth.job_paused(self.bandwidth_key())
+        if self.stall_watchdog is not None:
+            self.stall_watchdog.idle(self.bandwidth_key())
         
     def resume(self):
         """繼續下載"""
+        if self.bandwidth is not None:
+            self.bandwidth.job_resumed(self.bandwidth_key())
+        self.pause_mutex.lock()
         self.is_paused = False
         self.pause_condition.wakeAll()
+        self.pause_mutex.unlock()
         
     def check_pause(self):
-        """檢查是否需要暫停，如果是則等待恢復信號"""
-        if self.is_paused and not self.is_cancelled:
-            self.progress.emit("下載已暫停", -1, "--", "--")
-            self.pause_mutex.lock()
-            self.pause_condition.wait(self.pause_mutex)
-            self.pause_mutex.unlock()
-            if not self.is_paused:  # 如果已恢復
-                self.progress.emit("下載已恢復", -1, "--", "--")
-
-    def check_download_stall(self):
-        """檢查下載是否卡住"""
-        if self.is_paused or self.is_cancelled:
-            return
-            
-        current_time = time.time()
-        # 如果超過設定的超時時間沒有進度更新
-        if current_time - self.last_progress_time > self.progress_timeout:
-            # 檢查下載速度是否長時間為0
-            if len(self.download_speed_history) > 3:
-                recent_speeds = self.download_speed_history[-3:]
-                if all(speed == 0 or speed is None for speed in recent_speeds):
-                    self.progress.emit("下載似乎卡住了，嘗試恢復...", -1, "--", "--")
-                    self.handle_stalled_download()
-    
-    def handle_stalled_download(self):
-        """處理卡住的下載"""
-        # 停止當前下載
-        self.is_cancelled = True
-        
-        # 等待一小段時間
-        time.sleep(2)
-        
-        # 重置取消狀態
-        self.is_cancelled = False
+        """檢查是否需要暫停，如果是則等待恢復信號
         
-        # 增加重試次數
-        self.retry_count += 1
-        
-        # 如果重試次數未超過最大值，重新開始下載
-        if self.retry_count <= self.max_retries:
-            self.progress.emit(f"自動重試下載 (第 {self.retry_count} 次)...", 0, "--", "--")
-            # 重置進度時間
-            self.last_progress_time = time.time()
-            # 清空速度歷史
-            self.download_speed_history = []
-            
-            # 根據重試次數選擇不同的下載方法
-            try:
-                success = False
-                
-                # 第一次重試：使用備用下載方法
-                if self.retry_count == 1:
-                    self.progress.emit("嘗試備用下載方法...", 0, "--", "--")
-                    success = self.fallback_download_method()
-                
-                # 第二次重試：嘗試分段下載
-                elif self.retry_count == 2:
-                    self.progress.emit("嘗試分段下載方法...", 0, "--", "--")
-                    success = self.try_segment_download()
-                
-                # 第三次重試：使用最低品質設定
-                elif self.retry_count == 3:
-                    self.progress.emit("嘗試使用最低品質下載...", 0, "--", "--")
-                    # 修改下載選項為最低品質
-                    self.format_option = "預設品質"
-                    self.resolution = "360P"
-                    success = self.fallback_download_method()
-                
-                # 如果所有方法都失敗
-                if not success:
-                    self.progress.emit("所有自動重試方法都失敗了", 0, "--", "--")
-                    self.finished.emit(False, "下載卡住，所有自動重試方法都失敗了", "")
-                    
-            except Exception as e:
-                self.last_error = str(e)
-                self.last_error_traceback = traceback.format_exc()
-                self.progress.emit(f"自動重試失敗: {str(e)}", 0, "--", "--")
-                self.finished.emit(False, f"自動重試失敗: {str(e)}", "")
-        else:
-            # 重試次數已用完
-            self.progress.emit("下載多次卡住，請手動重試", 0, "--", "--")
-            self.finished.emit(False, "下載卡住，請手動重試", "")
+        在 yt-dlp 的進度回調中等待，下載器不會再讀取連線，資料傳輸隨即停止；
+        暫停太久導致伺服器關閉連線時，yt-dlp 會以 HTTP Range 從 .part 檔接續下載。
+        並行下載的多個串流/片段會各自停在這裡，一次 wakeAll 全部繼續。
+        """
+        if not self.is_paused or self.is_cancelled:
+            return
+        self.report_progress("下載已暫停", -1, "--", "--", DownloadState.PAUSED)
+        self.pause_mutex.lock()
+        try:
+            # 在持有鎖時檢查狀態，避免 resume 在 wait 之前發生而永遠等待
+            while self.is_paused and not self.is_cancelled:
+                self.pause_condition.wait(self.pause_mutex)
+        finally:
+            self.pause_mutex.unlock()
+        if not self.is_cancelled:
+            self.report_progress("下載已恢復", -1, "--", "--", DownloadState.DOWNLOADING)
 
 class DownloadTab(QWidget):
     """下載頁籤"""
@@ -926,8 +1201,51 @@ class DownloadTab(QWidget):
         self.error_dialogs = {}  # 添加錯誤對話框字典，用於跟踪當前顯示的錯誤對話框
         self.format_dialogs = {}  # 添加格式選項對話框字典，用於跟踪當前顯示的格式選項對話框
         self.supported_platforms = get_supported_platforms()  # 獲取支援的平台列表
+        self._job_counter = 0  # 任務編號計數器，確保每個任務檔名唯一
+        self._retired_threads = []  # 已結束但可能仍在收尾的下載線程
+        self.playlist_expanders = []  # 正在背景展開的播放清單/頻道
+        # 影片資訊快取：重試與備用方法不需要重新向平台解析
+        self.info_cache = InfoCache(os.path.join(os.path.dirname(get_settings_path()), "info_cache.sqlite3"))
+        # 影片資訊預先解析池：佇列前面的網址先解析好，下載名額只負責傳輸
+        self.metadata_prefetcher = MetadataPrefetcher()
+        self.metadata_prefetcher.info_cache = self.info_cache
+        # 已下載影片索引：以影片ID判斷是否下載過，重新啟動後仍有效
+        self.download_index = DownloadIndex(os.path.join(os.path.dirname(get_settings_path()), "download_index.sqlite3"))
+        threading.Thread(target=warm_up_video_keys, daemon=True).start()
+        # 下載存檔：與 yt-dlp 相容的存檔檔案，載入到記憶體中快速查詢（依設定啟用）
+        self.download_archive = None
+        # 下載佇列：保存所有待下載的URL，依最大同時下載數自動分派
+        self.download_queue = DownloadQueue(self.start_download_for_item, self.max_concurrent_downloads, self)
+        self.download_queue.queue_changed.connect(self.on_queue_changed)
+        self.download_queue.job_failed.connect(self.on_queue_job_failed)
+        # 下載任務日誌：記錄每個任務的狀態，程式重新啟動後可恢復未完成的任務
+        self.job_journal = JobJournal(os.path.join(os.path.dirname(get_settings_path()), "download_journal.jsonl"))
+        # 下載進度快照表：下載線程寫入最新進度，由定時器合併後一次更新畫面
+        self.progress_table = ProgressSnapshotTable(parent=self)
+        self.progress_table.updates_ready.connect(self.record_journal_progress)
+        # 頻寬管理器：所有下載線程共用總速度限制，任務開始/結束時重新分配
+        self.bandwidth = BandwidthManager()
+        # 下載停滯監控：連線卡住或速度驟降時自動從 .part 檔重新連線
+        self.stall_watchdog = StallWatchdog()
+        # 重試策略與各平台的斷路器：失敗的任務依退避時間重新排程，被限速的平台暫停分派
+        self.retry_policy = RetryPolicy()
+        self.circuit_breakers = HostCircuitBreakers()
+        self._retry_attempts = {}  # 任務檔名 -> 已自動重試的次數
+        self._retry_timers = {}  # 任務檔名 -> 等待自動重試的定時器
+        self._archive_bypass = set()  # 使用者要求重新下載、不比對下載存檔的任務
+        self._batch_counter = 0  # 每次按下載加入的影片為一個批次
+        # 自動調整同時下載數：開啟時依總速度與限速錯誤定時調整佇列的名額
+        self.concurrency_controller = None
+        self.concurrency_timer = QTimer(self)
+        self.concurrency_timer.setInterval(AdaptiveConcurrency.EVALUATE_INTERVAL * 1000)
+        self.concurrency_timer.timeout.connect(self.adjust_concurrency)
+        # 依平台分組：各平台有自己的同時下載數上限，被限速的平台不會擋住其他平台的任務
+        self.download_queue.group_of = host_key
+        self.download_queue.set_group_limits(DEFAULT_PLATFORM_LIMITS)
+        self.download_queue.admission = self.admit_job
         self.init_ui()  # 先初始化UI
         self.load_settings()  # 再載入設定
+        self.download_queue.set_max_concurrent(self.max_concurrent_downloads)
         # 初始化完成
         self._is_initializing = False
     
@@ -944,62 +1262,97 @@ class DownloadTab(QWidget):
             self.prefix_combo.setCurrentText(prefix)
             log(f"下載檔名前綴已更新為: {prefix}")
     
+    def set_performance_settings(self, settings):
+        """套用效能設定（速度限制、緩衝區、記憶體上限、片段並行），進行中的下載會立即使用新的限制"""
+        self.bandwidth.configure(
+            settings.get("speed_limit_kbps"),
+            settings.get("buffer_size_mb"),
+            settings.get("memory_limit_mb"),
+            settings.get("fragment_concurrency"),
+            settings.get("max_connections")
+        )
+        if settings.get("metadata_workers"):
+            self.metadata_prefetcher.set_max_workers(settings["metadata_workers"])
+        self.set_download_archive(settings.get("use_download_archive", False),
+                                  settings.get("download_archive_file", ""))
+        if "platform_limits" in settings:
+            self.download_queue.set_group_limits(settings["platform_limits"])
+        if "retry_count" in settings or "retry_wait" in settings:
+            self.retry_policy = RetryPolicy(settings.get("retry_count", 3), settings.get("retry_wait", 5))
+    
+    def set_download_archive(self, enabled, path=""):
+        """啟用/停用下載存檔；更換檔案時在背景重新載入"""
+        if not enabled:
+            if self.download_archive is not None:
+                log("已停用下載存檔")
+            self.download_archive = None
+            return
+        path = os.path.abspath(path or os.path.join(os.path.dirname(get_settings_path()), "download_archive.txt"))
+        if self.download_archive is None or self.download_archive.path != path:
+            self.download_archive = DownloadArchive(path)
+            log(f"使用下載存檔: {path}")
+    
     def load_settings(self):
         """載入設定"""
         try:
-            # 使用程式根目錄而非src目錄
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            parent_dir = os.path.dirname(current_dir)
-            settings_path = os.path.join(parent_dir, "setup.json")
-            
-            if os.path.exists(settings_path):
-                with open(settings_path, "r", encoding="utf-8") as f:
-                    settings = json.load(f)
-                    
-                    # 載入最大同時下載數
-                    self.max_concurrent_downloads = settings.get("max_concurrent_downloads", 2)
+            settings_service = get_app_settings()
+            settings_path = settings_service.settings_path
+            
+            if settings_service.exists():
+                settings = settings_service.as_dict()
+                
+                # 載入最大同時下載數
+                self.max_concurrent_downloads = settings.get("max_concurrent_downloads", 2)
+                
+                # 載入效能設定（速度限制、緩衝區、記憶體上限）
+                self.set_performance_settings(settings)
+                
+                # 載入前綴歷史
+                saved_prefixes = settings.get("prefix_history", [])
+                if saved_prefixes:
+                    # 合併預設前綴和已保存的前綴，去重
+                    all_prefixes = self.prefix_history + saved_prefixes
+                    self.prefix_history = list(dict.fromkeys(all_prefixes))  # 去重保持順序
                     
-                    # 載入前綴歷史
-                    saved_prefixes = settings.get("prefix_history", [])
-                    if saved_prefixes:
-                        # 合併預設前綴和已保存的前綴，去重
-                        all_prefixes = self.prefix_history + saved_prefixes
-                        self.prefix_history = list(dict.fromkeys(all_prefixes))  # 去重保持順序
-                        
-                    # 載入下載路徑
-                    if "download_path" in settings and os.path.exists(settings["download_path"]):
-                        self.download_path = settings["download_path"]
-                        
-                    # 載入當前選擇的格式
-                    if "current_format" in settings:
-                        format_index = self.format_combo.findText(settings["current_format"])
-                        if format_index >= 0:
-                            self.format_combo.setCurrentIndex(format_index)
+                # 載入下載路徑
+                if "download_path" in settings and os.path.exists(settings["download_path"]):
+                    self.download_path = settings["download_path"]
                     
-                    # 載入當前選擇的解析度
-                    if "current_resolution" in settings:
-                        resolution_index = self.resolution_combo.findText(settings["current_resolution"])
-                        if resolution_index >= 0:
-                            self.resolution_combo.setCurrentIndex(resolution_index)
+                # 載入當前選擇的格式
+                if "current_format" in settings:
+                    format_index = self.format_combo.findText(settings["current_format"])
+                    if format_index >= 0:
+                        self.format_combo.setCurrentIndex(format_index)
+                
+                # 載入當前選擇的解析度
+                if "current_resolution" in settings:
+                    resolution_index = self.resolution_combo.findText(settings["current_resolution"])
+                    if resolution_index >= 0:
+                        self.resolution_combo.setCurrentIndex(resolution_index)
+                
+                # 載入當前前綴
+                if "current_prefix" in settings and settings["current_prefix"]:
+                    self.prefix_combo.setCurrentText(settings["current_prefix"])
+                
+                # 載入自動合併設定
+                if "auto_merge" in settings:
+                    self.auto_merge_cb.setChecked(settings["auto_merge"])
+                
+                # 載入自動調整同時下載數設定
+                if "auto_concurrency" in settings:
+                    self.auto_concurrency_cb.setChecked(settings["auto_concurrency"])
+                
+                if "remove_temp_files" in settings:
+                    self.remove_temp_files_cb.setChecked(settings["remove_temp_files"])
+
                     
-                    # 載入當前前綴
-                    if "current_prefix" in settings and settings["current_prefix"]:
-                        self.prefix_combo.setCurrentText(settings["current_prefix"])
+                # 載入下載頁籤特定設定
+                if "download_tab" in settings:
+                    download_tab_settings = settings["download_tab"]
                     
-                    # 載入自動合併設定
-                    if "auto_merge" in settings:
-                        self.auto_merge_cb.setChecked(settings["auto_merge"])
+                    # 這裡可以添加更多下載頁籤特定的設定
                     
-                    if "remove_temp_files" in settings:
-                        self.remove_temp_files_cb.setChecked(settings["remove_temp_files"])
-                        
-                    # 載入下載頁籤特定設定
-                    if "download_tab" in settings:
-                        download_tab_settings = settings["download_tab"]
-                        
-                        # 這裡可以添加更多下載頁籤特定的設定
-                        
-                    log(f"已從 {settings_path} 載入用戶設定")
+                log(f"已從 {settings_path} 載入用戶設定")
             else:
                 # 如果設定檔不存在，創建一個預設設定檔
                 self.save_settings()
@@ -1010,17 +1363,8 @@ class DownloadTab(QWidget):
     def save_settings(self):
         """保存設定"""
         try:
-            # 使用 get_settings_path() 確保路徑一致
-            settings_path = get_settings_path()
-            
-            # 讀取現有設定（如果存在）
+            settings_service = get_app_settings()
             settings = {}
-            if os.path.exists(settings_path):
-                with open(settings_path, "r", encoding="utf-8") as f:
-                    try:
-                        settings = json.load(f)
-                    except:
-                        settings = {}
             
             # 更新基本設定
             settings["max_concurrent_downloads"] = self.max_concurrent_downloads
@@ -1046,15 +1390,15 @@ class DownloadTab(QWidget):
             if hasattr(self, 'auto_merge_cb'):
                 settings["auto_merge"] = self.auto_merge_cb.isChecked()
             
-            # 保存下載頁籤特定設定
-            if "download_tab" not in settings:
-                settings["download_tab"] = {}
+            # 保存自動調整同時下載數設定
+            if hasattr(self, 'auto_concurrency_cb'):
+                settings["auto_concurrency"] = self.auto_concurrency_cb.isChecked()
             
-            # 保存設定
-            with open(settings_path, "w", encoding="utf-8") as f:
-                json.dump(settings, f, ensure_ascii=False, indent=4)
+            # 保存設定（與現有設定合併，延遲寫入）
+            settings_service.update(settings)
+            settings_service.update_section("download_tab", {})
                 
-            log(f"已保存用戶設定到: {settings_path}")
+            log(f"已保存用戶設定到: {settings_service.settings_path}")
         except Exception as e:
             log(f"保存設定失敗: {str(e)}")
     
@@ -1072,6 +1416,10 @@ class DownloadTab(QWidget):
         if "max_concurrent_downloads" in settings:
             self.max_concurrent_downloads = settings["max_concurrent_downloads"]
             self.max_downloads_spin.setValue(self.max_concurrent_downloads)
+            if self.concurrency_controller is not None:
+                self.concurrency_controller.reset(self.max_concurrent_downloads)
+            self.download_queue.set_max_concurrent(self.max_concurrent_downloads)
+            self.update_concurrency_status()
             # 更新URL輸入框高度
             line_height = 20  # 預估每行高度
             padding = 30     # 額外空間
@@ -1079,6 +1427,9 @@ class DownloadTab(QWidget):
             self.url_edit.setMaximumHeight(self.max_concurrent_downloads * line_height + padding)
             log(f"已更新最大同時下載數: {self.max_concurrent_downloads}")
         
+        # 應用效能設定
+        self.set_performance_settings(settings)
+        
         # 應用格式設定
         if "default_format" in settings:
             format_index = -1
@@ -1206,6 +1557,19 @@ class DownloadTab(QWidget):
         resolution_layout.addWidget(self.resolution_combo, 1)
         left_settings.addLayout(resolution_layout)
         
+        # 優先順序 - 緊急任務插隊，背景任務只分到較少的名額與頻寬
+        priority_layout = QHBoxLayout()
+        priority_label = QLabel("優先順序:")
+        self.priority_combo = QComboBox()
+        for priority in (PRIORITY_NORMAL, PRIORITY_URGENT, PRIORITY_BACKGROUND):
+            self.priority_combo.addItem(PRIORITY_LABELS[priority], priority)
+        self.priority_combo.setToolTip("緊急：下一個空出的名額立即開始\n"
+                                       "一般：與其他批次公平分享名額\n"
+                                       "背景：只使用一般任務一半的名額與頻寬")
+        priority_layout.addWidget(priority_label)
+        priority_layout.addWidget(self.priority_combo, 1)
+        left_settings.addLayout(priority_layout)
+        
         # 檔名前綴 - 改為下拉選單，調整寬度
         prefix_layout = QHBoxLayout()
         prefix_label = QLabel("檔名前綴:")
@@ -1268,10 +1632,17 @@ class DownloadTab(QWidget):
         self.max_downloads_spin.setValue(self.max_concurrent_downloads)
         self.max_downloads_spin.valueChanged.connect(self.on_max_downloads_changed)
         
+        # 自動調整：以最大同時下載數為起點，依實際下載速度增減
+        self.auto_concurrency_cb = QCheckBox("自動")
+        self.auto_concurrency_cb.setToolTip("依總下載速度自動增減同時下載數，\n"
+                                            "遇到平台限速 (429) 或單一任務速度下降時自動減少")
+        self.auto_concurrency_cb.toggled.connect(self.on_auto_concurrency_toggled)
+        
         merge_layout.addWidget(self.auto_merge_cb)
         merge_layout.addStretch(1)
         merge_layout.addWidget(max_downloads_label)
         merge_layout.addWidget(self.max_downloads_spin)
+        merge_layout.addWidget(self.auto_concurrency_cb)
         right_settings.addLayout(merge_layout)
         
         # 加入空白區域對齊佈局
@@ -1352,6 +1723,11 @@ class DownloadTab(QWidget):
     def on_max_downloads_changed(self, value):
         """最大同時下載數變更"""
         self.max_concurrent_downloads = value
+        if self.concurrency_controller is not None:
+            # 自動模式以新的數量作為起點重新調整
+            self.concurrency_controller.reset(value)
+        self.download_queue.set_max_concurrent(value)
+        self.update_concurrency_status()
         
         # 動態調整輸入框高度
         line_height = 20
@@ -1368,6 +1744,49 @@ class DownloadTab(QWidget):
         # 保存設定
         self.save_settings()
 
+    def on_auto_concurrency_toggled(self, checked):
+        """開啟/關閉自動調整同時下載數"""
+        self.set_auto_concurrency(checked)
+        if not self._is_initializing:
+            self.save_settings()
+
+    def set_auto_concurrency(self, enabled):
+        """開啟時從目前的最大同時下載數開始自動調整；關閉時恢復手動設定的數量"""
+        if enabled and self.concurrency_controller is None:
+            self.concurrency_controller = AdaptiveConcurrency(self.max_concurrent_downloads,
+                                                              self.max_downloads_spin.maximum())
+            self.concurrency_timer.start()
+            log(f"已開啟自動調整同時下載數，起始數量: {self.max_concurrent_downloads}")
+        elif not enabled and self.concurrency_controller is not None:
+            self.concurrency_controller = None
+            self.concurrency_timer.stop()
+            self.download_queue.set_max_concurrent(self.max_concurrent_downloads)
+            log(f"已關閉自動調整同時下載數，恢復為: {self.max_concurrent_downloads}")
+        self.update_concurrency_status()
+
+    def adjust_concurrency(self):
+        """定時評估總下載速度，依結果調整佇列的同時下載數"""
+        controller = self.concurrency_controller
+        if controller is None:
+            return
+        saturated = (self.download_queue.pending_count() > 0
+                     and self.download_queue.active_count() >= controller.level)
+        level = controller.evaluate(saturated)
+        if level is not None:
+            self.download_queue.set_max_concurrent(level)
+        self.update_concurrency_status()
+
+    def update_concurrency_status(self):
+        """在下載進度頁顯示目前的同時下載數"""
+        progress_tab = getattr(self.window(), 'progress_tab', None)
+        if progress_tab is None or not hasattr(progress_tab, 'set_concurrency_status'):
+            return
+        controller = self.concurrency_controller
+        if controller is None:
+            progress_tab.set_concurrency_status(self.max_concurrent_downloads, False)
+        else:
+            progress_tab.set_concurrency_status(controller.level, True, controller.throughput)
+
     def on_prefix_changed(self, text):
         """前綴變更時處理"""
         # 避免在程式初始化或清空前綴時觸發大量日誌
@@ -1410,26 +1829,12 @@ class DownloadTab(QWidget):
         if updated_count > 0:
             log(f"已更新 {updated_count} 個下載項目的檔名前綴為: {text}")
         
-        # 立即保存前綴設定到setup.json
+        # 保存前綴設定到setup.json
         try:
-            settings_path = get_settings_path()
-            
-            # 讀取現有設定（如果存在）
-            settings = {}
-            if os.path.exists(settings_path):
-                with open(settings_path, "r", encoding="utf-8") as f:
-                    try:
-                        settings = json.load(f)
-                    except:
-                        settings = {}
-            
-            # 更新前綴設定
-            settings["current_prefix"] = text
-            settings["prefix_history"] = self.prefix_history
-        
-            # 保存設定
-            with open(settings_path, "w", encoding="utf-8") as f:
-                json.dump(settings, f, ensure_ascii=False, indent=4)
+            get_app_settings().update({
+                "current_prefix": text,
+                "prefix_history": self.prefix_history,
+            })
                 
             log(f"已保存檔案前綴設定: {text}")
         except Exception as e:
@@ -1780,6 +2185,16 @@ class DownloadTab(QWidget):
                     QMessageBox.information(self, "提示", "所有輸入的URL都已下載完成，無需重複下載")
                     self.url_edit.clear()  # 清空輸入框
                     return
+        
+        # 檢查以前已下載過的影片（同一部影片的不同網址也視為相同）
+        downloaded = {url for url in urls if not is_collection_url(url) and self.is_downloaded(url)}
+        if downloaded:
+            log(f"跳過 {len(downloaded)} 個已下載過的影片")
+            urls = [url for url in urls if url not in downloaded]
+            if not urls:
+                QMessageBox.information(self, "提示", "所有輸入的影片都已下載過，無需重複下載")
+                self.url_edit.clear()  # 清空輸入框
+                return
             
         # 檢查下載路徑是否存在
         if not os.path.exists(self.download_path):
@@ -1790,49 +2205,30 @@ class DownloadTab(QWidget):
                 QMessageBox.critical(self, "錯誤", f"無法創建下載路徑: {str(e)}")
                 return
         
-        # 檢查當前下載數量是否已達上限
-        current_downloads = len(self.download_threads)
-        if current_downloads >= self.max_concurrent_downloads:
-            QMessageBox.warning(
-                self, 
-                "下載數量已達上限", 
-                f"當前已有 {current_downloads} 個下載任務在進行中，已達到最大同時下載數 {self.max_concurrent_downloads}。\n\n請等待部分下載完成後再添加新的下載任務。"
-            )
-            return
-            
-        # 計算可添加的下載數量
-        available_slots = self.max_concurrent_downloads - current_downloads
-        urls_to_download = urls[:available_slots]
-        
-        if len(urls) > available_slots:
-            QMessageBox.information(
-                self,
-                "部分下載已添加",
-                f"已添加 {len(urls_to_download)} 個下載任務。\n\n剩餘的 {len(urls) - available_slots} 個任務將在當前下載完成後自動開始。"
-            )
-        
-        log(f"開始下載 {len(urls_to_download)} 個影片...")
-        
-        # 為每個URL創建下載項目（直接在下載進度頁面顯示）
-        for i, url in enumerate(urls_to_download):
-            # 識別平台
-            platform_name = identify_platform(url)
-            
-            # 創建唯一的檔案名，包含平台信息
-            if platform_name == "未知":
-                filename = f"未知來源影片_{len(self.download_threads) + i + 1}.mp4"
-            else:
-                filename = f"{platform_name}影片_{len(self.download_threads) + i + 1}.mp4"
-            
-            # 開始下載 - 直接在進度頁面顯示，不在當前頁面建立UI元件
-            self.start_download_for_item(filename, url)
+        log(f"加入 {len(urls)} 個影片到下載佇列...")
+        
+        # 為每個URL建立任務並加入佇列，由佇列依最大同時下載數自動分派
+        # 播放清單/頻道在背景展開，每取得一批影片就加入佇列
+        # 同一次加入的影片屬於同一批次，批次之間依優先順序的權重分享名額
+        priority = self.priority_combo.currentData()
+        self._batch_counter += 1
+        batch = self._batch_counter
+        urls_to_download = []
+        playlist_count = 0
+        for url in urls:
+            if is_collection_url(url):
+                self.expand_playlist(url, priority, batch)
+                playlist_count += 1
+            elif self.queue_url(url, priority, batch):
+                urls_to_download.append(url)
         
         # 清空輸入框，鼓勵用戶輸入新連結
-        if urls_to_download:
+        if urls_to_download or playlist_count:
             QTimer.singleShot(1000, lambda: self.url_edit.clear())
             
             # 顯示提示，建議用戶切換到下載進度頁
-            self.title_label.setText(f"已開始下載 {len(urls_to_download)} 個影片。請切換到「下載進度」分頁查看下載狀態。")
+            playlist_text = f"，正在展開 {playlist_count} 個播放清單" if playlist_count else ""
+            self.title_label.setText(f"已將 {len(urls_to_download)} 個影片加入下載佇列{playlist_text}，最多同時下載 {self.max_concurrent_downloads} 個，其餘將自動依序開始。請切換到「下載進度」分頁查看下載狀態。")
             self.title_label.setStyleSheet("font-weight: bold; color: #0078d7; margin: 5px 0;")
             
             # 強調「查看下載進度」按鈕
@@ -1898,9 +2294,33 @@ class DownloadTab(QWidget):
                 auto_merge
             )
             
-            # 保存線程
+            # 進度寫入共用的快照表，不再逐次發送信號
+            self.progress_table.discard(filename)
+            thread.progress_table = self.progress_table
+            thread.job_name = filename
+            thread.bandwidth = self.bandwidth
+            thread.parallel_streams = get_app_settings().get_bool("parallel_streams", True)
+            thread.download_engine = get_app_settings().get_str("download_engine", ENGINE_NATIVE)
+            thread.info_future = self.metadata_prefetcher.take(url)
+            thread.info_cache = self.info_cache
+            # 使用者重試或更換格式時不比對下載存檔，完成後再記錄
+            thread.download_archive = None if filename in self._archive_bypass else self.download_archive
+            thread.stall_watchdog = self.stall_watchdog
+            thread.concurrency_controller = self.concurrency_controller
+            thread.retry_policy = self.retry_policy
+            thread.priority = self.download_queue.priority_of(filename)
+            self.circuit_breakers.job_started(host_key(url))
+            
+            # 保存線程（重試時舊線程可能仍在收尾，先移到待回收清單）
+            if filename in self.download_threads:
+                self._retired_threads.append(self.download_threads[filename])
             self.download_threads[filename] = thread
             
+            # 下載結束時釋放佇列名額
+            thread.finished.connect(lambda success, message, file_path:
+                                    self.on_download_thread_finished(filename, success, message, file_path))
+            thread.skipped.connect(lambda message: self.on_download_thread_skipped(filename, message))
+            
             # 在下載進度頁面顯示下載項目
             if hasattr(self.parent(), 'progress_tab') and self.parent().progress_tab:
                 try:
@@ -1914,16 +2334,19 @@ class DownloadTab(QWidget):
                     
                     # 連接進度信號
                     thread.progress.connect(lambda message, percent, speed, eta: 
-                                          self.parent().progress_tab.update_download_progress(filename, message, percent, speed, eta))
+                                          self.parent().progress_tab.update_download_progress(filename, message, percent, speed, eta,
+                                                                                              state=thread.state))
                     
                     # 連接完成信號
                     thread.finished.connect(lambda success, message, file_path: 
                                           self.parent().progress_tab.update_task_status(filename, success, message, file_path))
+                    thread.skipped.connect(lambda message:
+                                           self.parent().progress_tab.mark_item_skipped(filename, message))
                     
                     # 自動切換到下載進度標籤頁
                     QTimer.singleShot(300, lambda: self.parent().tab_widget.setCurrentIndex(1))
                     
-                    log(f"已在下載進度標籤頁顯示項目: {filename}")
+                    log(f"已在下載進度標籤頁顯示項目: {filename}", LOG_DEBUG)
                     
                     # 清空輸入欄，鼓勵用戶切換到進度頁
                     if len(self.download_threads) == 1:  # 第一個下載項目
@@ -1937,30 +2360,337 @@ class DownloadTab(QWidget):
                 # 如果沒有進度標籤頁，則仍要連接信號，但不顯示在UI中
                 log("警告: 找不到下載進度標籤頁，無法顯示下載進度")
                 
+            # 記錄任務狀態（續傳由 yt-dlp 依 .part 檔處理，已下載位元組數只供恢復時參考）
+            self.job_journal.record(filename, STATE_RUNNING, url)
+            
             # 啟動線程
             thread.start()
             
             log(f"已啟動下載線程: {filename}, URL: {url}")
         except Exception as e:
             log(f"啟動下載線程失敗: {str(e)}")
-            self.show_error_dialog(filename, f"啟動下載失敗: {str(e)}")
+            if self.download_threads.get(filename) is not None and not self.download_threads[filename].isRunning():
+                del self.download_threads[filename]
+            # 由佇列釋放名額並發出 job_failed，記錄為失敗並顯示在下載進度頁
+            raise
+
+    def on_queue_job_failed(self, filename, url, message):
+        """佇列無法啟動任務：記錄到任務日誌並在下載進度頁顯示為失敗"""
+        message = f"啟動下載失敗: {message}"
+        self.circuit_breakers.job_released(host_key(url))
+        self.job_journal.record(filename, STATE_FAILED, url, error=message[:500])
+        progress_tab = getattr(self.window(), 'progress_tab', None)
+        if progress_tab is not None:
+            progress_tab.add_download_item(filename, url)
+            progress_tab.update_task_status(filename, False, message, "")
+
+    def record_journal_progress(self, updates):
+        """將進度快照表送來的已下載位元組數記入任務日誌（由日誌依 PROGRESS_INTERVAL 節流）"""
+        for filename, snapshot in updates.items():
+            bytes_done = snapshot[4]
+            if bytes_done:
+                self.job_journal.record_progress(filename, bytes_done)
+
+    def find_downloaded(self, url):
+        """以目前選擇的格式查詢影片是否已下載過，返回檔案路徑或 None"""
+        signature = format_signature(self.format_combo.currentText(), self.resolution_combo.currentText())
+        return self.download_index.lookup(url, signature)
+
+    def is_downloaded(self, url):
+        """影片是否已記錄在已下載影片索引或下載存檔中（存檔尚未載入完成時不等待）"""
+        if self.find_downloaded(url) is not None:
+            return True
+        return self.download_archive is not None and self.download_archive.contains_url(url, wait=False)
+
+    def queue_url(self, url, priority=None, batch=None):
+        """為單一影片網址建立唯一的任務名稱並加入佇列"""
+        # 識別平台（identify_platform 返回顯示名稱，判斷未知平台要比對 registry 的名稱）
+        known = lookup_platform(url)["name"] != UNKNOWN_PLATFORM
+        
+        # 創建唯一的檔案名，包含平台信息
+        self._job_counter += 1
+        if not known:
+            filename = f"未知來源影片_{self._job_counter}.mp4"
+        else:
+            filename = f"{identify_platform(url)}影片_{self._job_counter}.mp4"
+        
+        return self.queue_download(filename, url, priority=priority, batch=batch)
+
+    def expand_playlist(self, url, priority=None, batch=None):
+        """在背景展開播放清單/頻道，影片會陸續加入下載佇列"""
+        cookies_file = None
+        settings = get_app_settings()
+        if settings.get_bool("use_cookies") and os.path.exists(settings.get_str("cookies_file")):
+            cookies_file = settings.get_str("cookies_file")
+        
+        expander = PlaylistExpander(url, cookies_file, self)
+        # 展開出的影片沿用貼上時選擇的優先順序與批次
+        expander.priority = priority
+        expander.batch = batch
+        expander.entries_found.connect(self.on_playlist_entries)
+        expander.expansion_finished.connect(self.on_playlist_expanded)
+        self.playlist_expanders.append(expander)
+        expander.start()
+        log(f"開始展開播放清單: {url}")
+
+    def on_playlist_entries(self, source_url, entries):
+        """播放清單展開出一批影片，加入下載佇列"""
+        expander = self.sender()
+        priority = getattr(expander, 'priority', None)
+        batch = getattr(expander, 'batch', None)
+        completed_urls = getattr(self, '_completed_urls', set())
+        added = 0
+        for url, title in entries:
+            if url in completed_urls or self.is_downloaded(url):
+                continue
+            if self.queue_url(url, priority, batch):
+                added += 1
+        log(f"播放清單 {source_url} 加入 {added} 個影片", LOG_DEBUG)
+
+    def on_playlist_expanded(self, source_url, count, error):
+        """播放清單展開結束"""
+        expander = self.sender()
+        if expander in self.playlist_expanders:
+            self.playlist_expanders.remove(expander)
+            expander.deleteLater()
+        
+        if error and count == 0:
+            self.title_label.setText(f"無法展開播放清單: {error}")
+            self.title_label.setStyleSheet("font-weight: bold; color: #d9534f; margin: 5px 0;")
+        else:
+            self.title_label.setText(f"播放清單展開完成，共 {count} 個影片")
+            self.title_label.setStyleSheet("font-weight: bold; color: #0078d7; margin: 5px 0;")
+        log(f"播放清單展開完成: {source_url}, 共 {count} 個影片")
+
+    def cancel_playlist_expansion(self):
+        """停止所有正在展開的播放清單"""
+        for expander in list(self.playlist_expanders):
+            expander.cancel()
+
+    def queue_download(self, filename, url, front=False, priority=None, batch=None, bypass_archive=False):
+        """將下載任務加入佇列，名額空出時自動開始
+
+        bypass_archive: 使用者明確要求重新下載（重試、更換格式）時不比對下載存檔
+        """
+        # 使用者手動重試時取消尚未觸發的自動重試
+        self.cancel_retry_timer(filename)
+        queued = self.download_queue.enqueue(filename, url, front=front, priority=priority, batch=batch)
+        if queued:
+            if bypass_archive:
+                self._archive_bypass.add(filename)
+            self.job_journal.record(filename, STATE_QUEUED, url, queued_at=time.time())
+            log(f"已加入下載佇列: {filename}, URL: {url}", LOG_DEBUG)
+        return queued
+
+    def prefetch_queued_info(self):
+        """為佇列前面的任務預先解析影片資訊"""
+        settings = get_app_settings()
+        cookies_file = settings.get_str("cookies_file") if settings.get_bool("use_cookies") else ""
+        self.metadata_prefetcher.cookies_file = cookies_file if cookies_file and os.path.exists(cookies_file) else None
+        
+        jobs = self.download_queue.peek(self.metadata_prefetcher.lookahead())
+        self.metadata_prefetcher.prefetch([job.url for job in jobs
+                                           if lookup_platform(job.url)["name"] != UNKNOWN_PLATFORM])
+
+    def admit_job(self, job):
+        """佇列分派前的檢查：平台的斷路器跳脫時返回需要等待的秒數"""
+        return self.circuit_breakers.wait_time(job.group or host_key(job.url))
+
+    def schedule_retry(self, filename, url, message):
+        """依錯誤類型決定是否自動重試，返回等待秒數；不重試時返回 None"""
+        error_class = classify_error(message)
+        cooldown = self.circuit_breakers.record_failure(host_key(url), error_class)
+        if self.concurrency_controller is not None:
+            self.concurrency_controller.record_error(error_class)
+        if error_class not in (ERROR_TRANSIENT, ERROR_RATE_LIMITED):
+            # 永久錯誤不重試；其他錯誤已在下載線程中嘗試過備用方法
+            return None
+        attempt = self._retry_attempts.get(filename, 0) + 1
+        if not self.retry_policy.should_retry(error_class, attempt):
+            return None
+        self._retry_attempts[filename] = attempt
+        # 限速時斷路器會暫停分派整個平台，這裡只需要退避時間
+        delay = self.retry_policy.delay(attempt)
+        log(f"{int(delay)} 秒後自動重試 (第 {attempt} 次): {filename}"
+            + (f"，平台暫停 {int(cooldown)} 秒" if cooldown else ""))
+        self.cancel_retry_timer(filename)
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.timeout.connect(lambda: self.requeue_job(filename, url))
+        self._retry_timers[filename] = timer
+        timer.start(int(delay * 1000))
+        return max(delay, cooldown)
+
+    def cancel_retry_timer(self, filename):
+        """取消等待中的自動重試"""
+        timer = self._retry_timers.pop(filename, None)
+        if timer is not None:
+            timer.stop()
+            timer.deleteLater()
+
+    def requeue_job(self, filename, url):
+        """退避時間結束，將失敗的任務重新加入佇列（任務已被取消、手動重試或已完成時略過）"""
+        self.cancel_retry_timer(filename)
+        if self.job_journal.jobs.get(filename, {}).get("state") != STATE_FAILED:
+            return
+        if filename in self.download_queue.active or filename in self.download_queue.pending_names:
+            return
+        progress_tab = getattr(self.parent(), 'progress_tab', None)
+        if progress_tab is not None:
+            progress_tab.remove_item_from_ui(filename)
+        self.queue_download(filename, url, front=True)
+
+    def set_job_priority(self, filename, priority):
+        """變更任務的優先順序：等待中的任務調整分派順序，進行中的任務重新分配頻寬"""
+        self.download_queue.set_priority(filename, priority)
+        thread = self.download_threads.get(filename)
+        if thread is not None and thread.isRunning():
+            thread.priority = priority
+            if self.bandwidth is not None:
+                self.bandwidth.set_weight(thread.bandwidth_key(), PRIORITY_WEIGHTS.get(priority, 1))
+        log(f"任務優先順序變更為{PRIORITY_LABELS.get(priority, priority)}: {filename}")
+
+    def cancel_job(self, filename):
+        """使用者取消任務：移出佇列、停止線程並記錄到任務日誌"""
+        self._retry_attempts.pop(filename, None)
+        self.cancel_retry_timer(filename)
+        self._archive_bypass.discard(filename)
+        self.download_queue.remove(filename)
+        thread = self.download_threads.get(filename)
+        if thread is not None and hasattr(thread, 'cancel'):
+            thread.cancel()
+            self.circuit_breakers.job_released(host_key(thread.url))
+        self.job_journal.record(filename, STATE_CANCELLED)
+
+    def restore_unfinished_jobs(self):
+        """讀取任務日誌，詢問使用者是否恢復上次未完成的下載"""
+        jobs = self.job_journal.unfinished_jobs()
+        if not jobs:
+            self.job_journal.compact()
+            return
+        
+        reply = QMessageBox.question(
+            self,
+            "恢復下載",
+            f"上次有 {len(jobs)} 個下載任務尚未完成，是否要繼續下載？\n\n已下載的部分將從中斷處繼續。",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.Yes
+        )
+        
+        if reply == QMessageBox.Yes:
+            for job in jobs:
+                filename = job["job"]
+                # 確保新任務的編號不會與恢復的任務重複
+                match = re.search(r'_(\d+)\.\w+$', filename)
+                if match:
+                    self._job_counter = max(self._job_counter, int(match.group(1)))
+                self.queue_download(filename, job["url"])
+            log(f"已從任務日誌恢復 {len(jobs)} 個未完成的下載")
+        else:
+            for job in jobs:
+                self.job_journal.record(job["job"], STATE_CANCELLED)
+            log(f"使用者放棄恢復 {len(jobs)} 個未完成的下載")
+        
+        self.job_journal.compact()
+
+    def on_download_thread_finished(self, filename, success, message, file_path):
+        """下載線程結束時釋放佇列名額，讓等待中的任務自動開始"""
+        # 線程發出完成信號時可能仍在收尾，先保留引用避免線程物件被提前回收
+        thread = self.download_threads.pop(filename, None)
+        if thread is not None:
+            self._retired_threads.append(thread)
+        self._purge_retired_threads()
+        
+        # 丟棄尚未顯示的進度，避免覆蓋完成狀態
+        self.progress_table.discard(filename)
+        
+        # 使用者已取消的任務保持取消狀態，不記為失敗
+        job_url = self.download_items.get(filename, {}).get('url')
+        if self.job_journal.jobs.get(filename, {}).get("state") != STATE_CANCELLED:
+            if success:
+                self.job_journal.record(filename, STATE_DONE, output_path=file_path or None)
+                self._retry_attempts.pop(filename, None)
+                self.cancel_retry_timer(filename)
+                # 重試時沒有交給 yt-dlp 記錄，完成後補記到下載存檔
+                if filename in self._archive_bypass and self.download_archive is not None and job_url:
+                    entry = archive_id(job_url)
+                    if entry is not None:
+                        self.download_archive.add(entry)
+                self._archive_bypass.discard(filename)
+                # 記錄到已下載影片索引，之後貼上同一部影片時略過
+                if job_url:
+                    self.circuit_breakers.record_success(host_key(job_url))
+                    signature = format_signature(self.download_formats.get(filename),
+                                                 self.download_resolutions.get(filename))
+                    self.download_index.record(job_url, signature, file_path)
+            else:
+                self.job_journal.record(filename, STATE_FAILED, error=(message or "")[:500])
+                delay = self.schedule_retry(filename, job_url, message) if job_url else None
+                if delay is not None:
+                    # 進度頁顯示失敗後改為等待重試
+                    progress_tab = getattr(self.parent(), 'progress_tab', None)
+                    if progress_tab is not None:
+                        QTimer.singleShot(0, lambda: progress_tab.set_item_status(
+                            filename, f"{int(delay)} 秒後自動重試..."))
+                else:
+                    self._retry_attempts.pop(filename, None)
+                    self._archive_bypass.discard(filename)
+        elif job_url:
+            # 取消的任務不代表平台的狀態，是試探任務時讓下一個任務重新試探
+            self.circuit_breakers.job_released(host_key(job_url))
+        
+        self.download_queue.job_finished(filename)
+
+    def on_download_thread_skipped(self, filename, message):
+        """影片已在下載存檔中，沒有下載：記為略過（不是完成），並釋放佇列名額"""
+        thread = self.download_threads.pop(filename, None)
+        if thread is not None:
+            self._retired_threads.append(thread)
+        self._purge_retired_threads()
+        self.progress_table.discard(filename)
+        
+        if self.job_journal.jobs.get(filename, {}).get("state") != STATE_CANCELLED:
+            self.job_journal.record(filename, STATE_SKIPPED)
+        job_url = self.download_items.get(filename, {}).get('url')
+        if job_url:
+            self.circuit_breakers.job_released(host_key(job_url))
+        self._retry_attempts.pop(filename, None)
+        self._archive_bypass.discard(filename)
+        self.download_queue.job_finished(filename)
+
+    def _purge_retired_threads(self):
+        """釋放已經完全結束的線程物件"""
+        self._retired_threads = [t for t in self._retired_threads if t.isRunning()]
+
+    def on_queue_changed(self, pending, active):
+        """佇列狀態變更時更新提示，並預先解析即將開始的任務"""
+        if pending > 0:
+            self.prefetch_queued_info()
+        
+        if pending > 0:
+            self.title_label.setText(f"下載中: {active} 個，佇列等待中: {pending} 個（將自動依序開始）")
+            self.title_label.setStyleSheet("font-weight: bold; color: #0078d7; margin: 5px 0;")
+        
+        window = self.window()
+        if window is not None and hasattr(window, 'statusBar'):
+            if pending > 0 or active > 0:
+                window.statusBar().showMessage(f"下載中: {active} 個 | 佇列等待中: {pending} 個")
+            else:
+                window.statusBar().showMessage("所有下載任務已處理完成", 5000)
 
     def on_platform_detected_in_progress(self, filename, platform, url):
         """當在主標籤頁檢測到平台時，同步到進度標籤頁"""
         try:
-            if hasattr(self.parent(), 'progress_tab') and filename in self.parent().progress_tab.download_items:
+            progress_tab = getattr(self.window(), 'progress_tab', None)
+            if progress_tab is not None and filename in progress_tab.download_items:
                 # 通知進度標籤頁更新平台資訊
                 log(f"同步平台信息到進度標籤頁: {filename}, {platform}")
                 
-                # 更新平台特定的圖標和顏色
-                item = self.parent().progress_tab.download_items[filename]
-                
                 # 設置平台信息
-                if 'status' in item:
-                    if platform == "未知":
-                        item['status'].setText("未知來源影片下載中...")
-                    else:
-                        item['status'].setText(f"{platform}影片下載中...")
+                if platform == "未知":
+                    progress_tab.set_item_status(filename, "未知來源影片下載中...")
+                else:
+                    progress_tab.set_item_status(filename, f"{platform}影片下載中...")
         except Exception as e:
             log(f"同步平台信息到進度標籤頁失敗: {str(e)}")
 
@@ -2053,12 +2783,12 @@ class DownloadTab(QWidget):
         except Exception as e:
             log(f"更新視頻信息時出錯: {str(e)}")
 
-    def update_download_progress(self, filename, message, percent, speed, eta):
+    def update_download_progress(self, filename, message, percent, speed, eta, state=None):
         """更新下載進度"""
         # 優先將進度更新同步到進度標籤頁
         if hasattr(self.parent(), "progress_tab") and self.parent().progress_tab:
             try:
-                self.parent().progress_tab.update_download_progress(filename, message, percent, speed, eta)
+                self.parent().progress_tab.update_download_progress(filename, message, percent, speed, eta, state=state)
             except Exception as e:
                 log(f"同步進度到下載進度頁籤時出錯: {str(e)}")
             
@@ -2312,19 +3042,8 @@ class DownloadTab(QWidget):
         # 處理其他情況
         if success:
             # 下載成功
-            # 檢查檔案路徑是否存在，如果不存在則嘗試在下載目錄中查找
-            actual_file_path = file_path
-            if not file_path or not os.path.exists(file_path):
-                # 嘗試在下載目錄中查找可能的檔案
-                try:
-                    files = os.listdir(self.download_path)
-                    for file in files:
-                        if file.startswith(filename.replace('.mp4', '')) or filename.replace('.mp4', '') in file:
-                            actual_file_path = os.path.join(self.download_path, file)
-                            break
-                except Exception as e:
-                    log(f"查找下載檔案時發生錯誤: {str(e)}")
-                    actual_file_path = None
+            # 檔案路徑由下載線程依 yt-dlp 的回報提供，不再掃描下載目錄
+            actual_file_path = file_path if file_path and os.path.exists(file_path) else None
             
             if actual_file_path and os.path.exists(actual_file_path):
                 # 檢查是否有多個中間檔案（片段）
@@ -2401,16 +3120,12 @@ class DownloadTab(QWidget):
                 # 文件不存在，顯示錯誤
                 self.show_error_dialog(filename, "下載失敗：找不到下載的檔案")
                             # 檢查是否設定自動開啟外部下載
-            settings_path = get_settings_path()
             try:
-                if os.path.exists(settings_path):
-                    with open(settings_path, "r", encoding="utf-8") as f:
-                        settings = json.load(f)
-                        if settings.get("auto_open_external", False):
-                            url = self.download_items[filename].get("url", "")
-                            if url:
-                                log(f"下載失敗，根據設定自動開啟外部下載網站: {url}")
-                                QTimer.singleShot(500, lambda: self.open_external_download_site(filename, url))
+                if get_app_settings().get_bool("auto_open_external"):
+                    url = self.download_items[filename].get("url", "")
+                    if url:
+                        log(f"下載失敗，根據設定自動開啟外部下載網站: {url}")
+                        QTimer.singleShot(500, lambda: self.open_external_download_site(filename, url))
             except Exception as e:
                 log(f"檢查自動開啟外部下載設定失敗: {str(e)}")
             
@@ -2424,16 +3139,12 @@ class DownloadTab(QWidget):
             self.show_error_dialog(filename, message)
             
             # 檢查是否設定自動開啟外部下載
-            settings_path = get_settings_path()
             try:
-                if os.path.exists(settings_path):
-                    with open(settings_path, "r", encoding="utf-8") as f:
-                        settings = json.load(f)
-                        if settings.get("auto_open_external", False):
-                            url = self.download_items[filename].get("url", "")
-                            if url:
-                                log(f"下載失敗，根據設定自動開啟外部下載網站: {url}")
-                                QTimer.singleShot(500, lambda: self.open_external_download_site(filename, url))
+                if get_app_settings().get_bool("auto_open_external"):
+                    url = self.download_items[filename].get("url", "")
+                    if url:
+                        log(f"下載失敗，根據設定自動開啟外部下載網站: {url}")
+                        QTimer.singleShot(500, lambda: self.open_external_download_site(filename, url))
             except Exception as e:
                 log(f"檢查自動開啟外部下載設定失敗: {str(e)}")
             
@@ -2524,12 +3235,9 @@ class DownloadTab(QWidget):
                 # 檢查設定是否有自動清理選項
                 auto_clean = False
                 try:
-                    settings_path = get_settings_path()
-                    if os.path.exists(settings_path):
-                        with open(settings_path, "r", encoding="utf-8") as f:
-                            settings = json.load(f)
-                            # 優先使用 remove_temp_files 設定，向下相容 auto_clean_merged_files
-                            auto_clean = settings.get("remove_temp_files", settings.get("auto_clean_merged_files", False))
+                    settings = get_app_settings()
+                    # 優先使用 remove_temp_files 設定，向下相容 auto_clean_merged_files
+                    auto_clean = settings.get_bool("remove_temp_files", settings.get_bool("auto_clean_merged_files"))
                 except Exception:
                     pass
                 
@@ -2599,20 +3307,11 @@ class DownloadTab(QWidget):
                     # 如果用戶勾選了"記住選擇"，保存設置
                     if always_cb.isChecked():
                         try:
-                            # 讀取當前設置
-                            settings_path = get_settings_path()
-                            settings = {}
-                            if os.path.exists(settings_path):
-                                with open(settings_path, "r", encoding="utf-8") as f:
-                                    settings = json.load(f)
-                            
                             # 更新設置
-                            settings["auto_clean_merged_files"] = True
-                            settings["remove_temp_files"] = True
-                            
-                            # 保存回檔案
-                            with open(settings_path, "w", encoding="utf-8") as f:
-                                json.dump(settings, f, ensure_ascii=False, indent=4)
+                            get_app_settings().update({
+                                "auto_clean_merged_files": True,
+                                "remove_temp_files": True,
+                            })
                             
                             log("已保存自動清理合併檔案設置")
                         except Exception as e:
@@ -2627,20 +3326,11 @@ class DownloadTab(QWidget):
                     # 如果用戶勾選了"記住選擇"，保存設置
                     if always_cb.isChecked():
                         try:
-                            # 讀取當前設置
-                            settings_path = get_settings_path()
-                            settings = {}
-                            if os.path.exists(settings_path):
-                                with open(settings_path, "r", encoding="utf-8") as f:
-                                    settings = json.load(f)
-                            
                             # 更新設置
-                            settings["auto_clean_merged_files"] = False
-                            settings["remove_temp_files"] = False
-                            
-                            # 保存回檔案
-                            with open(settings_path, "w", encoding="utf-8") as f:
-                                json.dump(settings, f, ensure_ascii=False, indent=4)
+                            get_app_settings().update({
+                                "auto_clean_merged_files": False,
+                                "remove_temp_files": False,
+                            })
                             
                             log("已保存不自動清理合併檔案設置")
                         except Exception as e:
@@ -3591,8 +4281,8 @@ class DownloadTab(QWidget):
                 elif filename in self.error_dialogs:
                     self.error_dialogs[filename].accept()
                 
-                # 從已有項目重新開始下載
-                self.start_download_for_item(filename, url)
+                # 從已有項目重新開始下載（排在佇列最前面，使用者要求重新下載，不比對下載存檔）
+                self.queue_download(filename, url, front=True, bypass_archive=True)
         else:
             QMessageBox.warning(self, "錯誤", "找不到對應的下載項目")
 
@@ -3810,10 +4500,20 @@ class DownloadTab(QWidget):
         
         # 創建新的下載線程，使用不同的下載選項
         new_thread = DownloadThread(url, output_path, "預設品質", "最高可用", prefix, auto_merge)
+        new_thread.bandwidth = self.bandwidth
+        new_thread.parallel_streams = get_app_settings().get_bool("parallel_streams", True)
+        new_thread.download_engine = get_app_settings().get_str("download_engine", ENGINE_NATIVE)
+        new_thread.info_cache = self.info_cache
+        new_thread.download_archive = None  # 使用者要求重新下載，不比對下載存檔
+        new_thread.stall_watchdog = self.stall_watchdog
+        new_thread.concurrency_controller = self.concurrency_controller
+        new_thread.retry_policy = self.retry_policy
+        new_thread.priority = self.download_queue.priority_of(filename)
         
         # 連接信號
         new_thread.progress.connect(
-            lambda msg, percent, speed, eta: self.update_download_progress(filename, msg, percent, speed, eta)
+            lambda msg, percent, speed, eta: self.update_download_progress(filename, msg, percent, speed, eta,
+                                                                           new_thread.state)
         )
         new_thread.finished.connect(
             lambda success, msg, file_path: self.download_finished(filename, success, msg, file_path)
@@ -3913,17 +4613,13 @@ class DownloadTab(QWidget):
         }
         
         try:
-            settings_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "setup.json")
-            if os.path.exists(settings_path):
-                with open(settings_path, "r", encoding="utf-8") as f:
-                    settings = json.load(f)
-                    
-                    # 載入外部下載替代網址設定
-                    if "external_urls" in settings:
-                        # 合併預設值和用戶設定
-                        external_urls = default_urls.copy()
-                        external_urls.update(settings["external_urls"])
-                        return external_urls
+            # 載入外部下載替代網址設定
+            saved_urls = get_app_settings().get("external_urls")
+            if saved_urls:
+                # 合併預設值和用戶設定
+                external_urls = default_urls.copy()
+                external_urls.update(saved_urls)
+                return external_urls
         except Exception as e:
             log(f"載入外部下載替代網址設定失敗: {str(e)}")
             
@@ -4033,6 +4729,8 @@ class SettingsTab(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.init_ui()
+        # 顯示已保存的設定，避免套用時以預設值覆蓋
+        self.load_settings_from_file()
     
     def init_ui(self):
         """初始化用戶界面"""
@@ -4205,6 +4903,20 @@ class SettingsTab(QWidget):
             "disable_ssl": self.disable_ssl_cb.isChecked() if hasattr(self, "disable_ssl_cb") else True,
             "auto_open_external": self.auto_open_external_cb.isChecked() if hasattr(self, "auto_open_external_cb") else False,
             
+            # 效能設定
+            "buffer_size_mb": self.buffer_size_spin.value() if hasattr(self, "buffer_size_spin") else 16,
+            "speed_limit_kbps": self.speed_limit_spin.value() if hasattr(self, "speed_limit_spin") else 0,
+            "memory_limit_mb": self.memory_limit_spin.value() if hasattr(self, "memory_limit_spin") else 500,
+            "fragment_concurrency": self.fragment_concurrency_cb.isChecked() if hasattr(self, "fragment_concurrency_cb") else True,
+            "max_connections": self.max_connections_spin.value() if hasattr(self, "max_connections_spin") else 16,
+            "parallel_streams": self.parallel_streams_cb.isChecked() if hasattr(self, "parallel_streams_cb") else True,
+            "download_engine": self.download_engine_combo.currentData() if hasattr(self, "download_engine_combo") else ENGINE_NATIVE,
+            "metadata_workers": self.metadata_workers_spin.value() if hasattr(self, "metadata_workers_spin") else 4,
+            "use_download_archive": self.use_archive_cb.isChecked() if hasattr(self, "use_archive_cb") else False,
+            "platform_limits": {name: spin.value() for name, spin in self.platform_limit_spins.items()}
+                               if hasattr(self, "platform_limit_spins") else dict(DEFAULT_PLATFORM_LIMITS),
+            "download_archive_file": self.archive_path_input.text() if hasattr(self, "archive_path_input") else "",
+            
             # 外部下載替代網址設定
             "external_urls": {
                 "youtube": self.youtube_url_input.text() if hasattr(self, "youtube_url_input") else "https://publer.com/tools/youtube-shorts-downloader?url={url}",
@@ -4218,23 +4930,8 @@ class SettingsTab(QWidget):
         
         # 保存到用戶偏好文件
         try:
-            settings_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "setup.json")
-            
-            # 讀取現有設定（如果存在）
-            existing_settings = {}
-            if os.path.exists(settings_path):
-                with open(settings_path, "r", encoding="utf-8") as f:
-                    try:
-                        existing_settings = json.load(f)
-                    except:
-                        existing_settings = {}
-            
-            # 更新設定
-            existing_settings.update(settings)
-            
-            # 保存設定
-            with open(settings_path, "w", encoding="utf-8") as f:
-                json.dump(existing_settings, f, ensure_ascii=False, indent=4)
+            # 用戶按下套用時立即寫入
+            get_app_settings().update(settings, immediate=True)
                 
             log("設定已保存到用戶偏好文件")
         except Exception as e:
@@ -4330,6 +5027,31 @@ class SettingsTab(QWidget):
         if hasattr(self, "auto_open_external_cb"):
             self.auto_open_external_cb.setChecked(False)
             
+        # 效能設定
+        if hasattr(self, "buffer_size_spin"):
+            self.buffer_size_spin.setValue(16)
+        if hasattr(self, "speed_limit_spin"):
+            self.speed_limit_spin.setValue(0)
+        if hasattr(self, "memory_limit_spin"):
+            self.memory_limit_spin.setValue(500)
+        if hasattr(self, "fragment_concurrency_cb"):
+            self.fragment_concurrency_cb.setChecked(True)
+        if hasattr(self, "max_connections_spin"):
+            self.max_connections_spin.setValue(16)
+        if hasattr(self, "parallel_streams_cb"):
+            self.parallel_streams_cb.setChecked(True)
+        if hasattr(self, "download_engine_combo"):
+            self.download_engine_combo.setCurrentIndex(self.download_engine_combo.findData(ENGINE_NATIVE))
+        if hasattr(self, "metadata_workers_spin"):
+            self.metadata_workers_spin.setValue(4)
+        if hasattr(self, "use_archive_cb"):
+            self.use_archive_cb.setChecked(False)
+        if hasattr(self, "platform_limit_spins"):
+            for name, spin in self.platform_limit_spins.items():
+                spin.setValue(DEFAULT_PLATFORM_LIMITS.get(name, 0))
+        if hasattr(self, "archive_path_input"):
+            self.archive_path_input.setText("")
+            
         # 外部下載替代網址設定
         if hasattr(self, "ig_url_input"):
             self.ig_url_input.setText("https://igram.io/?url={url}")
@@ -4345,130 +5067,167 @@ class SettingsTab(QWidget):
     def load_settings_from_file(self):
         """從文件載入設定"""
         try:
-            settings_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "setup.json")
-            if os.path.exists(settings_path):
-                with open(settings_path, "r", encoding="utf-8") as f:
-                    settings = json.load(f)
+            settings_service = get_app_settings()
+            if settings_service.exists():
+                settings = settings_service.as_dict()
+                
+                # 載入基本設定
+                if "download_path" in settings:
+                    self.folder_input.setText(settings["download_path"])
+                
+                if "max_concurrent_downloads" in settings:
+                    index = self.concurrent_combo.findText(str(settings["max_concurrent_downloads"]))
+                    if index >= 0:
+                        self.concurrent_combo.setCurrentIndex(index)
+                
+                if "show_notification" in settings:
+                    self.notify_cb.setChecked(settings["show_notification"])
+                
+                if "play_sound" in settings:
+                    self.sound_cb.setChecked(settings["play_sound"])
+                
+                if "auto_open_folder" in settings:
+                    self.open_folder_cb.setChecked(settings["auto_open_folder"])
+                
+                if "file_exists_action" in settings:
+                    if settings["file_exists_action"] == "ask":
+                        self.ask_radio.setChecked(True)
+                    elif settings["file_exists_action"] == "rename":
+                        self.rename_radio.setChecked(True)
+                    elif settings["file_exists_action"] == "overwrite":
+                        self.overwrite_radio.setChecked(True)
+                
+                # 載入格式與品質設定
+                if hasattr(self, "default_format_combo") and "default_format" in settings:
+                    index = self.default_format_combo.findText(settings["default_format"])
+                    if index >= 0:
+                        self.default_format_combo.setCurrentIndex(index)
+                
+                if hasattr(self, "default_resolution_combo") and "default_resolution" in settings:
+                    index = self.default_resolution_combo.findText(settings["default_resolution"])
+                    if index >= 0:
+                        self.default_resolution_combo.setCurrentIndex(index)
+                
+                if hasattr(self, "audio_quality_combo") and "audio_quality" in settings:
+                    index = self.audio_quality_combo.findText(settings["audio_quality"])
+                    if index >= 0:
+                        self.audio_quality_combo.setCurrentIndex(index)
+                
+                if hasattr(self, "prefer_av1_cb") and "prefer_av1" in settings:
+                    self.prefer_av1_cb.setChecked(settings["prefer_av1"])
+                
+                if hasattr(self, "fallback_to_webm_cb") and "fallback_to_webm" in settings:
+                    self.fallback_to_webm_cb.setChecked(settings["fallback_to_webm"])
+                
+                if hasattr(self, "auto_merge_cb") and "auto_merge" in settings:
+                    self.auto_merge_cb.setChecked(settings["auto_merge"])
+                
+                # 載入命名設定
+                if hasattr(self, "default_prefix_input") and "default_prefix" in settings:
+                    self.default_prefix_input.setText(settings["default_prefix"])
+                
+                if hasattr(self, "sanitize_filename_cb") and "sanitize_filename" in settings:
+                    self.sanitize_filename_cb.setChecked(settings["sanitize_filename"])
+                
+                if hasattr(self, "add_timestamp_cb") and "add_timestamp" in settings:
+                    self.add_timestamp_cb.setChecked(settings["add_timestamp"])
+                
+                if hasattr(self, "truncate_filename_cb") and "truncate_filename" in settings:
+                    self.truncate_filename_cb.setChecked(settings["truncate_filename"])
+                
+                if hasattr(self, "max_length_spin") and "max_filename_length" in settings:
+                    self.max_length_spin.setValue(settings["max_filename_length"])
+                
+                if hasattr(self, "create_subfolders_cb") and "create_subfolders" in settings:
+                    self.create_subfolders_cb.setChecked(settings["create_subfolders"])
+                
+                if hasattr(self, "organize_by_date_cb") and "organize_by_date" in settings:
+                    self.organize_by_date_cb.setChecked(settings["organize_by_date"])
                     
-                    # 載入基本設定
-                    if "download_path" in settings:
-                        self.folder_input.setText(settings["download_path"])
+                # 載入網路設定 - 添加 cookies 相關設定
+                if hasattr(self, "use_cookies_cb") and "use_cookies" in settings:
+                    self.use_cookies_cb.setChecked(settings["use_cookies"])
                     
-                    if "max_concurrent_downloads" in settings:
-                        index = self.concurrent_combo.findText(str(settings["max_concurrent_downloads"]))
-                        if index >= 0:
-                            self.concurrent_combo.setCurrentIndex(index)
+                if hasattr(self, "cookies_path_input") and "cookies_file" in settings:
+                    self.cookies_path_input.setText(settings["cookies_file"])
                     
-                    if "show_notification" in settings:
-                        self.notify_cb.setChecked(settings["show_notification"])
+                if hasattr(self, "use_proxy_cb") and "use_proxy" in settings:
+                    self.use_proxy_cb.setChecked(settings["use_proxy"])
                     
-                    if "play_sound" in settings:
-                        self.sound_cb.setChecked(settings["play_sound"])
+                if hasattr(self, "proxy_type_combo") and "proxy_type" in settings:
+                    index = self.proxy_type_combo.findText(settings["proxy_type"])
+                    if index >= 0:
+                        self.proxy_type_combo.setCurrentIndex(index)
+                        
+                if hasattr(self, "proxy_address_input") and "proxy_address" in settings:
+                    self.proxy_address_input.setText(settings["proxy_address"])
                     
-                    if "auto_open_folder" in settings:
-                        self.open_folder_cb.setChecked(settings["auto_open_folder"])
+                if hasattr(self, "proxy_port_input") and "proxy_port" in settings:
+                    self.proxy_port_input.setText(settings["proxy_port"])
                     
-                    if "file_exists_action" in settings:
-                        if settings["file_exists_action"] == "ask":
-                            self.ask_radio.setChecked(True)
-                        elif settings["file_exists_action"] == "rename":
-                            self.rename_radio.setChecked(True)
-                        elif settings["file_exists_action"] == "overwrite":
-                            self.overwrite_radio.setChecked(True)
+                if hasattr(self, "use_auth_cb") and "use_proxy_auth" in settings:
+                    self.use_auth_cb.setChecked(settings["use_proxy_auth"])
                     
-                    # 載入格式與品質設定
-                    if hasattr(self, "default_format_combo") and "default_format" in settings:
-                        index = self.default_format_combo.findText(settings["default_format"])
-                        if index >= 0:
-                            self.default_format_combo.setCurrentIndex(index)
+                if hasattr(self, "proxy_username_input") and "proxy_username" in settings:
+                    self.proxy_username_input.setText(settings["proxy_username"])
                     
-                    if hasattr(self, "default_resolution_combo") and "default_resolution" in settings:
-                        index = self.default_resolution_combo.findText(settings["default_resolution"])
-                        if index >= 0:
-                            self.default_resolution_combo.setCurrentIndex(index)
+                if hasattr(self, "proxy_password_input") and "proxy_password" in settings:
+                    self.proxy_password_input.setText(settings["proxy_password"])
                     
-                    if hasattr(self, "audio_quality_combo") and "audio_quality" in settings:
-                        index = self.audio_quality_combo.findText(settings["audio_quality"])
-                        if index >= 0:
-                            self.audio_quality_combo.setCurrentIndex(index)
+                if hasattr(self, "retry_spin") and "retry_count" in settings:
+                    self.retry_spin.setValue(settings["retry_count"])
                     
-                    if hasattr(self, "prefer_av1_cb") and "prefer_av1" in settings:
-                        self.prefer_av1_cb.setChecked(settings["prefer_av1"])
+                if hasattr(self, "wait_spin") and "retry_wait" in settings:
+                    self.wait_spin.setValue(settings["retry_wait"])
                     
-                    if hasattr(self, "fallback_to_webm_cb") and "fallback_to_webm" in settings:
-                        self.fallback_to_webm_cb.setChecked(settings["fallback_to_webm"])
+                if hasattr(self, "timeout_spin") and "timeout" in settings:
+                    self.timeout_spin.setValue(settings["timeout"])
                     
-                    if hasattr(self, "auto_merge_cb") and "auto_merge" in settings:
-                        self.auto_merge_cb.setChecked(settings["auto_merge"])
+                if hasattr(self, "disable_ssl_cb") and "disable_ssl" in settings:
+                    self.disable_ssl_cb.setChecked(settings["disable_ssl"])
                     
-                    # 載入命名設定
-                    if hasattr(self, "default_prefix_input") and "default_prefix" in settings:
-                        self.default_prefix_input.setText(settings["default_prefix"])
+                if hasattr(self, "auto_open_external_cb") and "auto_open_external" in settings:
+                    self.auto_open_external_cb.setChecked(settings["auto_open_external"])
+                
+                # 效能設定
+                if hasattr(self, "buffer_size_spin") and "buffer_size_mb" in settings:
+                    self.buffer_size_spin.setValue(settings["buffer_size_mb"])
                     
-                    if hasattr(self, "sanitize_filename_cb") and "sanitize_filename" in settings:
-                        self.sanitize_filename_cb.setChecked(settings["sanitize_filename"])
+                if hasattr(self, "speed_limit_spin") and "speed_limit_kbps" in settings:
+                    self.speed_limit_spin.setValue(settings["speed_limit_kbps"])
                     
-                    if hasattr(self, "add_timestamp_cb") and "add_timestamp" in settings:
-                        self.add_timestamp_cb.setChecked(settings["add_timestamp"])
+                if hasattr(self, "memory_limit_spin") and "memory_limit_mb" in settings:
+                    self.memory_limit_spin.setValue(settings["memory_limit_mb"])
                     
-                    if hasattr(self, "truncate_filename_cb") and "truncate_filename" in settings:
-                        self.truncate_filename_cb.setChecked(settings["truncate_filename"])
+                if hasattr(self, "fragment_concurrency_cb") and "fragment_concurrency" in settings:
+                    self.fragment_concurrency_cb.setChecked(settings["fragment_concurrency"])
                     
-                    if hasattr(self, "max_length_spin") and "max_filename_length" in settings:
-                        self.max_length_spin.setValue(settings["max_filename_length"])
+                if hasattr(self, "max_connections_spin") and "max_connections" in settings:
+                    self.max_connections_spin.setValue(settings["max_connections"])
                     
-                    if hasattr(self, "create_subfolders_cb") and "create_subfolders" in settings:
-                        self.create_subfolders_cb.setChecked(settings["create_subfolders"])
+                if hasattr(self, "parallel_streams_cb") and "parallel_streams" in settings:
+                    self.parallel_streams_cb.setChecked(settings["parallel_streams"])
                     
-                    if hasattr(self, "organize_by_date_cb") and "organize_by_date" in settings:
-                        self.organize_by_date_cb.setChecked(settings["organize_by_date"])
-                        
-                    # 載入網路設定 - 添加 cookies 相關設定
-                    if hasattr(self, "use_cookies_cb") and "use_cookies" in settings:
-                        self.use_cookies_cb.setChecked(settings["use_cookies"])
-                        
-                    if hasattr(self, "cookies_path_input") and "cookies_file" in settings:
-                        self.cookies_path_input.setText(settings["cookies_file"])
-                        
-                    if hasattr(self, "use_proxy_cb") and "use_proxy" in settings:
-                        self.use_proxy_cb.setChecked(settings["use_proxy"])
-                        
-                    if hasattr(self, "proxy_type_combo") and "proxy_type" in settings:
-                        index = self.proxy_type_combo.findText(settings["proxy_type"])
-                        if index >= 0:
-                            self.proxy_type_combo.setCurrentIndex(index)
-                            
-                    if hasattr(self, "proxy_address_input") and "proxy_address" in settings:
-                        self.proxy_address_input.setText(settings["proxy_address"])
-                        
-                    if hasattr(self, "proxy_port_input") and "proxy_port" in settings:
-                        self.proxy_port_input.setText(settings["proxy_port"])
-                        
-                    if hasattr(self, "use_auth_cb") and "use_proxy_auth" in settings:
-                        self.use_auth_cb.setChecked(settings["use_proxy_auth"])
-                        
-                    if hasattr(self, "proxy_username_input") and "proxy_username" in settings:
-                        self.proxy_username_input.setText(settings["proxy_username"])
-                        
-                    if hasattr(self, "proxy_password_input") and "proxy_password" in settings:
-                        self.proxy_password_input.setText(settings["proxy_password"])
-                        
-                    if hasattr(self, "retry_spin") and "retry_count" in settings:
-                        self.retry_spin.setValue(settings["retry_count"])
-                        
-                    if hasattr(self, "wait_spin") and "retry_wait" in settings:
-                        self.wait_spin.setValue(settings["retry_wait"])
-                        
-                    if hasattr(self, "timeout_spin") and "timeout" in settings:
-                        self.timeout_spin.setValue(settings["timeout"])
-                        
-                    if hasattr(self, "disable_ssl_cb") and "disable_ssl" in settings:
-                        self.disable_ssl_cb.setChecked(settings["disable_ssl"])
-                        
-                    if hasattr(self, "auto_open_external_cb") and "auto_open_external" in settings:
-                        self.auto_open_external_cb.setChecked(settings["auto_open_external"])
+                if hasattr(self, "download_engine_combo") and "download_engine" in settings:
+                    engine_index = self.download_engine_combo.findData(settings["download_engine"])
+                    if engine_index >= 0:
+                        self.download_engine_combo.setCurrentIndex(engine_index)
+                    
+                if hasattr(self, "metadata_workers_spin") and "metadata_workers" in settings:
+                    self.metadata_workers_spin.setValue(settings["metadata_workers"])
+                    
+                if hasattr(self, "use_archive_cb") and "use_download_archive" in settings:
+                    self.use_archive_cb.setChecked(settings["use_download_archive"])
                     
-                    log("從文件載入設定成功")
+                if hasattr(self, "platform_limit_spins") and "platform_limits" in settings:
+                    for name, spin in self.platform_limit_spins.items():
+                        if name in settings["platform_limits"]:
+                            spin.setValue(settings["platform_limits"][name])
+                    
+                if hasattr(self, "archive_path_input") and "download_archive_file" in settings:
+                    self.archive_path_input.setText(settings["download_archive_file"])
+                
+                log("從文件載入設定成功")
         except Exception as e:
             log(f"載入設定失敗: {str(e)}")
 
@@ -4870,6 +5629,20 @@ class SettingsTab(QWidget):
         
         platform_layout.addWidget(notes_group)
         
+        # 各平台同時下載數上限
+        limits_group = QGroupBox("各平台同時下載數上限 (0 = 只受最大同時下載數限制)")
+        limits_layout = QGridLayout(limits_group)
+        self.platform_limit_spins = {}
+        for index, name in enumerate(PLATFORMS):
+            spin = QSpinBox()
+            spin.setRange(0, 16)
+            spin.setValue(DEFAULT_PLATFORM_LIMITS.get(name, 0))
+            limits_layout.addWidget(QLabel(f"{name}:"), index // 2, (index % 2) * 2)
+            limits_layout.addWidget(spin, index // 2, (index % 2) * 2 + 1)
+            self.platform_limit_spins[name] = spin
+        
+        platform_layout.addWidget(limits_group)
+        
         # Cookies說明
         cookies_group = QGroupBox("關於Cookies")
         cookies_layout = QVBoxLayout(cookies_group)
@@ -4982,26 +5755,21 @@ class SettingsTab(QWidget):
     def load_external_urls_settings(self):
         """載入外部下載替代網址設定"""
         try:
-            settings_path = get_settings_path()
-            if os.path.exists(settings_path):
-                with open(settings_path, "r", encoding="utf-8") as f:
-                    settings = json.load(f)
-                    
-                    # 載入外部下載替代網址設定
-                    if "external_urls" in settings:
-                        external_urls = settings["external_urls"]
-                        if "youtube" in external_urls:
-                            self.youtube_url_input.setText(external_urls["youtube"])
-                        if "instagram" in external_urls:
-                            self.ig_url_input.setText(external_urls["instagram"])
-                        if "twitter" in external_urls:
-                            self.twitter_url_input.setText(external_urls["twitter"])
-                        if "tiktok" in external_urls:
-                            self.tiktok_url_input.setText(external_urls["tiktok"])
-                        if "facebook" in external_urls:
-                            self.facebook_url_input.setText(external_urls["facebook"])
-                        if "threads" in external_urls:
-                            self.threads_url_input.setText(external_urls["threads"])
+            # 載入外部下載替代網址設定
+            external_urls = get_app_settings().get_section("external_urls")
+            if external_urls:
+                if "youtube" in external_urls:
+                    self.youtube_url_input.setText(external_urls["youtube"])
+                if "instagram" in external_urls:
+                    self.ig_url_input.setText(external_urls["instagram"])
+                if "twitter" in external_urls:
+                    self.twitter_url_input.setText(external_urls["twitter"])
+                if "tiktok" in external_urls:
+                    self.tiktok_url_input.setText(external_urls["tiktok"])
+                if "facebook" in external_urls:
+                    self.facebook_url_input.setText(external_urls["facebook"])
+                if "threads" in external_urls:
+                    self.threads_url_input.setText(external_urls["threads"])
         except Exception as e:
             log(f"載入外部下載替代網址設定失敗: {str(e)}")
             
@@ -5030,23 +5798,8 @@ class SettingsTab(QWidget):
         
         # 保存到用戶偏好文件
         try:
-            settings_path = get_settings_path()
-            
-            # 讀取現有設定（如果存在）
-            existing_settings = {}
-            if os.path.exists(settings_path):
-                with open(settings_path, "r", encoding="utf-8") as f:
-                    try:
-                        existing_settings = json.load(f)
-                    except:
-                        existing_settings = {}
-            
-            # 更新設定
-            existing_settings["external_urls"] = external_urls
-            
-            # 保存設定
-            with open(settings_path, "w", encoding="utf-8") as f:
-                json.dump(existing_settings, f, ensure_ascii=False, indent=4)
+            # 用戶按下套用時立即寫入
+            get_app_settings().set("external_urls", external_urls, immediate=True)
                 
             log("外部下載替代網址設定已保存")
             QMessageBox.information(self, "設定已套用", "外部下載替代網址設定已成功套用並保存。")
@@ -5065,6 +5818,18 @@ class SettingsTab(QWidget):
         if file_path:
             self.cookies_path_input.setText(file_path)
 
+    def browse_archive(self):
+        """瀏覽下載存檔檔案（可選擇既有的 yt-dlp 存檔）"""
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "選擇下載存檔檔案",
+            self.archive_path_input.text(),
+            "Text files (*.txt);;All files (*.*)",
+            options=QFileDialog.DontConfirmOverwrite
+        )
+        if file_path:
+            self.archive_path_input.setText(file_path)
+
     def create_performance_settings(self):
         """創建效能設定頁面"""
         performance_widget = QWidget()
@@ -5074,6 +5839,16 @@ class SettingsTab(QWidget):
         performance_group = QGroupBox("下載效能設定")
         perf_layout = QVBoxLayout(performance_group)
         
+        # 下載引擎
+        engine_layout = QHBoxLayout()
+        engine_layout.addWidget(QLabel("下載引擎:"))
+        self.download_engine_combo = QComboBox()
+        for engine, engine_label in DOWNLOAD_ENGINES.items():
+            self.download_engine_combo.addItem(engine_label, engine)
+        engine_layout.addWidget(self.download_engine_combo)
+        engine_layout.addStretch(1)
+        perf_layout.addLayout(engine_layout)
+        
         # 緩衝區大小
         buffer_layout = QHBoxLayout()
         buffer_layout.addWidget(QLabel("下載緩衝區大小 (MB):"))
@@ -5104,8 +5879,63 @@ class SettingsTab(QWidget):
         memory_layout.addStretch(1)
         perf_layout.addLayout(memory_layout)
         
+        # 片段並行下載（DASH/HLS 串流）
+        self.fragment_concurrency_cb = QCheckBox("同時下載多個影片片段 (DASH/HLS)")
+        self.fragment_concurrency_cb.setChecked(True)
+        perf_layout.addWidget(self.fragment_concurrency_cb)
+        
+        connections_layout = QHBoxLayout()
+        connections_layout.addWidget(QLabel("總連線數上限 (由進行中的任務平分):"))
+        self.max_connections_spin = QSpinBox()
+        self.max_connections_spin.setRange(1, 64)
+        self.max_connections_spin.setValue(16)
+        connections_layout.addWidget(self.max_connections_spin)
+        connections_layout.addStretch(1)
+        perf_layout.addLayout(connections_layout)
+        self.fragment_concurrency_cb.toggled.connect(self.max_connections_spin.setEnabled)
+        
+        # 影片資訊預先解析
+        prefetch_layout = QHBoxLayout()
+        prefetch_layout.addWidget(QLabel("同時預先解析影片資訊數量:"))
+        self.metadata_workers_spin = QSpinBox()
+        self.metadata_workers_spin.setRange(1, 16)
+        self.metadata_workers_spin.setValue(4)
+        prefetch_layout.addWidget(self.metadata_workers_spin)
+        prefetch_layout.addStretch(1)
+        perf_layout.addLayout(prefetch_layout)
+        
+        # 影片與音訊並行下載
+        self.parallel_streams_cb = QCheckBox("同時下載影片與音訊串流後再合併 (需要 FFmpeg)")
+        self.parallel_streams_cb.setChecked(True)
+        perf_layout.addWidget(self.parallel_streams_cb)
+        
         performance_layout.addWidget(performance_group)
         
+        # 下載存檔（與 yt-dlp --download-archive 相容）
+        archive_group = QGroupBox("下載存檔")
+        archive_layout = QVBoxLayout(archive_group)
+        
+        self.use_archive_cb = QCheckBox("記錄已下載的影片，之後貼上時直接略過 (與 yt-dlp --download-archive 相容)")
+        self.use_archive_cb.setChecked(False)
+        archive_layout.addWidget(self.use_archive_cb)
+        
+        archive_path_layout = QHBoxLayout()
+        archive_path_layout.addWidget(QLabel("存檔檔案:"))
+        self.archive_path_input = QLineEdit()
+        self.archive_path_input.setPlaceholderText("預設: 設定檔資料夾中的 download_archive.txt")
+        archive_path_layout.addWidget(self.archive_path_input)
+        
+        self.browse_archive_btn = QPushButton("瀏覽...")
+        self.browse_archive_btn.clicked.connect(self.browse_archive)
+        archive_path_layout.addWidget(self.browse_archive_btn)
+        archive_layout.addLayout(archive_path_layout)
+        self.use_archive_cb.toggled.connect(self.archive_path_input.setEnabled)
+        self.use_archive_cb.toggled.connect(self.browse_archive_btn.setEnabled)
+        self.archive_path_input.setEnabled(self.use_archive_cb.isChecked())
+        self.browse_archive_btn.setEnabled(self.use_archive_cb.isChecked())
+        
+        performance_layout.addWidget(archive_group)
+        
         # 系統資源設定
         system_group = QGroupBox("系統資源設定")
         system_layout = QVBoxLayout(system_group)
@@ -5169,11 +5999,10 @@ class MainWindow(QMainWindow):
         super().__init__()
         
         # 載入設定
-        settings_path = get_settings_path()
-        if os.path.exists(settings_path):
+        settings_service = get_app_settings()
+        if settings_service.exists():
             try:
-                with open(settings_path, "r", encoding="utf-8") as f:
-                    settings = json.load(f)
+                settings = settings_service.as_dict()
                 
                 # 載入基本設定
                 self.download_path = settings.get("download_path", os.path.join(os.path.expanduser("~"), "Downloads"))
@@ -5208,78 +6037,81 @@ class MainWindow(QMainWindow):
         
         # 顯示狀態欄
         self.statusBar().showMessage("就緒")
+        
+        # 視窗顯示後檢查是否有上次未完成的下載任務
+        QTimer.singleShot(1500, self.download_tab.restore_unfinished_jobs)
     
     def load_window_settings(self):
         """載入視窗大小和位置設定"""
         try:
-            settings_path = get_settings_path()
+            settings_service = get_app_settings()
+            settings_path = settings_service.settings_path
             
-            if os.path.exists(settings_path):
-                with open(settings_path, "r", encoding="utf-8") as f:
-                    settings = json.load(f)
-                    
-                    # 載入視窗標題
-                    if "window_title" in settings:
-                        self.setWindowTitle(settings["window_title"])
-                        log(f"已載入視窗標題: {settings['window_title']}")
-                    
-                    # 載入字體大小設定
-                    if "font_size" in settings:
-                        self.font_size = settings["font_size"]
-                        log(f"已載入字體大小設定: {self.font_size}")
-                    
-                    # 載入內容字體大小設定
-                    if "content_font_size" in settings:
-                        self.content_font_size = settings["content_font_size"]
-                        log(f"已載入內容字體大小設定: {self.content_font_size}")
-                    
-                    # 載入下載路徑
-                    if "download_path" in settings:
-                        self.download_path = settings["download_path"]
-                        log(f"已載入下載路徑: {self.download_path}")
-                    
-                    # 優先檢查是否有直接的視窗大小設定
-                    if "window_size" in settings:
-                        width = settings["window_size"].get("width", 1200)
-                        height = settings["window_size"].get("height", 800)
-                        # 檢查螢幕範圍
+            if settings_service.exists():
+                settings = settings_service.as_dict()
+                
+                # 載入視窗標題
+                if "window_title" in settings:
+                    self.setWindowTitle(settings["window_title"])
+                    log(f"已載入視窗標題: {settings['window_title']}")
+                
+                # 載入字體大小設定
+                if "font_size" in settings:
+                    self.font_size = settings["font_size"]
+                    log(f"已載入字體大小設定: {self.font_size}")
+                
+                # 載入內容字體大小設定
+                if "content_font_size" in settings:
+                    self.content_font_size = settings["content_font_size"]
+                    log(f"已載入內容字體大小設定: {self.content_font_size}")
+                
+                # 載入下載路徑
+                if "download_path" in settings:
+                    self.download_path = settings["download_path"]
+                    log(f"已載入下載路徑: {self.download_path}")
+                
+                # 優先檢查是否有直接的視窗大小設定
+                if "window_size" in settings:
+                    width = settings["window_size"].get("width", 1200)
+                    height = settings["window_size"].get("height", 800)
+                    # 檢查螢幕範圍
+                    screen_geo = QApplication.primaryScreen().geometry()
+                    if width > 200 and height > 200 and width < screen_geo.width() * 0.9 and height < screen_geo.height() * 0.9:
+                        self.resize(width, height)
+                        log(f"已載入視窗大小設定: 寬度={width}, 高度={height}")
+                
+                # 載入視窗大小和位置 (從window_geometry)
+                elif "window_geometry" in settings:
+                    geometry = settings["window_geometry"]
+                    if "x" in geometry and "y" in geometry and "width" in geometry and "height" in geometry:
+                        # 檢查視窗是否在螢幕範圍內
                         screen_geo = QApplication.primaryScreen().geometry()
-                        if width > 200 and height > 200 and width < screen_geo.width() * 0.9 and height < screen_geo.height() * 0.9:
-                            self.resize(width, height)
-                            log(f"已載入視窗大小設定: 寬度={width}, 高度={height}")
-                    
-                    # 載入視窗大小和位置 (從window_geometry)
-                    elif "window_geometry" in settings:
-                        geometry = settings["window_geometry"]
-                        if "x" in geometry and "y" in geometry and "width" in geometry and "height" in geometry:
-                            # 檢查視窗是否在螢幕範圍內
-                            screen_geo = QApplication.primaryScreen().geometry()
+                        
+                        # 確保視窗至少一部分在螢幕內，且尺寸合理
+                        if (geometry["x"] < screen_geo.width() and 
+                            geometry["y"] < screen_geo.height() and
+                            geometry["x"] + geometry["width"] > 0 and
+                            geometry["y"] + geometry["height"] > 0 and
+                            geometry["width"] >= 800 and geometry["height"] >= 600):
                             
-                            # 確保視窗至少一部分在螢幕內，且尺寸合理
-                            if (geometry["x"] < screen_geo.width() and 
-                                geometry["y"] < screen_geo.height() and
-                                geometry["x"] + geometry["width"] > 0 and
-                                geometry["y"] + geometry["height"] > 0 and
-                                geometry["width"] >= 800 and geometry["height"] >= 600):
-                                
-                                # 調整位置確保視窗完全顯示在螢幕中
-                                x = max(0, min(geometry["x"], screen_geo.width() - geometry["width"]))
-                                y = max(0, min(geometry["y"], screen_geo.height() - geometry["height"]))
-                                
-                                self.setGeometry(
-                                    x, 
-                                    y, 
-                                    geometry["width"], 
-                                    geometry["height"]
-                                )
-                                log(f"已載入視窗大小和位置設定: x={x}, y={y}, 寬={geometry['width']}, 高={geometry['height']}")
-                                
-                                # 檢查是否需要最大化
-                                if settings.get("window_maximized", False):
-                                    self.showMaximized()
-                                    log("已將視窗設為最大化")
-                    
-                    log(f"已從 {settings_path} 載入設定")
+                            # 調整位置確保視窗完全顯示在螢幕中
+                            x = max(0, min(geometry["x"], screen_geo.width() - geometry["width"]))
+                            y = max(0, min(geometry["y"], screen_geo.height() - geometry["height"]))
+                            
+                            self.setGeometry(
+                                x, 
+                                y, 
+                                geometry["width"], 
+                                geometry["height"]
+                            )
+                            log(f"已載入視窗大小和位置設定: x={x}, y={y}, 寬={geometry['width']}, 高={geometry['height']}")
+                            
+                            # 檢查是否需要最大化
+                            if settings.get("window_maximized", False):
+                                self.showMaximized()
+                                log("已將視窗設為最大化")
+                
+                log(f"已從 {settings_path} 載入設定")
             else:
                 # 如果沒有設定或設定不完整，使用預設值
                 self.setGeometry(100, 100, 1200, 800)
@@ -5380,11 +6212,18 @@ class MainWindow(QMainWindow):
             self.tab_widget.setTabToolTip(1, "監控下載進度和管理任務")
             log("成功初始化下載進度標籤頁")
             
-            # 確保下載進度頁的 downloads_layout 存在並可見
-            if not hasattr(self.progress_tab, 'downloads_layout'):
-                log("警告：下載進度頁缺少必要的佈局元素")
+            # 確保下載進度頁的列表模型存在
+            if not hasattr(self.progress_tab, 'downloads_model'):
+                log("警告：下載進度頁缺少必要的列表模型")
             else:
-                log(f"下載進度頁佈局元素檢查通過，項目數量: {self.progress_tab.downloads_layout.count()}")
+                log(f"下載進度頁列表模型檢查通過，項目數量: {self.progress_tab.downloads_model.rowCount()}")
+            
+            # 進度快照表的合併更新直接送到下載進度頁
+            if hasattr(self.progress_tab, 'apply_progress_updates'):
+                self.download_tab.progress_table.updates_ready.connect(self.progress_tab.apply_progress_updates)
+            
+            # 顯示目前的同時下載數（自動調整時定時更新）
+            self.download_tab.update_concurrency_status()
             
             # 設置一個定時器，定期同步下載項目到進度頁面
             self.sync_timer = QTimer(self)
@@ -5415,16 +6254,10 @@ class MainWindow(QMainWindow):
         
         # 恢復上次選擇的標籤頁
         try:
-            import os
-            settings_path = get_settings_path()
-            if os.path.exists(settings_path):
-                with open(settings_path, "r", encoding="utf-8") as f:
-                    settings = json.load(f)
-                    if "current_tab_index" in settings:
-                        tab_index = settings["current_tab_index"]
-                        if 0 <= tab_index < self.tab_widget.count():
-                            self.tab_widget.setCurrentIndex(tab_index)
-                            log(f"已恢復標籤頁索引: {tab_index}")
+            tab_index = get_app_settings().get_int("current_tab_index", -1)
+            if 0 <= tab_index < self.tab_widget.count():
+                self.tab_widget.setCurrentIndex(tab_index)
+                log(f"已恢復標籤頁索引: {tab_index}")
         except Exception as e:
             log(f"恢復標籤頁索引失敗: {str(e)}")
         
@@ -5437,14 +6270,10 @@ class MainWindow(QMainWindow):
                 self.sync_download_items_to_progress_tab()
                 
                 # 確保進度標籤頁中的項目可見
-                if hasattr(self.progress_tab, 'downloads_layout') and self.progress_tab.downloads_layout.count() > 0:
+                if hasattr(self.progress_tab, 'download_items'):
                     # 檢查是否有下載項目
-                    item_count = 0
-                    for i in range(self.progress_tab.downloads_layout.count()):
-                        item = self.progress_tab.downloads_layout.itemAt(i)
-                        if item and item.widget():
-                            item_count += 1
-                            
+                    item_count = len(self.progress_tab.download_items)
+                    
                     if item_count > 0:
                         log(f"下載進度頁有 {item_count} 個項目")
                     else:
@@ -5461,8 +6290,9 @@ class MainWindow(QMainWindow):
                                         log(f"重新添加下載項目到進度標籤頁: {filename}")
                                         
                                         # 連接信號
-                                        thread.progress.connect(lambda message, percent, speed, eta: 
-                                                              self.progress_tab.update_download_progress(filename, message, percent, speed, eta))
+                                        thread.progress.connect(lambda message, percent, speed, eta, t=thread: 
+                                                              self.progress_tab.update_download_progress(filename, message, percent, speed, eta,
+                                                                                                         state=t.state))
                                         thread.finished.connect(lambda success, message, file_path: 
                                                               self.progress_tab.update_task_status(filename, success, message, file_path))
         except Exception as e:
@@ -5479,6 +6309,9 @@ class MainWindow(QMainWindow):
         if "default_prefix" in settings:
             self.download_tab.update_download_prefix(settings["default_prefix"])
         
+        # 更新速度限制等效能設定
+        self.download_tab.set_performance_settings(settings)
+        
         # 切換回下載頁籤
         self.tab_widget.setCurrentIndex(0)
         
@@ -5560,24 +6393,11 @@ class MainWindow(QMainWindow):
     def save_font_size(self):
         """保存字體大小設定"""
         try:
-            settings_path = get_settings_path()
-            
-            # 讀取現有設定（如果存在）
-            settings = {}
-            if os.path.exists(settings_path):
-                with open(settings_path, "r", encoding="utf-8") as f:
-                    try:
-                        settings = json.load(f)
-                    except:
-                        settings = {}
-            
-            # 更新字體大小設定
-            settings["font_size"] = self.font_size
-            settings["content_font_size"] = getattr(self, 'content_font_size', self.font_size)
-            
-            # 保存設定
-            with open(settings_path, "w", encoding="utf-8") as f:
-                json.dump(settings, f, ensure_ascii=False, indent=4)
+            # 更新字體大小設定（連續調整時合併為一次寫入）
+            get_app_settings().update({
+                "font_size": self.font_size,
+                "content_font_size": getattr(self, 'content_font_size', self.font_size),
+            })
                 
             log(f"已保存字體大小設定: 介面字體={self.font_size}, 內容字體={getattr(self, 'content_font_size', self.font_size)}")
         except Exception as e:
@@ -5620,8 +6440,9 @@ class MainWindow(QMainWindow):
                                     self.progress_tab.add_download_item(filename, url, thread)
                                     
                                     # 連接進度信號到進度標籤頁
-                                    thread.progress.connect(lambda message, percent, speed, eta, f=filename: 
-                                                        self.progress_tab.update_download_progress(f, message, percent, speed, eta))
+                                    thread.progress.connect(lambda message, percent, speed, eta, f=filename, t=thread: 
+                                                        self.progress_tab.update_download_progress(f, message, percent, speed, eta,
+                                                                                                   state=t.state))
                                     
                                     # 連接完成信號到進度標籤頁
                                     thread.finished.connect(lambda success, message, file_path, f=filename: 
@@ -5632,10 +6453,14 @@ class MainWindow(QMainWindow):
                                     if filename in self.download_tab.download_items and 'progress_bar' in self.download_tab.download_items[filename]:
                                         progress_value = self.download_tab.download_items[filename]['progress_bar'].value()
                                     
-                                    # 更新一次進度
-                                    self.progress_tab.update_download_progress(filename, "同步中...", progress_value, "--", "--")
+                                    # 更新一次進度（優先使用進度快照表中的最新進度）
+                                    snapshot = self.download_tab.progress_table.snapshot(filename)
+                                    if snapshot is not None:
+                                        self.progress_tab.update_download_progress(filename, *snapshot)
+                                    else:
+                                        self.progress_tab.update_download_progress(filename, "同步中...", progress_value, "--", "--")
                                     
-                                    log(f"成功同步項目到進度標籤頁: {filename}")
+                                    log(f"成功同步項目到進度標籤頁: {filename}", LOG_DEBUG)
                                 except Exception as item_e:
                                     log(f"同步項目 {filename} 到進度標籤頁失敗: {str(item_e)}")
                                     import traceback
@@ -5663,16 +6488,8 @@ class MainWindow(QMainWindow):
     def save_window_settings(self):
         """保存視窗大小和位置設定"""
         try:
-            settings_path = get_settings_path()
-            
-            # 讀取現有設定（如果存在）
+            settings_service = get_app_settings()
             settings = {}
-            if os.path.exists(settings_path):
-                with open(settings_path, "r", encoding="utf-8") as f:
-                    try:
-                        settings = json.load(f)
-                    except:
-                        settings = {}
             
             # 獲取當前視窗位置和大小
             geometry = self.geometry()
@@ -5703,10 +6520,6 @@ class MainWindow(QMainWindow):
             # 保存標籤頁索引
             settings["current_tab_index"] = self.tab_widget.currentIndex()
             
-            # 確保UI設定存在
-            if "ui_settings" not in settings:
-                settings["ui_settings"] = {}
-            
             # 保存下載頁籤的前綴設定
             if hasattr(self, 'download_tab') and hasattr(self.download_tab, 'prefix_combo'):
                 current_prefix = self.download_tab.prefix_combo.currentText()
@@ -5716,11 +6529,11 @@ class MainWindow(QMainWindow):
                 if hasattr(self.download_tab, 'prefix_history'):
                     settings["prefix_history"] = self.download_tab.prefix_history
             
-            # 保存設定
-            with open(settings_path, "w", encoding="utf-8") as f:
-                json.dump(settings, f, ensure_ascii=False, indent=4)
+            # 保存設定（確保UI設定區段存在）
+            settings_service.update(settings)
+            settings_service.update_section("ui_settings", {})
                 
-            log(f"已保存所有設定到setup.json: {settings_path}")
+            log(f"已保存所有設定到setup.json: {settings_service.settings_path}")
         except Exception as e:
             log(f"保存設定失敗: {str(e)}")
             
@@ -5741,14 +6554,13 @@ class MainWindow(QMainWindow):
         
         # 更新版本信息
         try:
-            settings_path = get_settings_path()
-            if os.path.exists(settings_path):
-                with open(settings_path, "r", encoding="utf-8") as f:
-                    settings = json.load(f)
-                settings["version"] = "1.73"  # 更新版本號
-                with open(settings_path, "w", encoding="utf-8") as f:
-                    json.dump(settings, f, ensure_ascii=False, indent=4)
+            settings_service = get_app_settings()
+            if settings_service.exists():
+                settings_service.set("version", "1.73")  # 更新版本號
                 log("已更新設定檔版本信息")
+            
+            # 上面各項設定只更新在記憶體中，關閉前一次寫入
+            settings_service.flush()
         except Exception as e:
             log(f"更新設定檔版本信息失敗: {str(e)}")
         
@@ -5756,13 +6568,15 @@ class MainWindow(QMainWindow):
         active_downloads = False
         if hasattr(self, 'download_tab') and hasattr(self.download_tab, 'download_threads'):
             active_downloads = len(self.download_tab.download_threads) > 0
+        if hasattr(self, 'download_tab') and hasattr(self.download_tab, 'download_queue'):
+            active_downloads = active_downloads or self.download_tab.download_queue.pending_count() > 0
         
         if active_downloads:
             # 詢問用戶是否確定要退出
             reply = QMessageBox.question(
                 self, 
                 "確認退出", 
-                "有下載任務正在進行中，確定要退出嗎？\n退出將取消所有正在進行的下載。",
+                "有下載任務正在進行中，確定要退出嗎？\n未完成的下載將在下次啟動時詢問是否繼續。",
                 QMessageBox.Yes | QMessageBox.No,
                 QMessageBox.No
             )
@@ -5771,7 +6585,19 @@ class MainWindow(QMainWindow):
                 event.ignore()
                 return
         
-        # 取消所有下載
+        # 停止記錄任務日誌，讓未完成的任務保持可恢復狀態
+        if hasattr(self, 'download_tab') and hasattr(self.download_tab, 'job_journal'):
+            self.download_tab.job_journal.close()
+        
+        # 停止展開播放清單，清空等待中的佇列並取消所有下載
+        if hasattr(self, 'download_tab') and hasattr(self.download_tab, 'playlist_expanders'):
+            self.download_tab.cancel_playlist_expansion()
+        if hasattr(self, 'download_tab') and hasattr(self.download_tab, 'metadata_prefetcher'):
+            self.download_tab.metadata_prefetcher.shutdown()
+        if hasattr(self, 'download_tab') and hasattr(self.download_tab, 'stall_watchdog'):
+            self.download_tab.stall_watchdog.stop()
+        if hasattr(self, 'download_tab') and hasattr(self.download_tab, 'download_queue'):
+            self.download_tab.download_queue.clear()
         if hasattr(self, 'download_tab') and hasattr(self.download_tab, 'download_threads'):
             for filename, thread in list(self.download_tab.download_threads.items()):
                 try:
@@ -5804,11 +6630,12 @@ class MainWindow(QMainWindow):
 
 def check_create_setup_json():
     """檢查setup.json是否存在，如果不存在則創建一個預設的設定檔"""
-    settings_path = get_settings_path()
+    settings_service = get_app_settings()
+    settings_path = settings_service.settings_path
     
     log(f"檢查設定檔: {settings_path}")
     
-    if not os.path.exists(settings_path):
+    if not settings_service.exists():
         log("未找到setup.json，創建預設設定檔...")
         default_settings = {
             "window_title": "多平台影片下載器",
@@ -5827,6 +6654,7 @@ def check_create_setup_json():
             "content_font_size": 11,
             "download_path": str(Path.home() / "Downloads"),
             "max_concurrent_downloads": 2,
+            "auto_concurrency": False,
             "current_format": "最高品質",
             "current_resolution": "最高畫質",
             "current_prefix": "",
@@ -5852,13 +6680,23 @@ def check_create_setup_json():
                 "x": "https://twittervideodownloader.com/?url={url}",
                 "unknown": "https://savefrom.net/?url={url}"
             },
-            "auto_open_external": false,
+            "auto_open_external": False,
+            "buffer_size_mb": 16,
+            "speed_limit_kbps": 0,
+            "memory_limit_mb": 500,
+            "fragment_concurrency": True,
+            "max_connections": 16,
+            "parallel_streams": True,
+            "download_engine": "native",
+            "metadata_workers": 4,
+            "use_download_archive": False,
+            "download_archive_file": "",
+            "platform_limits": dict(DEFAULT_PLATFORM_LIMITS),
             "version": "1.73"
         }
         
         try:
-            with open(settings_path, "w", encoding="utf-8") as f:
-                json.dump(default_settings, f, ensure_ascii=False, indent=4)
+            settings_service.update(default_settings, immediate=True)
             log(f"已創建預設setup.json設定檔於: {settings_path}")
         except Exception as e:
             log(f"創建setup.json失敗: {str(e)}")
@@ -5877,8 +6715,7 @@ def main():
     
     # 載入設定
     try:
-        with open(settings_path, "r", encoding="utf-8") as f:
-            settings = json.load(f)
+        settings = get_app_settings().as_dict()
     
         # 設定應用程式資訊
         window_title = settings.get("window_title", "多平台影片下載器")
@@ -11,24 +11,186 @@ import urllib.request
 import subprocess
 import datetime
 import re
+import queue
+import atexit
+import threading
+
+try:
+    from src.platform_registry import lookup_platform, UNKNOWN_DESCRIPTOR
+except ImportError:
+    from platform_registry import lookup_platform, UNKNOWN_DESCRIPTOR
+
+# 日誌等級
+LOG_DEBUG = 10
+LOG_INFO = 20
+LOG_WARNING = 30
+LOG_ERROR = 40
+
+LOG_LEVEL_NAMES = {
+    LOG_DEBUG: "DEBUG",
+    LOG_INFO: "INFO",
+    LOG_WARNING: "WARNING",
+    LOG_ERROR: "ERROR",
+}
+
+# 低於此等級的日誌直接丟棄（不格式化、不進入佇列）
+_log_level = LOG_INFO
+
+
+class _LogWriter:
+    """非同步日誌寫入器
+
+    log() 只把訊息放進佇列，由單一背景線程批次寫入。
+    背景線程持有一個開啟的檔案，依日期與檔案大小輪替，
+    每批訊息只 flush 一次，避免下載線程被磁碟 I/O 拖慢。
+    """
+
+    MAX_BATCH = 200  # 每批最多寫入的訊息數
+    FLUSH_INTERVAL = 0.5  # 無新訊息時的等待時間（秒）
+    MAX_FILE_SIZE = 10 * 1024 * 1024  # 單一日誌檔大小上限，超過則輪替
+
+    def __init__(self, log_dir):
+        self.log_dir = log_dir
+        self.queue = queue.SimpleQueue()
+        self._file = None
+        self._file_date = None
+        self._file_index = 0
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="LogWriter", daemon=True)
+        self._thread.start()
+
+    def write(self, line):
+        """放入一行日誌（不阻塞呼叫端）"""
+        self.queue.put(line)
+
+    def _run(self):
+        while True:
+            try:
+                line = self.queue.get(timeout=self.FLUSH_INTERVAL)
+            except queue.Empty:
+                continue
+            if line is None:
+                break
+
+            # 一次取出佇列中已累積的訊息，合併成一批寫入
+            batch = [line]
+            stop = False
+            while len(batch) < self.MAX_BATCH:
+                try:
+                    line = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if line is None:
+                    stop = True
+                    break
+                batch.append(line)
+
+            self._write_batch(batch)
+            if stop:
+                break
+        self._close_file()
+
+    def _write_batch(self, batch):
+        text = "\n".join(batch) + "\n"
+
+        # 輸出到主控台（打包成視窗程式時 stdout 可能不存在）
+        if sys.stdout is not None:
+            try:
+                sys.stdout.write(text)
+                sys.stdout.flush()
+            except Exception:
+                pass
+
+        # 保存到日誌檔案
+        try:
+            handle = self._get_file()
+            handle.write(text)
+            handle.flush()
+        except Exception as e:
+            if sys.stdout is not None:
+                print(f"無法寫入日誌檔案: {str(e)}")
+            self._close_file()
+
+    def _log_path(self, date_str, index):
+        if index == 0:
+            return os.path.join(self.log_dir, f"downloader_{date_str}.log")
+        return os.path.join(self.log_dir, f"downloader_{date_str}_{index}.log")
+
+    def _get_file(self):
+        """取得目前的日誌檔，必要時依日期或大小輪替"""
+        date_str = datetime.datetime.now().strftime('%Y-%m-%d')
+
+        if self._file is not None and self._file_date != date_str:
+            self._close_file()
+            self._file_index = 0
+
+        if self._file is not None and self._file.tell() >= self.MAX_FILE_SIZE:
+            self._close_file()
+            self._file_index += 1
+
+        if self._file is None:
+            if not os.path.exists(self.log_dir):
+                os.makedirs(self.log_dir)
+            # 跳過今天已經寫滿的檔案
+            path = self._log_path(date_str, self._file_index)
+            while os.path.exists(path) and os.path.getsize(path) >= self.MAX_FILE_SIZE:
+                self._file_index += 1
+                path = self._log_path(date_str, self._file_index)
+            self._file = open(path, "a", encoding="utf-8")
+            self._file_date = date_str
+
+        return self._file
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+            self._file = None
+
+    def stop(self, timeout=2.0):
+        """寫完佇列中剩餘的訊息後停止（程式結束時自動呼叫）"""
+        if self._stopped:
+            return
+        self._stopped = True
+        self.queue.put(None)
+        self._thread.join(timeout)
+
+
+_log_writer = None
+_log_writer_lock = threading.Lock()
+
+
+def _get_log_writer():
+    """延遲建立日誌寫入器（第一次寫日誌時才啟動背景線程）"""
+    global _log_writer
+    if _log_writer is None:
+        with _log_writer_lock:
+            if _log_writer is None:
+                log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
+                _log_writer = _LogWriter(log_dir)
+                atexit.register(_log_writer.stop)
+    return _log_writer
+
+
+def set_log_level(level):
+    """設定日誌等級，低於此等級的訊息會被丟棄"""
+    global _log_level
+    _log_level = level
+
+
+def log(message, level=LOG_INFO):
+    """輸出日誌（非同步寫入主控台與日誌檔案）"""
+    if level < _log_level:
+        return
 
-def log(message):
-    """輸出日誌"""
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_message = f"[{timestamp}] {message}"
-    print(log_message)
-    
-    # 保存到日誌檔案
-    try:
-        log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-            
-        log_file = os.path.join(log_dir, f"downloader_{datetime.datetime.now().strftime('%Y-%m-%d')}.log")
-        with open(log_file, "a", encoding="utf-8") as f:
-            f.write(log_message + "\n")
-    except Exception as e:
-        print(f"無法寫入日誌檔案: {str(e)}")
+    if level == LOG_INFO:
+        log_message = f"[{timestamp}] {message}"
+    else:
+        log_message = f"[{timestamp}] [{LOG_LEVEL_NAMES.get(level, level)}] {message}"
+    _get_log_writer().write(log_message)
 
 def get_system_info():
     """獲取系統信息"""
@@ -226,69 +388,17 @@ def identify_platform(url):
     - Instagram
     - Bilibili
     - X (Twitter)
+    - Threads
     
     返回:
     - 平台名稱
     - 是否需要登入 (cookie)
-    - 平台特定的下載選項
+    - 平台特定的下載選項（唯讀）
     """
-    # 定義平台的正則表達式模式
-    patterns = {
-        "YouTube": r"(?:https?://)?(?:www\.|m\.)?(?:youtube\.com|youtu\.be)/.+",
-        "TikTok": r"(?:https?://)?(?:www\.|m\.)?(?:tiktok\.com|vm\.tiktok\.com|vt\.tiktok\.com)/.+",
-        "抖音": r"(?:https?://)?(?:www\.|v\.)?douyin\.com/.+",
-        "Facebook": r"(?:https?://)?(?:www\.|m\.)?(?:facebook\.com|fb\.com|fb\.watch)/.+",
-        "Instagram": r"(?:https?://)?(?:www\.|m\.)?instagram\.com/.+",
-        "Bilibili": r"(?:https?://)?(?:www\.|m\.)?bilibili\.com/.+",
-        "X": r"(?:https?://)?(?:www\.|mobile\.)?(?:twitter\.com|x\.com)/.+",
-    }
-    
-    # 檢查URL匹配哪個平台
-    for platform, pattern in patterns.items():
-        if re.match(pattern, url, re.IGNORECASE):
-            # 設定平台特定的下載選項和登入需求
-            platform_info = {
-                "name": platform,
-                "needs_login": False,
-                "download_options": {}
-            }
-            
-            # 設定平台特定的登入需求和下載選項
-            if platform == "Facebook":
-                platform_info["needs_login"] = True
-                platform_info["download_options"] = {
-                    "format": "best[ext=mp4]/bestvideo[ext=mp4]+bestaudio/best",
-                }
-            elif platform == "Instagram":
-                platform_info["needs_login"] = True
-                platform_info["download_options"] = {
-                    "format": "best[ext=mp4]/bestvideo[ext=mp4]+bestaudio/best",
-                }
-            elif platform == "Bilibili":
-                platform_info["download_options"] = {
-                    "format": "best[ext=mp4]/bestvideo[ext=mp4]+bestaudio/best",
-                }
-            elif platform == "TikTok" or platform == "抖音":
-                platform_info["download_options"] = {
-                    "format": "best[ext=mp4]/bestvideo[ext=mp4]+bestaudio/best",
-                }
-            elif platform == "X":
-                platform_info["download_options"] = {
-                    "format": "best[ext=mp4]/bestvideo[ext=mp4]+bestaudio/best",
-                }
-            else:  # YouTube 和其他平台
-                platform_info["download_options"] = {
-                    "format": "bestvideo[height<=1080][ext=mp4]+bestaudio[ext=m4a]/best[height<=1080][ext=mp4]/best",
-                }
-            
-            return platform_info
-    
-    # 如果沒有匹配的平台
-    return {
-        "name": "未知",
-        "needs_login": False,
-        "download_options": {}
-    }
+    # 平台資訊為唯讀且依網址快取，不可直接修改
+    if not isinstance(url, str):
+        return UNKNOWN_DESCRIPTOR
+    return lookup_platform(url)
 
 def get_supported_platforms():
     """
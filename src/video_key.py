@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多平台影片下載器 - 影片標準 ID
+
+以 yt-dlp 的 extractor 從網址取得 (extractor, 影片ID)，不需要連線，
+youtu.be/X、youtube.com/watch?v=X&t=10、m.youtube.com/... 都會得到相同的結果。
+同一主機的網址優先嘗試上次符合的 extractor，不必每次走訪上千個 extractor。
+"""
+
+import threading
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+from yt_dlp.extractor import gen_extractor_classes
+
+_lock = threading.Lock()
+_extractors = None  # [(順序, extractor)]
+_host_hints = {}  # 主機名稱 -> 曾經符合的 [(順序, extractor)]
+
+
+def _all_extractors():
+    global _extractors
+    if _extractors is None:
+        _extractors = list(enumerate(gen_extractor_classes()))
+    return _extractors
+
+
+def _find_extractor(url):
+    try:
+        host = urlsplit(url).hostname
+    except ValueError:
+        host = None
+
+    # 同一主機曾經符合的 extractor（依 yt-dlp 的優先順序）
+    for _, ie in _host_hints.get(host, ()):
+        if ie.suitable(url):
+            return ie
+
+    for entry in _all_extractors():
+        ie = entry[1]
+        if ie.suitable(url):
+            if host and ie.ie_key() != "Generic":
+                _host_hints[host] = sorted(_host_hints.get(host, []) + [entry], key=lambda item: item[0])
+            return ie
+    return None
+
+
+@lru_cache(maxsize=16384)
+def video_key(url):
+    """返回網址的 (extractor, 影片ID)；無法辨識時返回 None"""
+    url = url.strip()
+    with _lock:
+        ie = _find_extractor(url)
+    if ie is None or ie.ie_key() == "Generic":
+        return None
+    video_id = ie.get_temp_id(url)
+    if not video_id:
+        return None
+    return ie.ie_key(), video_id
+
+
+def canonical_key(url):
+    """以字串表示的標準 ID（extractor:id），無法辨識時使用網址本身"""
+    key = video_key(url)
+    if key is None:
+        return f"url:{url.strip()}"
+    return f"{key[0]}:{key[1]}"
+
+
+def warm_up():
+    """預先編譯所有 extractor 的網址規則（在背景線程呼叫，避免第一次辨識時卡住介面）"""
+    video_key("https://warm-up.invalid/")
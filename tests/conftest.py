@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+單元測試共用設定：讓測試以 src.xxx 的方式導入模組（與程式本身相同的導入路徑）
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def log_to_tmp(tmp_path_factory):
+    """測試期間的日誌寫到暫存資料夾，不寫入 src/logs"""
+    import src.utils as utils
+    writer = utils._LogWriter(str(tmp_path_factory.mktemp("logs")))
+    previous, utils._log_writer = utils._log_writer, writer
+    yield writer
+    writer.stop()
+    utils._log_writer = previous
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """需要 Qt 物件（QObject、QTimer）的測試共用同一個 QCoreApplication"""
+    from PySide6.QtCore import QCoreApplication
+    return QCoreApplication.instance() or QCoreApplication([])
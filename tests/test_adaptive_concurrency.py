@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+自動調整同時下載數測試（以假的 monotonic 時鐘模擬評估間隔）
+"""
+
+import pytest
+
+import src.adaptive_concurrency as adaptive_concurrency
+from src.adaptive_concurrency import AdaptiveConcurrency
+from src.retry_policy import ERROR_RATE_LIMITED, ERROR_TRANSIENT
+
+KB = 1024
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(adaptive_concurrency.time, "monotonic", clock)
+    return clock
+
+
+def settle(controller, clock):
+    """等到調整後的穩定時間結束"""
+    clock.now = max(clock.now, controller._changed_at + AdaptiveConcurrency.SETTLE_SECONDS)
+
+
+def measure(controller, clock, speeds, saturated=True):
+    """穩定後每個評估間隔回報一次速度，返回第一次調整後的數量；取得足夠樣本仍不調整時返回 None"""
+    settle(controller, clock)
+    for _ in range(AdaptiveConcurrency.MIN_SAMPLES):
+        for job, speed in speeds.items():
+            controller.report(job, speed)
+        level = controller.evaluate(saturated)
+        clock.now += AdaptiveConcurrency.EVALUATE_INTERVAL
+        if level is not None:
+            return level
+    return None
+
+
+def test_increases_while_throughput_grows(clock):
+    """佇列有等待中的任務且總速度持續上升時，每次增加一個名額"""
+    controller = AdaptiveConcurrency(level=2)
+    assert measure(controller, clock, {"a": 500 * KB, "b": 500 * KB}) == 3
+    assert measure(controller, clock, {"a": 500 * KB, "b": 500 * KB, "c": 500 * KB}) == 4
+    assert controller.throughput == 1500 * KB
+
+
+def test_backs_off_when_extra_job_adds_nothing(clock):
+    """增加名額後總速度沒有上升，退回上一個數量並暫停試探"""
+    controller = AdaptiveConcurrency(level=2)
+    assert measure(controller, clock, {"a": 500 * KB, "b": 500 * KB}) == 3
+    assert measure(controller, clock, {"a": 340 * KB, "b": 330 * KB, "c": 330 * KB}) == 2
+
+    # 暫停期間不再增加
+    assert measure(controller, clock, {"a": 500 * KB, "b": 500 * KB}) is None
+    assert controller.level == 2
+
+    clock.now += AdaptiveConcurrency.HOLD_SECONDS
+    assert measure(controller, clock, {"a": 500 * KB, "b": 500 * KB}) == 3
+
+
+def test_does_not_increase_without_waiting_jobs(clock):
+    """佇列沒有等待中的任務時維持目前的數量"""
+    controller = AdaptiveConcurrency(level=2)
+    assert measure(controller, clock, {"a": 500 * KB, "b": 500 * KB}, saturated=False) is None
+    assert controller.level == 2
+
+
+def test_waits_for_jobs_to_settle(clock):
+    """調整後的穩定時間內、或沒有任何速度回報時不做判斷"""
+    controller = AdaptiveConcurrency(level=2)
+    controller.report("a", 500 * KB)
+    assert controller.evaluate(True) is None
+    assert controller._samples == []
+
+    settle(controller, clock)
+    assert controller.evaluate(True) is None  # 回報已超過 STALE_SECONDS
+    assert controller._samples == []
+
+
+def test_rate_limit_halves_immediately(clock):
+    """平台回應 429 時立即減半，不等待穩定時間"""
+    controller = AdaptiveConcurrency(level=6)
+    controller.record_error(ERROR_TRANSIENT)
+    assert controller.evaluate(True) is None
+    controller.record_error(ERROR_RATE_LIMITED)
+    assert controller.evaluate(True) == 3
+    # 限速狀態只影響一次評估
+    assert controller.evaluate(True) is None
+
+
+def test_per_job_slowdown_reduces_level(clock):
+    """單一任務速度大幅下降時減少四分之一"""
+    controller = AdaptiveConcurrency(level=8)
+    speeds = {str(index): 400 * KB for index in range(8)}
+    assert measure(controller, clock, speeds, saturated=False) is None
+
+    slow = {str(index): 100 * KB for index in range(8)}
+    assert measure(controller, clock, slow, saturated=False) == 6
+
+
+def test_levels_are_clamped(clock):
+    controller = AdaptiveConcurrency(level=50, max_level=4)
+    assert controller.level == 4
+    controller.reset(0)
+    assert controller.level == AdaptiveConcurrency.MIN_LEVEL
+    controller.record_error(ERROR_RATE_LIMITED)
+    assert controller.evaluate(True) is None  # 已是最小值
+
+
+def test_finished_jobs_stop_counting(clock):
+    controller = AdaptiveConcurrency(level=2)
+    controller.report("a", 500 * KB)
+    controller.report("b", 300 * KB)
+    controller.job_finished("b")
+    controller.evaluate(False)
+    assert controller.throughput == 500 * KB
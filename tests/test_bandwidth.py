@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+頻寬管理測試
+"""
+
+import pytest
+
+import src.bandwidth as bandwidth
+from src.bandwidth import BandwidthManager
+
+
+class FakeClock:
+    """取代 time.monotonic，讓令牌桶的計算不受實際時間影響"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(bandwidth.time, "monotonic", clock)
+    return clock
+
+
+def test_unlimited_by_default():
+    """沒有速度限制時不設定 ratelimit 與分段大小，取用流量不需要等待"""
+    manager = BandwidthManager()
+    manager.job_started("a")
+    options = manager.job_options("a")
+    assert options["ratelimit"] is None
+    assert options["http_chunk_size"] is None
+    assert manager.job_rate("a") is None
+    assert manager.reserve(10 * 1024 * 1024, "a") == 0
+
+
+def transferring(manager, *jobs):
+    """任務收到第一批資料（開始參與分配）"""
+    for job in jobs:
+        manager.reserve(1, job)
+
+
+def test_share_follows_weights():
+    """外部下載器的速度上限依權重分配給正在傳輸的任務"""
+    manager = BandwidthManager(speed_limit_kbps=900)
+    manager.job_started("a", weight=2)
+    manager.job_started("b", weight=1)
+    transferring(manager, "a", "b")
+    assert manager.job_rate("a") == 600 * 1024
+    assert manager.job_rate("b") == 300 * 1024
+
+    manager.set_weight("b", 2)
+    assert manager.job_rate("a") == manager.job_rate("b") == 450 * 1024
+
+
+def test_jobs_join_only_when_bytes_flow():
+    """解析資訊中的任務不佔用分配，收到資料後才參與"""
+    manager = BandwidthManager(speed_limit_kbps=1000, max_connections=8)
+    manager.job_started("a")
+    manager.job_started("b")
+    transferring(manager, "a")
+    assert manager.active_count() == 1
+    assert manager.job_rate("a") == 1000 * 1024
+    assert manager.connection_share("a") == 8
+
+    transferring(manager, "b")
+    assert manager.active_count() == 2
+    assert manager.job_rate("a") == 500 * 1024
+
+
+def test_rebalance_updates_bound_params():
+    """任務開始傳輸、暫停、繼續與結束時，已綁定的 yt-dlp 參數立即更新"""
+    manager = BandwidthManager(speed_limit_kbps=1000, max_connections=8)
+    params = {}
+    manager.job_started("a")
+    manager.bind("a", params)
+    transferring(manager, "a")
+    assert params["concurrent_fragment_downloads"] == 8
+
+    manager.job_started("b")
+    assert params["concurrent_fragment_downloads"] == 8  # b 還在解析資訊
+    transferring(manager, "b")
+    assert params["concurrent_fragment_downloads"] == 4
+    manager.job_paused("b")
+    assert params["concurrent_fragment_downloads"] == 8
+    manager.job_resumed("b")
+    assert params["concurrent_fragment_downloads"] == 8  # 再次收到資料前不參與
+    transferring(manager, "b")
+    assert params["concurrent_fragment_downloads"] == 4
+    manager.job_finished("b")
+    assert params["concurrent_fragment_downloads"] == 8
+    assert manager.active_count() == 1
+
+
+def test_ratelimit_is_divided_across_fragment_connections():
+    """ratelimit 套用在每個片段連線上；單一任務最多可使用全部頻寬，總量由令牌桶限制"""
+    manager = BandwidthManager(speed_limit_kbps=1600, max_connections=8)
+    manager.job_started("a")
+    manager.job_started("b")
+    transferring(manager, "a", "b")
+    options = manager.job_options("a")
+    assert options["concurrent_fragment_downloads"] == 4
+    assert options["ratelimit"] == 400 * 1024
+    assert options["http_chunk_size"] is not None
+    assert options["buffersize"] <= options["ratelimit"]
+    assert manager.connection_share("a") == 4
+
+
+def test_fragment_concurrency_disabled():
+    """關閉片段並行時每個任務只使用一個連線"""
+    manager = BandwidthManager(fragment_concurrency=False, max_connections=8)
+    manager.job_started("a")
+    assert manager.job_options("a")["concurrent_fragment_downloads"] == 1
+
+
+def test_all_jobs_share_one_bucket(clock):
+    """所有任務從同一個令牌桶取用，總速度不超過上限"""
+    manager = BandwidthManager(speed_limit_kbps=100)
+    rate = 100 * 1024
+    assert manager.reserve(rate // 2, "a") == pytest.approx(0.5)
+    assert manager.reserve(rate // 2, "b") == pytest.approx(1.0)
+
+    clock.now += 1.0
+    assert manager.reserve(rate, "a") == pytest.approx(1.0)
+
+
+def test_idle_share_is_usable_by_other_jobs(clock):
+    """其他任務沒有取用時，單一任務可以使用全部頻寬"""
+    manager = BandwidthManager(speed_limit_kbps=100)
+    manager.job_started("a")
+    manager.job_started("slow")
+    transferring(manager, "a", "slow")
+    rate = 100 * 1024
+    clock.now += 1.0
+    waits = []
+    for _ in range(10):
+        waits.append(manager.reserve(rate // 10, "a"))
+        clock.now += 0.1
+    assert max(waits) == pytest.approx(0, abs=0.02)
+
+
+def test_token_bucket_burst_is_capped(clock):
+    """閒置一段時間後最多只能累積 BURST_SECONDS 的流量"""
+    manager = BandwidthManager(speed_limit_kbps=100)
+    manager.reserve(1, "a")
+    clock.now += 60
+    rate = 100 * 1024
+    assert manager.reserve(rate, "a") == 0
+    assert manager.reserve(rate, "a") == pytest.approx(1.0, abs=1e-3)
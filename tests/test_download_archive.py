@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+下載存檔測試（與 yt-dlp --download-archive 相容）
+"""
+
+from yt_dlp import YoutubeDL
+
+from src.download_archive import DownloadArchive, archive_id
+
+YOUTUBE_URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+def write_archive(path, *entries):
+    path.write_text("".join(entry + "\n" for entry in entries), encoding="utf-8")
+    return str(path)
+
+
+def test_archive_id_matches_yt_dlp():
+    """網址的項目與 yt-dlp 寫入存檔的格式相同"""
+    assert archive_id(YOUTUBE_URL) == "youtube dQw4w9WgXcQ"
+    assert archive_id("https://youtu.be/dQw4w9WgXcQ") == "youtube dQw4w9WgXcQ"
+    assert archive_id("https://example.com/video.mp4") is None
+
+
+def test_loads_existing_archive(tmp_path):
+    """讀取既有的存檔（略過空行）"""
+    archive = DownloadArchive(write_archive(tmp_path / "archive.txt",
+                                            "youtube dQw4w9WgXcQ", "", "bilibili BV1xx"))
+    assert len(archive) == 2
+    assert archive.contains_url("https://youtu.be/dQw4w9WgXcQ")
+    assert "bilibili BV1xx" in archive
+    assert not archive.contains_url("https://www.youtube.com/watch?v=aaaaaaaaaaa")
+    assert not archive.contains_url("https://example.com/video.mp4")
+
+
+def test_missing_archive_is_empty(tmp_path):
+    archive = DownloadArchive(str(tmp_path / "missing.txt"))
+    assert len(archive) == 0
+    assert not archive.contains_url(YOUTUBE_URL)
+
+
+def test_add_appends_once(tmp_path):
+    """新增的項目寫入檔案，重複的項目不再寫入"""
+    path = tmp_path / "archive.txt"
+    archive = DownloadArchive(str(path))
+    archive.contains_url(YOUTUBE_URL)  # 等待載入完成
+    archive.add("youtube dQw4w9WgXcQ")
+    archive.add("youtube dQw4w9WgXcQ")
+    assert archive.contains_url(YOUTUBE_URL)
+    assert path.read_text(encoding="utf-8") == "youtube dQw4w9WgXcQ\n"
+    assert DownloadArchive(str(path)).contains_url(YOUTUBE_URL)
+
+
+def test_compact_mode_for_large_archives(tmp_path, monkeypatch):
+    """大型存檔只保存雜湊，查詢結果與一般模式相同"""
+    monkeypatch.setattr(DownloadArchive, "COMPACT_BYTES", 0)
+    entries = [f"youtube id{index:08d}" for index in range(1000)]
+    archive = DownloadArchive(write_archive(tmp_path / "archive.txt", *entries))
+    assert len(archive) == 1000
+    assert not archive._entries
+    assert all(entry in archive for entry in entries[::97])
+    assert "youtube missing" not in archive
+
+    archive.add("youtube new")
+    assert "youtube new" in archive
+
+
+def test_does_not_wait_when_asked(tmp_path, monkeypatch):
+    """介面線程查詢時不等待尚未載入完成的存檔"""
+    monkeypatch.setattr(DownloadArchive, "_load", lambda self: None)
+    archive = DownloadArchive(write_archive(tmp_path / "archive.txt", "youtube dQw4w9WgXcQ"))
+    assert not archive.contains_url(YOUTUBE_URL, wait=False)
+    archive.add("youtube other")  # 不會因等待載入而卡住
+    assert (tmp_path / "archive.txt").read_text(encoding="utf-8").endswith("youtube other\n")
+
+
+def test_works_as_yt_dlp_download_archive(tmp_path):
+    """可直接作為 yt-dlp 的 download_archive 選項"""
+    archive = DownloadArchive(write_archive(tmp_path / "archive.txt", "youtube dQw4w9WgXcQ"))
+    with YoutubeDL({"download_archive": archive, "quiet": True}) as ydl:
+        assert ydl.in_download_archive({"id": "dQw4w9WgXcQ", "extractor_key": "Youtube"})
+        assert not ydl.in_download_archive({"id": "other", "extractor_key": "Youtube"})
+        ydl.record_download_archive({"id": "other", "extractor_key": "Youtube"})
+    assert "youtube other" in archive
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+下載引擎的單元測試：aria2c 進度解析、暫停與速度上限改變時重新啟動、yt-dlp 結構改變時改用 native
+"""
+
+import sys
+import types
+
+import pytest
+import yt_dlp
+
+import src.download_engine as engine
+from src.download_engine import Aria2cProgressFD, _READOUT_RE, _parse_eta
+
+# 模擬 aria2c：記錄啟動參數，再輸出幾行進度
+FAKE_ARIA2C = '''
+import sys, time
+with open(sys.argv[1], "a") as f:
+    f.write(" ".join(a for a in sys.argv[2:] if a.startswith("--max-download-limit")) + "\\n")
+for i in range(1, 6):
+    print(f"[#2089b0 {i}.0MiB/5.0MiB({i * 20}%) CN:4 DL:1.0MiB ETA:{5 - i}s]", end="\\r", flush=True)
+    time.sleep(0.05)
+'''
+
+
+@pytest.fixture
+def downloader():
+    def make(**params):
+        ydl = yt_dlp.YoutubeDL({'quiet': True})
+        fd = Aria2cProgressFD(ydl, dict(ydl.params, **params))
+        fd._progress_filename = "video.mp4"
+        fd.reports = []
+        fd._hook_progress = lambda status, info_dict: fd.reports.append(status)
+        fd.to_screen = lambda *args, **kwargs: None
+        return fd
+    return make
+
+
+@pytest.fixture
+def fake_aria2c(tmp_path):
+    script = tmp_path / "aria2c.py"
+    script.write_text(FAKE_ARIA2C, encoding="utf-8")
+    launches = tmp_path / "launches.txt"
+
+    def cmd():
+        return [sys.executable, str(script), str(launches)]
+
+    def started():
+        return launches.read_text().splitlines() if launches.exists() else []
+    return types.SimpleNamespace(cmd=cmd, launches=started)
+
+
+def test_readout_regex():
+    match = _READOUT_RE.search("[#2089b0 400.0MiB/1.3GiB(29%) CN:16 DL:20MiB ETA:46s]")
+    assert match.group("done") == "400.0MiB"
+    assert match.group("total") == "1.3GiB"
+    assert match.group("speed") == "20MiB"
+    assert match.group("eta") == "46s"
+
+
+def test_readout_without_speed_and_eta():
+    match = _READOUT_RE.search("[#2089b0 0B/0B CN:1]")
+    assert match.group("done") == "0B"
+    assert match.group("speed") is None and match.group("eta") is None
+
+
+def test_parse_eta():
+    assert _parse_eta("1h2m3s") == 3723
+    assert _parse_eta("46s") == 46
+    assert _parse_eta(None) is None
+
+
+def test_report_readout_emits_progress(downloader):
+    fd = downloader()
+    assert fd._report_readout("[#2089b0 1.0MiB/4.0MiB(25%) CN:4 DL:512KiB ETA:6s]", {})
+    status = fd.reports[-1]
+    assert status["status"] == "downloading"
+    assert status["filename"] == "video.mp4"
+    assert status["downloaded_bytes"] == 1024 * 1024
+    assert status["total_bytes"] == 4 * 1024 * 1024
+    assert status["speed"] == 512 * 1024
+    assert status["eta"] == 6
+
+
+def test_report_readout_ignores_other_lines(downloader):
+    fd = downloader()
+    assert not fd._report_readout("05/01 12:00:00 [NOTICE] Download complete", {})
+    # 還沒取得檔案大小：視為進度行但不回報
+    assert fd._report_readout("[#2089b0 0B/0B CN:1]", {})
+    assert fd.reports == []
+
+
+def test_readout_lines_split_on_carriage_return():
+    import io
+    lines = list(Aria2cProgressFD._readout_lines(io.StringIO("a\rb\r\nc\n\nd")))
+    assert lines == ["a", "b", "c", "d"]
+
+
+def test_runs_once_without_changes(downloader, fake_aria2c):
+    fd = downloader(aria2c_rate_limit=lambda: 1000)
+    _, _, returncode = fd._call_process(fake_aria2c.cmd(), {})
+    assert returncode == 0
+    assert fake_aria2c.launches() == ["--max-download-limit=1000"]
+    assert fd.reports[-1]["downloaded_bytes"] == 5 * 1024 * 1024
+
+
+def test_restarts_when_rate_limit_changes(downloader, fake_aria2c):
+    limits = iter([1000])
+    fd = downloader(aria2c_rate_limit=lambda: next(limits, 5000))
+    fd.RESTART_INTERVAL = 0
+    fd._call_process(fake_aria2c.cmd(), {})
+    assert fake_aria2c.launches() == ["--max-download-limit=1000", "--max-download-limit=5000"]
+
+
+def test_small_rate_change_does_not_restart(downloader, fake_aria2c):
+    limits = iter([1000])
+    fd = downloader(aria2c_rate_limit=lambda: next(limits, 1100))
+    fd.RESTART_INTERVAL = 0
+    fd._call_process(fake_aria2c.cmd(), {})
+    assert fake_aria2c.launches() == ["--max-download-limit=1000"]
+
+
+def test_restarts_after_pause(downloader, fake_aria2c):
+    # 第一次讀到進度時暫停，之後的兩次檢查仍在暫停中，然後繼續
+    pauses = iter([True, True, True])
+    fd = downloader(aria2c_paused=lambda: next(pauses, False))
+    fd.PAUSE_POLL = 0.01
+    fd._call_process(fake_aria2c.cmd(), {})
+    assert fake_aria2c.launches() == ["", ""]
+
+
+def test_falls_back_to_native_when_registry_is_missing(monkeypatch):
+    monkeypatch.setattr(engine, "external", types.SimpleNamespace())
+    assert engine._register() is False
+
+    monkeypatch.setattr(engine, "_registered", False)
+    engine.aria2c_available.cache_clear()
+    try:
+        assert engine.resolve_engine(engine.ENGINE_ARIA2C) == engine.ENGINE_NATIVE
+        assert engine.engine_options(engine.ENGINE_ARIA2C) == {}
+    finally:
+        engine.aria2c_available.cache_clear()
+
+
+def test_falls_back_to_native_when_internals_change(monkeypatch):
+    class ChangedAria2cFD:
+        """模擬新版 yt-dlp：下載器不再有 _make_cmd/_call_process"""
+        @classmethod
+        def get_basename(cls):
+            return "aria2c"
+
+    monkeypatch.setattr(engine, "Aria2cFD", ChangedAria2cFD)
+    registry = {}
+    monkeypatch.setattr(engine, "external", types.SimpleNamespace(_BY_NAME=registry))
+    assert engine._register() is False
+    assert registry == {}
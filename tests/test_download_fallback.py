@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+備用下載方法的單元測試：沒有產生檔案的下載不能回報成功
+"""
+
+import pytest
+
+
+@pytest.fixture
+def thread(qapp, tmp_path, monkeypatch):
+    from src.tabbed_gui_demo import DownloadThread
+    thread = DownloadThread("https://example.com/v", str(tmp_path), "mp4", "best", "", True)
+    results = []
+    thread.finished.connect(lambda success, message, path: results.append((success, path)))
+    thread.results = results
+    monkeypatch.setattr(thread, "extract_video_info", lambda ydl: {'title': "video"})
+    return thread
+
+
+def download_to(thread, monkeypatch, path):
+    """讓 download_from_info 回報指定的檔案路徑（不連線）"""
+    monkeypatch.setattr(thread, "download_from_info", lambda ydl: {'title': "video", 'filepath': path})
+
+
+def test_fallback_without_file_fails(thread, monkeypatch, tmp_path):
+    download_to(thread, monkeypatch, str(tmp_path / "missing.mp4"))
+    with pytest.raises(Exception, match="沒有產生檔案"):
+        thread.fallback_download_method()
+    assert thread.results == []
+
+
+def test_segment_download_without_file_fails(thread, monkeypatch, tmp_path):
+    download_to(thread, monkeypatch, str(tmp_path / "missing.mp4"))
+    assert thread.try_segment_download() is False
+    assert thread.results == []
+
+
+def test_fallback_with_file_succeeds(thread, monkeypatch, tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"data")
+    download_to(thread, monkeypatch, str(path))
+    assert thread.fallback_download_method() is True
+    assert thread.results == [(True, str(path))]
+
+
+def test_fallback_tiers_do_not_ignore_errors(thread, monkeypatch, tmp_path):
+    import src.tabbed_gui_demo as gui
+    seen = []
+
+    class RecordingYoutubeDL(gui.yt_dlp.YoutubeDL):
+        def __init__(self, params=None, *args, **kwargs):
+            seen.append(params.get('ignoreerrors'))
+            super().__init__(params, *args, **kwargs)
+
+    monkeypatch.setattr(gui.yt_dlp, "YoutubeDL", RecordingYoutubeDL)
+    download_to(thread, monkeypatch, str(tmp_path / "missing.mp4"))
+    with pytest.raises(Exception):
+        thread.fallback_download_method()
+    thread.try_segment_download()
+    assert seen == [False, False]
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+下載佇列排程測試（直接呼叫 _dispatch，不需要事件循環）
+"""
+
+import pytest
+
+from src.download_queue import DownloadQueue, PRIORITY_URGENT, PRIORITY_BACKGROUND
+
+
+@pytest.fixture
+def started():
+    return []
+
+
+@pytest.fixture
+def queue(qapp, started):
+    return DownloadQueue(lambda filename, url: started.append(filename), max_concurrent=1)
+
+
+def run_all(queue, started):
+    """每次只完成一個任務，直到佇列清空，返回開始的順序"""
+    queue._dispatch()
+    while queue.active:
+        queue.job_finished(started[-1])
+        queue._dispatch()
+    return list(started)
+
+
+def test_respects_max_concurrent(queue, started):
+    """名額用滿時其餘任務留在佇列，任務結束後自動補上"""
+    queue.set_max_concurrent(2)
+    for name in ("a", "b", "c"):
+        queue.enqueue(name, f"https://example.com/{name}")
+    queue._dispatch()
+    assert started == ["a", "b"]
+    assert queue.pending_count() == 1
+
+    queue.job_finished("a")
+    queue._dispatch()
+    assert started == ["a", "b", "c"]
+    assert queue.active == {"b", "c"}
+
+
+def test_rejects_duplicate_jobs(queue, started):
+    """等待中或進行中的任務不會重複加入"""
+    assert queue.enqueue("a", "u")
+    assert not queue.enqueue("a", "u")
+    queue._dispatch()
+    assert not queue.enqueue("a", "u")
+
+
+def test_urgent_job_starts_first(queue, started):
+    """緊急任務一定在下一個空出的名額開始"""
+    queue.enqueue("a", "u", batch=1)
+    queue.enqueue("b", "u", batch=1)
+    queue.enqueue("c", "u", priority=PRIORITY_URGENT, batch=2)
+    assert run_all(queue, started) == ["c", "a", "b"]
+
+
+def test_batches_share_slots_fairly(queue, started):
+    """後加入的批次不必等前一個大批次全部下載完"""
+    for index in range(4):
+        queue.enqueue(f"a{index}", "u", batch=1)
+    queue.enqueue("b0", "u", batch=2)
+    queue.enqueue("b1", "u", batch=2)
+    assert run_all(queue, started) == ["a0", "b0", "a1", "b1", "a2", "a3"]
+
+
+def test_background_batch_gets_lower_share(queue, started):
+    """一般批次取得背景批次兩倍的名額"""
+    for index in range(4):
+        queue.enqueue(f"bg{index}", "u", priority=PRIORITY_BACKGROUND, batch=1)
+    for index in range(4):
+        queue.enqueue(f"n{index}", "u", batch=2)
+    order = run_all(queue, started)
+    assert order.index("n3") < order.index("bg3")
+    assert [name for name in order[:6] if name.startswith("n")] == ["n0", "n1", "n2", "n3"]
+
+
+def test_group_limit_does_not_block_other_groups(queue, started):
+    """分組已達上限時，後面其他分組的任務照常開始"""
+    queue.set_max_concurrent(3)
+    queue.group_of = lambda url: url.split("/")[2]
+    queue.set_group_limits({"a.com": 1})
+    queue.enqueue("a1", "https://a.com/1")
+    queue.enqueue("a2", "https://a.com/2")
+    queue.enqueue("b1", "https://b.com/1")
+    queue._dispatch()
+    assert started == ["a1", "b1"]
+
+    queue.job_finished("a1")
+    queue._dispatch()
+    assert started == ["a1", "b1", "a2"]
+
+
+def test_admission_delay_keeps_job_waiting(queue, started):
+    """admission 要求等待的任務留在佇列中，並設定重新分派的計時"""
+    queue.set_max_concurrent(2)
+    queue.admission = lambda job: 30 if "slow" in job.url else 0
+    queue.enqueue("a", "https://slow.com/1")
+    queue.enqueue("b", "https://fast.com/1")
+    queue._dispatch()
+    assert started == ["b"]
+    assert queue.pending_names == {"a"}
+    assert queue._wake_timer.isActive()
+    queue._wake_timer.stop()
+
+
+def test_start_failure_reports_and_releases_slot(qapp):
+    """啟動失敗的任務回報 job_failed，不放回佇列，名額讓給下一個任務"""
+    started, failed = [], []
+
+    def start(filename, url):
+        if filename == "bad":
+            raise RuntimeError("boom")
+        started.append(filename)
+
+    queue = DownloadQueue(start, max_concurrent=1)
+    queue.group_of = lambda url: "g"
+    queue.job_failed.connect(lambda filename, url, message: failed.append((filename, url, message)))
+    queue.enqueue("bad", "u1")
+    queue.enqueue("good", "u2")
+    queue._dispatch()
+
+    assert failed == [("bad", "u1", "boom")]
+    assert started == ["good"]
+    assert queue.active == {"good"}
+    assert queue.active_groups["g"] == 1
+    assert "bad" not in queue.pending_names
+
+
+def test_remove_and_peek(queue, started):
+    """移除等待中的任務；peek 依優先順序返回即將開始的任務"""
+    queue.enqueue("a", "u")
+    queue.enqueue("b", "u", priority=PRIORITY_URGENT)
+    queue.enqueue("c", "u")
+    assert [job.filename for job in queue.peek(2)] == ["b", "a"]
+    assert queue.remove("a")
+    assert not queue.remove("a")
+    assert [job.filename for job in queue.peek(5)] == ["b", "c"]
+
+
+def test_retry_keeps_priority_and_batch(queue, started):
+    """重新加入的任務沿用上次的優先順序與批次"""
+    queue.enqueue("a", "u", priority=PRIORITY_BACKGROUND, batch=7)
+    queue._dispatch()
+    queue.job_finished("a")
+    queue.enqueue("a", "u", front=True)
+    assert queue.priority_of("a") == PRIORITY_BACKGROUND
+    assert queue.pending[0].batch == 7
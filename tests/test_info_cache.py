@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+影片資訊快取測試
+"""
+
+import os
+
+import pytest
+
+import src.info_cache as info_cache
+from src.info_cache import InfoCache, PLATFORM_TTL, DEFAULT_TTL
+
+YOUTUBE_URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+class FakeClock:
+    """取代 time.time，模擬經過的時間"""
+
+    def __init__(self):
+        self.now = 1_800_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(info_cache.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = InfoCache(str(tmp_path / "info.sqlite3"))
+    yield cache
+    cache.close()
+
+
+def video_info(video_id, **fields):
+    info = {"_type": "video", "id": video_id, "title": f"影片 {video_id}", "formats": []}
+    info.update(fields)
+    return info
+
+
+def test_round_trip(cache):
+    """保存後可取回相同的資訊"""
+    cache.put(YOUTUBE_URL, video_info("dQw4w9WgXcQ", duration=212))
+    info = cache.get(YOUTUBE_URL)
+    assert info["title"] == "影片 dQw4w9WgXcQ"
+    assert info["duration"] == 212
+
+
+def test_same_video_from_different_urls(cache):
+    """同一部影片的不同網址共用同一筆快取"""
+    cache.put("https://youtu.be/dQw4w9WgXcQ", video_info("dQw4w9WgXcQ"))
+    assert cache.get(YOUTUBE_URL + "&t=30") is not None
+
+
+def test_entries_expire_per_platform(cache, clock):
+    """超過平台的有效時間後丟棄，其他平台使用預設的有效時間"""
+    other_url = "https://example.com/video.mp4"
+    cache.put(YOUTUBE_URL, video_info("dQw4w9WgXcQ"))
+    cache.put(other_url, video_info("other"))
+    assert InfoCache.ttl_for(YOUTUBE_URL) == PLATFORM_TTL["YouTube"]
+    assert InfoCache.ttl_for(other_url) == DEFAULT_TTL
+
+    clock.now += DEFAULT_TTL + 1
+    assert cache.get(other_url) is None
+    assert cache.get(YOUTUBE_URL) is not None
+
+    clock.now += PLATFORM_TTL["YouTube"]
+    assert cache.get(YOUTUBE_URL) is None
+
+
+def test_playlists_are_not_cached(cache):
+    """播放清單與空的結果不保存"""
+    cache.put(YOUTUBE_URL, {"_type": "playlist", "id": "PL1", "entries": []})
+    cache.put("https://example.com/a", None)
+    assert cache.get(YOUTUBE_URL) is None
+    assert cache.get("https://example.com/a") is None
+
+
+def test_invalidate(cache):
+    """下載連結失效時刪除快取"""
+    cache.put(YOUTUBE_URL, video_info("dQw4w9WgXcQ"))
+    cache.invalidate("https://youtu.be/dQw4w9WgXcQ")
+    assert cache.get(YOUTUBE_URL) is None
+
+
+def test_evicts_least_recently_used(tmp_path, clock):
+    """總大小超過上限時刪除最久沒有使用的項目"""
+    def url(index):
+        return f"https://example.com/{index}.mp4"
+
+    payload = os.urandom(4096).hex()  # 不易壓縮的內容，壓縮後每筆約 4 KB
+    cache = InfoCache(str(tmp_path / "info.sqlite3"), max_bytes=10 * 1024)
+    try:
+        cache.put(url(0), video_info("0", description=payload))
+        clock.now += 1
+        cache.put(url(1), video_info("1", description=payload))
+        clock.now += 1
+        assert cache.get(url(0)) is not None  # 項目 0 變成最近使用
+        clock.now += 1
+        cache.put(url(2), video_info("2", description=payload))
+
+        assert cache.get(url(0)) is not None
+        assert cache.get(url(1)) is None
+        assert cache.get(url(2)) is not None
+    finally:
+        cache.close()
+
+
+def test_unusable_database_disables_cache(tmp_path):
+    """無法開啟資料庫時快取停用，不影響下載"""
+    cache = InfoCache(str(tmp_path / "missing" / "info.sqlite3"))
+    cache.put(YOUTUBE_URL, video_info("dQw4w9WgXcQ"))
+    assert cache.get(YOUTUBE_URL) is None
+    cache.close()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+下載任務日誌測試
+"""
+
+import json
+
+from src.job_journal import (JobJournal, STATE_QUEUED, STATE_RUNNING, STATE_DONE,
+                             STATE_FAILED, STATE_CANCELLED)
+
+
+def reopen(journal):
+    """關閉日誌並以同一個檔案重新開啟（模擬程式重新啟動）"""
+    journal.close()
+    return JobJournal(journal.journal_path)
+
+
+def test_replay_restores_last_state(tmp_path):
+    """重新啟動後每個任務取得最後一次記錄的狀態，欄位逐次合併"""
+    journal = JobJournal(str(tmp_path / "jobs.jsonl"))
+    journal.record("a.mp4", STATE_QUEUED, "https://example.com/a", queued_at=1.0)
+    journal.record("a.mp4", STATE_RUNNING)
+    journal.record("b.mp4", STATE_QUEUED, "https://example.com/b", queued_at=2.0)
+    journal.record("b.mp4", STATE_FAILED, error="HTTP Error 503")
+
+    journal = reopen(journal)
+    assert journal.jobs["a.mp4"]["state"] == STATE_RUNNING
+    assert journal.jobs["a.mp4"]["url"] == "https://example.com/a"
+    assert journal.jobs["b.mp4"]["state"] == STATE_FAILED
+    assert journal.jobs["b.mp4"]["error"] == "HTTP Error 503"
+    journal.close()
+
+
+def test_unfinished_jobs_in_queue_order(tmp_path):
+    """只恢復排隊中或下載中的任務，依加入佇列的時間排序"""
+    journal = JobJournal(str(tmp_path / "jobs.jsonl"))
+    journal.record("late.mp4", STATE_QUEUED, "u1", queued_at=20.0)
+    journal.record("early.mp4", STATE_RUNNING, "u2", queued_at=10.0)
+    journal.record("done.mp4", STATE_DONE, "u3", queued_at=5.0)
+    journal.record("cancelled.mp4", STATE_CANCELLED, "u4", queued_at=1.0)
+    journal.record("no_url.mp4", STATE_QUEUED)
+
+    assert [job["job"] for job in journal.unfinished_jobs()] == ["early.mp4", "late.mp4"]
+    journal.close()
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    """崩潰時寫到一半的最後一行不影響其他記錄"""
+    path = tmp_path / "jobs.jsonl"
+    path.write_text(json.dumps({"job": "a.mp4", "state": STATE_QUEUED, "url": "u"}) + "\n"
+                    + '{"job": "a.mp4", "sta', encoding="utf-8")
+    journal = JobJournal(str(path))
+    assert journal.jobs["a.mp4"]["state"] == STATE_QUEUED
+    journal.close()
+
+
+def test_compact_keeps_only_unfinished_jobs(tmp_path):
+    """壓縮後日誌檔只剩未完成任務的最後狀態"""
+    journal = JobJournal(str(tmp_path / "jobs.jsonl"))
+    journal.record("a.mp4", STATE_QUEUED, "u1")
+    journal.record("a.mp4", STATE_RUNNING)
+    journal.record("b.mp4", STATE_QUEUED, "u2")
+    journal.record("b.mp4", STATE_DONE)
+    journal.compact()
+    journal.flush()
+
+    lines = (tmp_path / "jobs.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["job"] for line in lines] == ["a.mp4"]
+    assert set(journal.jobs) == {"a.mp4"}
+
+    journal.record("c.mp4", STATE_QUEUED, "u3")
+    journal = reopen(journal)
+    assert set(journal.jobs) == {"a.mp4", "c.mp4"}
+    journal.close()
+
+
+def test_compacts_automatically(tmp_path, monkeypatch):
+    """日誌行數超過門檻時自動壓縮，不會無限增長"""
+    monkeypatch.setattr(JobJournal, "COMPACT_THRESHOLD", 10)
+    journal = JobJournal(str(tmp_path / "jobs.jsonl"))
+    for index in range(25):
+        journal.record(f"{index}.mp4", STATE_QUEUED, "u")
+        journal.record(f"{index}.mp4", STATE_DONE)
+    journal.flush()
+
+    lines = (tmp_path / "jobs.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) <= JobJournal.COMPACT_THRESHOLD
+    journal.close()
+
+
+def test_many_unfinished_jobs_do_not_compact_every_record(tmp_path, monkeypatch):
+    """未完成的任務超過門檻時，壓縮後須累積到兩倍的行數才再次壓縮"""
+    monkeypatch.setattr(JobJournal, "COMPACT_THRESHOLD", 10)
+    journal = JobJournal(str(tmp_path / "jobs.jsonl"))
+    compactions = []
+    original = journal.compact
+    monkeypatch.setattr(journal, "compact", lambda: (compactions.append(1), original()))
+    for index in range(100):
+        journal.record(f"{index}.mp4", STATE_QUEUED, "u")
+    assert len(compactions) <= 5
+    assert len(journal.unfinished_jobs()) == 100
+    journal.close()
+
+
+def test_records_after_close_are_dropped(tmp_path):
+    """關閉後（程式結束時取消的任務）不再記錄"""
+    journal = JobJournal(str(tmp_path / "jobs.jsonl"))
+    journal.record("a.mp4", STATE_RUNNING, "u")
+    journal = reopen(journal)
+    journal.close()
+    journal.record("a.mp4", STATE_CANCELLED)
+
+    journal = JobJournal(journal.journal_path)
+    assert journal.jobs["a.mp4"]["state"] == STATE_RUNNING
+    journal.close()
+
+
+def test_progress_is_throttled_per_job(tmp_path):
+    """已下載位元組數每個任務每 PROGRESS_INTERVAL 秒最多記錄一次，重播時保留最新值與狀態"""
+    journal = JobJournal(str(tmp_path / "jobs.jsonl"))
+    journal.record("a.mp4", STATE_RUNNING, "u1")
+    journal.record("b.mp4", STATE_RUNNING, "u2")
+    interval = JobJournal.PROGRESS_INTERVAL
+
+    assert journal.record_progress("a.mp4", 100, now=1000.0)
+    assert not journal.record_progress("a.mp4", 200, now=1000.0 + interval / 2)
+    assert journal.record_progress("b.mp4", 50, now=1000.0 + interval / 2)
+    assert journal.record_progress("a.mp4", 300, now=1000.0 + interval)
+
+    journal = reopen(journal)
+    assert journal.jobs["a.mp4"]["bytes_done"] == 300
+    assert journal.jobs["a.mp4"]["state"] == STATE_RUNNING
+    assert journal.jobs["b.mp4"]["bytes_done"] == 50
+    journal.close()
+
+
+def test_progress_only_for_running_jobs(tmp_path):
+    """排隊中或已結束的任務不記錄進度"""
+    journal = JobJournal(str(tmp_path / "jobs.jsonl"))
+    journal.record("queued.mp4", STATE_QUEUED, "u1")
+    journal.record("done.mp4", STATE_DONE, "u2")
+    assert not journal.record_progress("queued.mp4", 100)
+    assert not journal.record_progress("done.mp4", 100)
+    assert not journal.record_progress("unknown.mp4", 100)
+    journal.close()
+
+
+def test_append_after_truncated_line_starts_new_line(tmp_path):
+    """上次崩潰留下沒有換行的半行時，新的記錄不會接在同一行而遺失"""
+    path = tmp_path / "jobs.jsonl"
+    path.write_text(json.dumps({"job": "a.mp4", "state": STATE_QUEUED, "url": "u"}) + "\n"
+                    + '{"job": "a.mp4", "sta', encoding="utf-8")
+    journal = JobJournal(str(path))
+    journal.record("b.mp4", STATE_QUEUED, "u2")
+
+    journal = reopen(journal)
+    assert journal.jobs["b.mp4"]["state"] == STATE_QUEUED
+    assert journal.jobs["a.mp4"]["state"] == STATE_QUEUED
+    journal.close()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+影片與音訊並行下載的單元測試（不連線，以假的影片資訊與下載函式測試）
+"""
+
+import threading
+
+import pytest
+import yt_dlp
+from yt_dlp.postprocessor import FFmpegMergerPP
+
+import src.parallel_streams as parallel_streams
+from src.parallel_streams import plan_parallel_streams, fetch_streams
+
+
+class StopDownload(Exception):
+    """記錄 yt-dlp 要下載的內容後中止，不實際連線與合併"""
+
+
+def video_info():
+    formats = [
+        {'format_id': "137", 'url': "https://example.com/video.mp4", 'ext': "mp4",
+         'vcodec': "avc1", 'acodec': "none", 'height': 1080, 'protocol': "https"},
+        {'format_id': "140", 'url': "https://example.com/audio.m4a", 'ext': "m4a",
+         'vcodec': "none", 'acodec': "mp4a", 'protocol': "https"},
+    ]
+    return {'id': "abc123", 'title': "Video", 'extractor': "generic", 'extractor_key': "Generic",
+            'webpage_url': "https://example.com/watch", 'formats': formats}
+
+
+@pytest.fixture(autouse=True)
+def merger_available(monkeypatch):
+    # 測試環境不一定有 ffmpeg，規劃時視為可以合併
+    monkeypatch.setattr(FFmpegMergerPP, "available", property(lambda self: True))
+
+
+@pytest.fixture
+def ydl(tmp_path):
+    params = {'quiet': True, 'format': "bestvideo+bestaudio",
+              'outtmpl': str(tmp_path / "%(title)s.%(ext)s")}
+    with yt_dlp.YoutubeDL(params) as ydl:
+        yield ydl
+
+
+def test_plan_matches_yt_dlp_filenames(ydl, monkeypatch):
+    """規劃的暫存檔名必須與 yt-dlp 合併前尋找的檔名相同，合併時才會沿用已下載的串流"""
+    plan = plan_parallel_streams(ydl, video_info())
+    assert plan is not None and len(plan) == 2
+
+    requested = []
+
+    def record_dl(self, name, info, *args, **kwargs):
+        # yt-dlp 逐一下載每個串流，記錄檔名後在合併前中止
+        requested.append(name)
+        if len(requested) == len(plan):
+            raise StopDownload()
+        return True, True
+
+    monkeypatch.setattr(yt_dlp.YoutubeDL, "dl", record_dl)
+    with pytest.raises(StopDownload):
+        ydl.process_ie_result(video_info(), download=True)
+    assert [filename for filename, _ in plan] == requested
+
+
+def test_plan_skips_single_format(ydl, tmp_path):
+    info = video_info()
+    info['formats'][0]['acodec'] = "mp4a"
+    with yt_dlp.YoutubeDL({'quiet': True, 'format': "best", 'outtmpl': str(tmp_path / "%(title)s.%(ext)s")}) as single:
+        assert plan_parallel_streams(single, info) is None
+
+
+def test_each_stream_uses_its_own_youtubedl(ydl, monkeypatch):
+    plan = plan_parallel_streams(ydl, video_info())
+    used = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(len(plan), timeout=5)
+
+    def fake_dl(self, name, info, *args, **kwargs):
+        with lock:
+            used.append(self)
+        # 確認所有串流是同時下載的
+        barrier.wait()
+        return True, True
+
+    monkeypatch.setattr(yt_dlp.YoutubeDL, "dl", fake_dl)
+    assert fetch_streams(ydl, plan) == []
+    assert len(used) == len(plan)
+    assert len({id(stream_ydl) for stream_ydl in used}) == len(plan)
+    assert all(stream_ydl is not ydl and stream_ydl.params is ydl.params for stream_ydl in used)
+
+
+def test_stream_youtubedl_reports_progress_hooks(ydl, monkeypatch):
+    hook = lambda status: None
+    ydl.params['progress_hooks'] = [hook]
+    plan = plan_parallel_streams(ydl, video_info())
+    hooks = []
+
+    def fake_dl(self, name, info, *args, **kwargs):
+        hooks.append(list(self._progress_hooks))
+        return True, True
+
+    monkeypatch.setattr(yt_dlp.YoutubeDL, "dl", fake_dl)
+    fetch_streams(ydl, plan)
+    assert all(hook in stream_hooks for stream_hooks in hooks)
+
+
+def test_failed_stream_is_reported(ydl, monkeypatch):
+    plan = plan_parallel_streams(ydl, video_info())
+    monkeypatch.setattr(yt_dlp.YoutubeDL, "dl", lambda self, name, info, *args, **kwargs: (name.endswith(".m4a"), False))
+    errors = fetch_streams(ydl, plan)
+    assert len(errors) == 1
+    assert "串流下載失敗" in str(errors[0])
+
+
+def test_stream_youtubedls_are_closed(ydl, monkeypatch):
+    plan = plan_parallel_streams(ydl, video_info())
+    closed = []
+    monkeypatch.setattr(yt_dlp.YoutubeDL, "dl", lambda self, name, info, *args, **kwargs: (True, True))
+    monkeypatch.setattr(parallel_streams.YoutubeDL, "close", lambda self: closed.append(self))
+    fetch_streams(ydl, plan)
+    assert len(closed) == len(plan)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+平台識別測試
+"""
+
+import pytest
+
+from src.platform_registry import (lookup_platform, PLATFORMS, UNKNOWN_PLATFORM,
+                                   UNKNOWN_DESCRIPTOR, YOUTUBE_FORMAT, MP4_FORMAT)
+
+
+@pytest.mark.parametrize("url, name", [
+    ("https://www.youtube.com/watch?v=dQw4w9WgXcQ", "YouTube"),
+    ("https://youtu.be/dQw4w9WgXcQ", "YouTube"),
+    ("https://music.youtube.com/watch?v=dQw4w9WgXcQ", "YouTube"),
+    ("https://vm.tiktok.com/ZMabc/", "TikTok"),
+    ("https://v.douyin.com/abc/", "抖音"),
+    ("https://fb.watch/abc/", "Facebook"),
+    ("https://www.instagram.com/reel/abc/", "Instagram"),
+    ("https://b23.tv/abc", "Bilibili"),
+    ("https://x.com/user/status/1", "X"),
+    ("https://mobile.twitter.com/user/status/1", "X"),
+    ("https://www.threads.net/@user/post/abc", "Threads"),
+])
+def test_known_hosts(url, name):
+    """主機名稱（含子網域）對應到正確的平台"""
+    assert lookup_platform(url)["name"] == name
+
+
+def test_url_without_scheme():
+    """沒有協定的網址也能辨識"""
+    assert lookup_platform("www.youtube.com/watch?v=dQw4w9WgXcQ")["name"] == "YouTube"
+    assert lookup_platform("  youtu.be/dQw4w9WgXcQ  ")["name"] == "YouTube"
+
+
+@pytest.mark.parametrize("url", [
+    "",
+    "   ",
+    "https://example.com/video.mp4",
+    "https://notyoutube.com/watch?v=1",
+    "https://youtube.com.evil.example/watch",
+    "not a url",
+])
+def test_unknown_urls(url):
+    """無法辨識的網址返回未知平台"""
+    info = lookup_platform(url)
+    assert info is UNKNOWN_DESCRIPTOR
+    assert info["name"] == UNKNOWN_PLATFORM
+
+
+def test_descriptor_contents():
+    """平台資訊包含登入需求與預設格式，且為唯讀"""
+    youtube = lookup_platform("https://youtu.be/x")
+    assert youtube is PLATFORMS["YouTube"]
+    assert youtube["download_options"]["format"] == YOUTUBE_FORMAT
+    assert not youtube["needs_login"]
+    assert PLATFORMS["Instagram"]["needs_login"]
+    assert PLATFORMS["TikTok"]["download_options"]["format"] == MP4_FORMAT
+    assert dict(UNKNOWN_DESCRIPTOR["download_options"]) == {}
+    with pytest.raises(TypeError):
+        youtube["name"] = "other"
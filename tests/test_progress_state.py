@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+下載狀態回報的單元測試：狀態由下載線程明確回報，不從訊息文字判斷
+"""
+
+import pytest
+
+from src.progress_model import DownloadState
+from src.progress_table import ProgressSnapshotTable
+
+
+@pytest.fixture
+def thread(qapp):
+    from src.tabbed_gui_demo import DownloadThread
+    thread = DownloadThread("https://example.com/v", "/tmp", "mp4", "best", "", True)
+    thread.progress_table = ProgressSnapshotTable()
+    thread.progress_table.timer.stop()
+    thread.job_name = "video"
+    return thread
+
+
+def reported_state(thread):
+    return thread.progress_table.snapshot(thread.job_name)[-1]
+
+
+def test_snapshot_carries_state(qapp):
+    table = ProgressSnapshotTable()
+    table.timer.stop()
+    table.update("a", "msg", 10, "--", "--", state=DownloadState.DOWNLOADING)
+    assert table.snapshot("a")[-1] is DownloadState.DOWNLOADING
+
+
+def test_state_follows_hook_status(thread):
+    thread.progress_hook({'status': 'downloading', 'downloaded_bytes': 50, 'total_bytes': 100})
+    assert reported_state(thread) is DownloadState.DOWNLOADING
+
+    thread.progress_hook({'status': 'finished', 'filename': 'video.mp4'})
+    assert reported_state(thread) is DownloadState.PROCESSING
+
+
+def test_message_only_reports_keep_state(thread):
+    thread.report_progress("下載中: 10%", 10, "--", "--", DownloadState.DOWNLOADING)
+    # 訊息文字含「錯誤」「完成」也不會改變狀態
+    thread.report_progress("處理進度時錯誤: 已完成的片段", 10, "--", "--")
+    assert reported_state(thread) is DownloadState.DOWNLOADING
+
+
+def test_title_with_keywords_does_not_change_state(thread):
+    thread.report_progress("開始下載: 暫停合併完成失敗", 0, "--", "--")
+    assert reported_state(thread) is DownloadState.WAITING
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+重試策略與斷路器測試
+"""
+
+import pytest
+
+import src.retry_policy as retry_policy
+from src.retry_policy import (classify_error, host_key, RetryPolicy, HostCircuitBreakers,
+                              ERROR_PERMANENT, ERROR_RATE_LIMITED, ERROR_TRANSIENT, ERROR_UNKNOWN)
+
+
+class FakeClock:
+    """取代 time.monotonic，模擬經過的時間"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(retry_policy.time, "monotonic", clock)
+    # 冷卻時間不加隨機比例，方便比對
+    monkeypatch.setattr(retry_policy.random, "uniform", lambda low, high: 1.0)
+    return clock
+
+
+@pytest.mark.parametrize("message, error_class", [
+    ("ERROR: [youtube] abc: Private video. Sign in if you've been granted access", ERROR_PERMANENT),
+    ("ERROR: Video unavailable. This video has been removed by the uploader", ERROR_PERMANENT),
+    ("ERROR: Unsupported URL: https://example.com/", ERROR_PERMANENT),
+    ("HTTP Error 404: Not Found", ERROR_PERMANENT),
+    ("HTTP Error 429: Too Many Requests", ERROR_RATE_LIMITED),
+    ("Sign in to confirm you're not a bot", ERROR_RATE_LIMITED),
+    ("HTTP Error 503: Service Unavailable", ERROR_TRANSIENT),
+    ("The read operation timed out", ERROR_TRANSIENT),
+    ("Connection reset by peer", ERROR_TRANSIENT),
+    ("HTTP Error 403: Forbidden", ERROR_UNKNOWN),
+    ("Postprocessing: ffmpeg not found", ERROR_UNKNOWN),
+    ("", ERROR_UNKNOWN),
+    (None, ERROR_UNKNOWN),
+])
+def test_classify_error(message, error_class):
+    assert classify_error(message) == error_class
+
+
+def test_host_key():
+    """已知平台的所有網域屬於同一組，其他網站使用主機名稱"""
+    assert host_key("https://youtu.be/x") == host_key("https://www.youtube.com/watch?v=x") == "YouTube"
+    assert host_key("https://cdn.example.com/video.mp4") == "cdn.example.com"
+    assert host_key("example.org/video") == "example.org"
+
+
+def test_should_retry():
+    policy = RetryPolicy(max_retries=2)
+    assert policy.should_retry(ERROR_TRANSIENT, 1)
+    assert policy.should_retry(ERROR_RATE_LIMITED, 2)
+    assert not policy.should_retry(ERROR_TRANSIENT, 3)
+    assert not policy.should_retry(ERROR_PERMANENT, 1)
+    assert not RetryPolicy(max_retries=0).should_retry(ERROR_TRANSIENT, 1)
+
+
+def test_delay_grows_with_jitter():
+    """等待時間指數成長，落在上限的一半到上限之間，且不超過 MAX_DELAY"""
+    policy = RetryPolicy(base_delay=4)
+    for attempt, ceiling in ((1, 4), (2, 8), (3, 16)):
+        for _ in range(20):
+            assert ceiling / 2 <= policy.delay(attempt) <= ceiling
+    assert policy.delay(30) <= RetryPolicy.MAX_DELAY
+
+
+def test_rate_limit_trips_immediately(clock):
+    """收到 429 立即暫停分派該平台，冷卻時間結束後恢復"""
+    breakers = HostCircuitBreakers()
+    cooldown = breakers.record_failure("YouTube", ERROR_RATE_LIMITED)
+    assert cooldown == HostCircuitBreakers.BASE_COOLDOWN
+    assert breakers.wait_time("YouTube") == pytest.approx(cooldown)
+    assert breakers.wait_time("Bilibili") == 0
+
+    clock.now += cooldown
+    assert breakers.wait_time("YouTube") == 0
+
+
+def test_consecutive_transient_failures_trip(clock):
+    """連續暫時性錯誤達到門檻才跳脫；永久錯誤不影響斷路器"""
+    breakers = HostCircuitBreakers()
+    for _ in range(HostCircuitBreakers.FAILURE_THRESHOLD - 1):
+        assert breakers.record_failure("host", ERROR_TRANSIENT) == 0
+        assert breakers.record_failure("host", ERROR_PERMANENT) == 0
+    assert breakers.record_failure("host", ERROR_TRANSIENT) > 0
+
+
+def test_half_open_probe(clock):
+    """冷卻結束後只放行一個試探任務：成功則恢復，失敗則以加倍的冷卻時間再次跳脫"""
+    breakers = HostCircuitBreakers()
+    first = breakers.record_failure("host", ERROR_RATE_LIMITED)
+    clock.now += first
+    breakers.job_started("host")
+    assert breakers.wait_time("host") > 0  # 試探任務進行中，其他任務等待
+
+    second = breakers.record_failure("host", ERROR_TRANSIENT)
+    assert second == 2 * first
+
+    clock.now += second
+    breakers.job_started("host")
+    breakers.record_success("host")
+    assert breakers.wait_time("host") == 0
+    # 恢復後重新從第一次跳脫的冷卻時間開始
+    assert breakers.record_failure("host", ERROR_RATE_LIMITED) == first
+
+
+def test_cooldown_is_capped(clock):
+    breakers = HostCircuitBreakers()
+    for _ in range(10):
+        cooldown = breakers.record_failure("host", ERROR_RATE_LIMITED)
+    assert cooldown == HostCircuitBreakers.MAX_COOLDOWN
+
+
+def open_probe(breakers, clock):
+    """跳脫並等冷卻結束，讓下一個任務成為試探任務"""
+    clock.now += breakers.record_failure("host", ERROR_RATE_LIMITED)
+    breakers.job_started("host")
+    assert breakers.wait_time("host") > 0
+
+
+def test_probe_with_permanent_error_is_released(clock):
+    """試探任務因影片本身的問題失敗時，下一個任務重新試探，不會一直等待"""
+    breakers = HostCircuitBreakers()
+    open_probe(breakers, clock)
+    assert breakers.record_failure("host", ERROR_PERMANENT) == 0
+    assert breakers.wait_time("host") == 0
+
+
+def test_cancelled_probe_is_released(clock):
+    """使用者取消試探任務後，下一個任務可以開始"""
+    breakers = HostCircuitBreakers()
+    open_probe(breakers, clock)
+    breakers.job_released("host")  # 取消
+    assert breakers.wait_time("host") == 0
+    breakers.job_started("host")
+    assert breakers.wait_time("host") > 0
+
+
+def test_skipped_probe_is_released(clock):
+    """試探任務因已在下載存檔中而略過時，下一個任務可以開始，之後的結果照常判斷"""
+    breakers = HostCircuitBreakers()
+    open_probe(breakers, clock)
+    breakers.job_released("host")  # 略過
+    assert breakers.wait_time("host") == 0
+
+    breakers.job_started("host")
+    assert breakers.record_failure("host", ERROR_TRANSIENT) > 0
+
+
+def test_release_without_breaker_is_harmless():
+    breakers = HostCircuitBreakers()
+    breakers.job_released("host")
+    assert breakers.wait_time("host") == 0
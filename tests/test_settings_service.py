@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+設定服務的單元測試
+"""
+
+import json
+
+from src.settings_service import SettingsService
+
+
+def test_settings_round_trip(tmp_path):
+    path = tmp_path / "setup.json"
+    service = SettingsService(str(path))
+    service.update({"download_path": "/videos", "max_concurrent_downloads": 3}, immediate=True)
+
+    reloaded = SettingsService(str(path))
+    assert reloaded.get_str("download_path") == "/videos"
+    assert reloaded.get_int("max_concurrent_downloads") == 3
+
+
+def test_history_is_persisted_unchanged(tmp_path):
+    path = tmp_path / "setup.json"
+    history = [{"url": f"https://example.com/{i}"} for i in range(500)]
+    path.write_text(json.dumps({"download_history": history}), encoding="utf-8")
+
+    service = SettingsService(str(path))
+    assert service.get("download_history") == history
+
+    service.set("theme", "dark", immediate=True)
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    assert saved["download_history"] == history
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+影片標準 ID 與已下載影片索引測試
+"""
+
+import pytest
+
+from src.video_key import video_key, canonical_key
+from src.download_index import DownloadIndex, format_signature
+
+YOUTUBE_URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+@pytest.mark.parametrize("url", [
+    YOUTUBE_URL,
+    "https://youtu.be/dQw4w9WgXcQ",
+    "https://m.youtube.com/watch?v=dQw4w9WgXcQ&t=10",
+    "  https://www.youtube.com/watch?v=dQw4w9WgXcQ  ",
+])
+def test_same_video_same_key(url):
+    """同一部影片的不同網址得到相同的 ID"""
+    assert video_key(url) == ("Youtube", "dQw4w9WgXcQ")
+    assert canonical_key(url) == "Youtube:dQw4w9WgXcQ"
+
+
+def test_other_platforms():
+    assert video_key("https://www.tiktok.com/@user/video/7100000000000000000") == \
+        ("TikTok", "7100000000000000000")
+
+
+@pytest.mark.parametrize("url", ["https://example.com/video.mp4", "not a url", ""])
+def test_unrecognised_urls(url):
+    """通用 extractor 或無法辨識的網址沒有 ID，標準 ID 使用網址本身"""
+    assert video_key(url) is None
+    assert canonical_key(url) == f"url:{url.strip()}"
+
+
+def test_format_signature():
+    """僅音訊格式與解析度無關"""
+    assert format_signature("最高品質", "1080p") == "最高品質|1080p"
+    assert format_signature("最高品質", None) == "最高品質|"
+    assert format_signature("僅音訊 (MP3)", "1080p") == format_signature("僅音訊 (MP3)", "720p")
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = DownloadIndex(str(tmp_path / "index.sqlite3"))
+    yield index
+    index.close()
+
+
+def test_index_lookup_by_video_and_format(index, tmp_path):
+    """以影片 ID 與格式查詢，其他網址寫法也能找到"""
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"data")
+    signature = format_signature("最高品質", "1080p")
+    index.record("https://youtu.be/dQw4w9WgXcQ", signature, str(video))
+
+    assert index.lookup(YOUTUBE_URL, signature) == str(video)
+    assert index.lookup(YOUTUBE_URL, format_signature("最高品質", "720p")) is None
+
+
+def test_index_forgets_deleted_files(index, tmp_path):
+    """檔案被刪除後視為未下載"""
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"data")
+    index.record(YOUTUBE_URL, "sig", str(video))
+    video.unlink()
+    assert index.lookup(YOUTUBE_URL, "sig") is None
+
+    video.write_bytes(b"data")
+    assert index.lookup(YOUTUBE_URL, "sig") is None
+
+
+def test_index_ignores_unrecognised_urls(index, tmp_path):
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"data")
+    index.record("https://example.com/video.mp4", "sig", str(video))
+    index.record(YOUTUBE_URL, "sig", "")
+    assert index.lookup("https://example.com/video.mp4", "sig") is None
+    assert index.lookup(YOUTUBE_URL, "sig") is None